@@ -0,0 +1,72 @@
+"""Construction time and tool count of many agents created in one process.
+
+Multi-tenant servers create one agent per tenant, so building an agent must not
+get slower, nor its toolset larger, as more agents exist. The agents are built
+in batches and the time per agent and the tool count are reported per batch.
+The script exits with an error when the last batch is more than `--max-slowdown`
+times slower than the first one, or when the tool count changes. Run from the
+repository root:
+
+    uv run python -m benchmarks.agent_construction
+"""
+
+import argparse
+import gc
+import logging
+import sys
+import time
+
+from src.langchain_box_agent.box_agent import LangChainBoxAgent
+from tests.box_stub_server import stub_client
+from tests.conftest import ToolCallingFakeChatModel
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--agents", type=int, default=1000)
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--max-slowdown", type=float, default=2.0)
+    args = parser.parse_args()
+
+    # box_ai_agents_toolkit turns on DEBUG logging for the root logger at import
+    logging.getLogger().setLevel(logging.WARNING)
+
+    # building an agent makes no request, the client never connects
+    client = stub_client("http://127.0.0.1:1")
+    model = ToolCallingFakeChatModel(responses=[])
+    agents = []
+    batch_times = []
+    tool_counts = set()
+
+    print(f"{'agents':>7} {'ms/agent':>9} {'tools':>6}")
+    for batch_start in range(0, args.agents, args.batch):
+        size = min(args.batch, args.agents - batch_start)
+        # full collections land in whichever batch crosses their threshold, and
+        # take longer as agents accumulate: they are kept out of the timings
+        gc.collect()
+        gc.disable()
+        start = time.perf_counter()
+        batch = [LangChainBoxAgent(client, model) for _ in range(size)]
+        # tools are built on first use, count them in the construction
+        for box_agent in batch:
+            box_agent.tools
+        elapsed = time.perf_counter() - start
+        gc.enable()
+        agents.extend(batch)
+
+        batch_times.append(elapsed / size)
+        tool_counts.update(len(box_agent.tools) for box_agent in batch)
+        print(
+            f"{len(agents):>7} {elapsed / size * 1000:>9.2f} {len(batch[-1].tools):>6}"
+        )
+
+    # the first agent parses the tool schemas, compare against the second batch
+    baseline = batch_times[1] if len(batch_times) > 1 else batch_times[0]
+    slowdown = batch_times[-1] / baseline
+    print(f"slowdown: {slowdown:.2f}x, tool counts: {sorted(tool_counts)}")
+    if slowdown > args.max_slowdown or len(tool_counts) != 1:
+        sys.exit("agent construction does not stay flat")
+
+
+if __name__ == "__main__":
+    main()
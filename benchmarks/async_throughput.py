@@ -0,0 +1,105 @@
+"""Throughput of the sync and async tool paths under concurrent conversations.
+
+Every simulated conversation runs the tool sequence a typical ReAct turn
+produces (search, read, ask Box AI) against a local stub Box server with a
+fixed per-request latency. In "sync" mode the tools only have a blocking
+implementation, so `ainvoke` falls back to the default executor; in "async"
+mode the coroutine implementations registered on the agent tools are used.
+
+The stub runs in its own process so it does not compete with the agent for the
+GIL. Run from the repository root:
+
+    uv run python -m benchmarks.async_throughput
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import time
+from typing import List
+
+from langchain.tools.base import StructuredTool
+from langchain_core.tools import BaseTool
+
+from src.langchain_box_agent.box_agent import LangChainBoxAgent
+from tests.box_stub_server import BoxStubServer, stub_client
+from tests.conftest import ToolCallingFakeChatModel
+
+CONVERSATION = [
+    ("box_search_tool", {"query": "invoice"}),
+    ("box_read_tool", {"file_id": "100"}),
+    ("box_ask_ai_tool", {"file_id": "100", "prompt": "Is there a PO reference?"}),
+]
+
+
+def serve_stub(latency: float, base_url_queue: multiprocessing.Queue):
+    logging.getLogger().setLevel(logging.WARNING)
+    stub = BoxStubServer(latency=latency).start()
+    stub.add_file("100", "invoice-001.pdf", text="Invoice 001, PO-001")
+    base_url_queue.put(stub.base_url)
+    # serve until the benchmark process terminates us
+    stub._thread.join()
+
+
+async def run_conversations(tools: List[BaseTool], concurrency: int) -> float:
+    """Runs `concurrency` conversations at once and returns the wall time."""
+    tools_by_name = {tool.name: tool for tool in tools}
+
+    async def conversation():
+        for tool_name, tool_args in CONVERSATION:
+            await tools_by_name[tool_name].ainvoke(tool_args)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(conversation() for _ in range(concurrency)))
+    return time.perf_counter() - start
+
+
+async def benchmark(
+    sync_tools: List[BaseTool], async_tools: List[BaseTool], args: argparse.Namespace
+):
+    # warm up the executor threads and connection pools before measuring
+    for tools in (sync_tools, async_tools):
+        await run_conversations(tools, max(args.concurrency))
+
+    print(f"stub latency per request: {args.latency * 1000:.0f} ms")
+    print(f"{'mode':<6} {'conversations':>13} {'seconds':>9} {'conv/s':>9}")
+    for concurrency in args.concurrency:
+        for mode, tools in (("sync", sync_tools), ("async", async_tools)):
+            elapsed = await run_conversations(tools, concurrency)
+            print(
+                f"{mode:<6} {concurrency:>13} {elapsed:>9.2f} "
+                f"{concurrency / elapsed:>9.1f}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 100])
+    args = parser.parse_args()
+
+    # box_ai_agents_toolkit turns on DEBUG logging for the root logger at import
+    logging.getLogger().setLevel(logging.WARNING)
+
+    base_url_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(
+        target=serve_stub, args=(args.latency, base_url_queue), daemon=True
+    )
+    server.start()
+    try:
+        client = stub_client(base_url_queue.get(timeout=30))
+        box_agent = LangChainBoxAgent(client, ToolCallingFakeChatModel(responses=[]))
+        async_tools = box_agent.tools
+        sync_tools = [
+            StructuredTool.from_function(tool.func, parse_docstring=True)
+            for tool in async_tools
+        ]
+
+        asyncio.run(benchmark(sync_tools, async_tools, args))
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Memory and throughput of the checkpointers over many conversation threads.
+
+Every synthetic thread is one agent turn (a user message and a model reply,
+no tool calls) run through the ReAct graph with a fake chat model, so only the
+checkpointer cost is measured. Each checkpointer runs in its own process and
+reports the growth of the peak resident memory of that process. Run from the
+repository root:
+
+    uv run python -m benchmarks.checkpointers
+"""
+
+import argparse
+import logging
+import multiprocessing
+import resource
+import tempfile
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import InMemorySaver
+
+from src.langchain_box_agent.box_agent import LangChainBoxAgent
+from src.langchain_box_agent.checkpoint import BoundedMemorySaver, SQLiteSaver
+from tests.box_stub_server import stub_client
+from tests.conftest import ToolCallingFakeChatModel
+
+
+def make_checkpointer(name: str, directory: str):
+    if name == "memory":
+        return InMemorySaver()
+    if name == "bounded":
+        return BoundedMemorySaver(max_threads=1000)
+    if name == "sqlite":
+        return SQLiteSaver(f"{directory}/batched.db")
+    if name == "sqlite-unbatched":
+        return SQLiteSaver(f"{directory}/unbatched.db", batch_size=1)
+    raise ValueError(name)
+
+
+def run(name: str, threads: int, message_chars: int, results: multiprocessing.Queue):
+    # box_ai_agents_toolkit turns on DEBUG logging for the root logger at import
+    logging.getLogger().setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as directory:
+        checkpointer = make_checkpointer(name, directory)
+        model = ToolCallingFakeChatModel(
+            responses=[AIMessage(content="r" * message_chars)]
+        )
+        box_agent = LangChainBoxAgent(
+            stub_client("http://127.0.0.1:1"), model, checkpointer=checkpointer
+        )
+        message = "q" * message_chars
+
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        for i in range(threads):
+            box_agent.react_agent.invoke(
+                {"messages": [HumanMessage(content=message)]},
+                {"configurable": {"thread_id": f"thread-{i}"}},
+            )
+        if isinstance(checkpointer, SQLiteSaver):
+            checkpointer.close()
+        elapsed = time.perf_counter() - start
+        # ru_maxrss is in KiB on Linux
+        rss_growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+
+    results.put((name, elapsed, rss_growth / 1024))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=10_000)
+    parser.add_argument("--message-chars", type=int, default=2_000)
+    parser.add_argument(
+        "--checkpointers",
+        nargs="+",
+        default=["memory", "bounded", "sqlite", "sqlite-unbatched"],
+    )
+    args = parser.parse_args()
+
+    print(f"{args.threads} threads, {args.message_chars} characters per message")
+    print(f"{'checkpointer':<17} {'seconds':>8} {'threads/s':>10} {'peak MiB':>9}")
+    for name in args.checkpointers:
+        results = multiprocessing.Queue()
+        process = multiprocessing.Process(
+            target=run, args=(name, args.threads, args.message_chars, results)
+        )
+        process.start()
+        name, elapsed, rss_growth = results.get()
+        process.join()
+        print(
+            f"{name:<17} {elapsed:>8.1f} {args.threads / elapsed:>10.0f} "
+            f"{rss_growth:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Cold start of the agent: import, construction, first graph and first answer.
+
+Serverless functions and `langgraph dev` reloads pay for everything done before
+the first answer in a fresh process. Each run starts a new interpreter that
+imports the agent module, builds an agent from client and model factories,
+compiles its graph and answers a scripted question calling one tool, against
+the local stub Box server. The median and minimum time of every stage since
+the start of the interpreter are reported. Run from the repository root:
+
+    uv run python -m benchmarks.cold_start
+"""
+
+import argparse
+import json
+import logging
+import statistics
+import subprocess
+import sys
+import time
+
+from tests.box_stub_server import BoxStubServer
+
+# the child prints the seconds of every stage, measured from its start
+CHILD = """
+import json, logging, sys, time
+start = time.perf_counter()
+import src.langchain_box_agent.box_agent as box_agent
+imported = time.perf_counter()
+logging.getLogger().setLevel(logging.WARNING)
+
+def client():
+    from tests.box_stub_server import stub_client
+    return stub_client(sys.argv[1])
+
+def model():
+    # imports the fake model with the graph, as a factory imports its provider
+    from tests.conftest import ToolCallingFakeChatModel
+    return ToolCallingFakeChatModel.from_script([("box_who_am_i", {})], "Done.")
+
+agent = box_agent.LangChainBoxAgent(client, model)
+built = time.perf_counter()
+agent.react_agent
+compiled = time.perf_counter()
+agent.react_agent.invoke({"messages": [("user", "who am I?")]})
+answered = time.perf_counter()
+print(json.dumps({
+    "import": imported - start,
+    "construct": built - start,
+    "graph": compiled - start,
+    "first answer": answered - start,
+}))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    # box_ai_agents_toolkit turns on DEBUG logging for the root logger at import
+    logging.getLogger().setLevel(logging.WARNING)
+
+    runs = []
+    with BoxStubServer() as stub:
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            output = subprocess.run(
+                [sys.executable, "-c", CHILD, stub.base_url],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            stages = json.loads(output.splitlines()[-1])
+            stages["process"] = time.perf_counter() - start
+            runs.append(stages)
+
+    print(f"{'stage':<13} {'p50 ms':>8} {'min ms':>8}")
+    for stage in runs[0]:
+        seconds = [run[stage] for run in runs]
+        print(
+            f"{stage:<13} {statistics.median(seconds) * 1000:>8.0f}"
+            f" {min(seconds) * 1000:>8.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
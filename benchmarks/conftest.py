@@ -0,0 +1,143 @@
+"""Fixtures of the pytest-benchmark suite.
+
+Everything runs offline: Box is the local stub server (`tests/box_stub_server.py`)
+and the chat model replays a script of tool calls. Besides the pytest-benchmark
+table, the suite reports the p50/p95 latency of every benchmark and the peak
+memory allocated by one call, measured separately with tracemalloc. Run from
+the repository root:
+
+    uv run pytest benchmarks
+    uv run pytest benchmarks --stub-latency 50 --stub-failure-rate 0.05
+"""
+
+import asyncio
+import logging
+import tracemalloc
+from typing import Callable, Iterator, List, Tuple
+
+import pytest
+from box_ai_agents_toolkit import BoxClient
+
+from tests.box_stub_server import BoxStubServer
+
+# box_ai_agents_toolkit turns on DEBUG logging for the root logger at import
+logging.getLogger().setLevel(logging.WARNING)
+
+# (benchmark name, p50 ms, p95 ms, peak KiB allocated by one call)
+_RESULTS: List[Tuple[str, float, float, float]] = []
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("box stub")
+    group.addoption(
+        "--stub-latency",
+        type=float,
+        default=0.0,
+        help="Milliseconds added to every stub Box request.",
+    )
+    group.addoption(
+        "--stub-jitter",
+        type=float,
+        default=0.0,
+        help="Up to this many extra milliseconds per stub Box request.",
+    )
+    group.addoption(
+        "--stub-failure-rate",
+        type=float,
+        default=0.0,
+        help="Share of stub Box requests answered with a 503 and Retry-After: 0.",
+    )
+
+
+def build_tree(stub: BoxStubServer, folders: int = 5, files_per_folder: int = 20):
+    """Adds a Contracts folder with sub-folders of text files to `stub`."""
+    stub.add_folder("10", "Contracts")
+    for f in range(folders):
+        folder_id = str(20 + f)
+        stub.add_folder(folder_id, f"Customer {f}", parent_id="10")
+        for i in range(files_per_folder):
+            file_id = str(1000 + f * files_per_folder + i)
+            stub.add_file(
+                file_id,
+                f"contract-{file_id}.txt",
+                text=f"Contract {file_id} with Customer {f}. " + "Clause. " * 500,
+                parent_id=folder_id,
+            )
+
+
+@pytest.fixture(scope="session")
+def bench_stub(request) -> Iterator[BoxStubServer]:
+    option = request.config.getoption
+    with BoxStubServer(
+        latency=option("--stub-latency") / 1000,
+        jitter=option("--stub-jitter") / 1000,
+        failure_rate=option("--stub-failure-rate"),
+    ) as stub:
+        build_tree(stub)
+        yield stub
+
+
+@pytest.fixture(scope="session")
+def bench_client(bench_stub: BoxStubServer) -> BoxClient:
+    return bench_stub.client()
+
+
+@pytest.fixture(scope="session")
+def event_loop_runner() -> Iterator[Callable]:
+    """Runs coroutines on one loop, so async clients are reused across rounds."""
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
+
+
+def _peak_allocated(function: Callable, *args, **kwargs) -> int:
+    tracemalloc.start()
+    try:
+        function(*args, **kwargs)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _percentile(data: List[float], percent: float) -> float:
+    data = sorted(data)
+    return data[min(len(data) - 1, round(percent / 100 * (len(data) - 1)))]
+
+
+@pytest.fixture
+def measure(benchmark, request) -> Callable:
+    """Benchmarks a call, then records its latency percentiles and allocations.
+
+    Allocations are measured on one extra call, outside the timed rounds, as
+    tracing slows every allocation down. They include the allocations of the
+    in-process stub server.
+    """
+
+    def run(function: Callable, *args, **kwargs):
+        result = benchmark(function, *args, **kwargs)
+        if benchmark.stats is None:  # --benchmark-disable
+            return result
+        data = benchmark.stats.stats.data
+        p50, p95 = _percentile(data, 50) * 1000, _percentile(data, 95) * 1000
+        peak_kib = _peak_allocated(function, *args, **kwargs) / 1024
+        benchmark.extra_info.update(
+            p50_ms=round(p50, 3), p95_ms=round(p95, 3), peak_kib=round(peak_kib, 1)
+        )
+        _RESULTS.append((request.node.name, p50, p95, peak_kib))
+        return result
+
+    return run
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _RESULTS:
+        return
+    width = max(len(name) for name, *_ in _RESULTS)
+    terminalreporter.write_sep("-", "latency percentiles and allocations")
+    terminalreporter.write_line(
+        f"{'name':<{width}} {'p50 ms':>9} {'p95 ms':>9} {'peak KiB':>9}"
+    )
+    for name, p50, p95, peak_kib in _RESULTS:
+        terminalreporter.write_line(
+            f"{name:<{width}} {p50:>9.2f} {p95:>9.2f} {peak_kib:>9.1f}"
+        )
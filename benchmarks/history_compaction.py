@@ -0,0 +1,73 @@
+"""Model input size per ReAct step, with and without history compaction.
+
+Simulates a session where every step reads a document with `box_read_tool`,
+and reports the approximate number of tokens sent to the model at a few steps
+of the session, plus the time spent compacting. Without compaction the input
+grows with every step, so the total cost of a session grows quadratically.
+Run from the repository root:
+
+    uv run python -m benchmarks.history_compaction
+"""
+
+import argparse
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.messages.utils import count_tokens_approximately
+
+from src.langchain_box_agent.compaction import HistoryCompactor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--steps", type=int, default=40)
+    parser.add_argument("--output-chars", type=int, default=20_000)
+    parser.add_argument("--max-tokens", type=int, default=8_000)
+    args = parser.parse_args()
+
+    compactor = HistoryCompactor(max_tokens=args.max_tokens)
+    messages = [HumanMessage(content="Compare the contracts of the Legal folder.")]
+    full_total = compacted_total = 0
+    compact_seconds = 0.0
+
+    print(f"{'step':>5} {'tokens':>9} {'compacted':>10}")
+    for step in range(1, args.steps + 1):
+        call_id = f"call_{step}"
+        messages.append(
+            AIMessage(
+                content="",
+                tool_calls=[
+                    {
+                        "name": "box_read_tool",
+                        "args": {"file_id": str(step)},
+                        "id": call_id,
+                    }
+                ],
+            )
+        )
+        messages.append(
+            ToolMessage(
+                content="clause " * (args.output_chars // 7),
+                name="box_read_tool",
+                tool_call_id=call_id,
+                id=f"message_{step}",
+            )
+        )
+
+        start = time.perf_counter()
+        compacted = compactor.compact({"messages": messages})
+        compact_seconds += time.perf_counter() - start
+
+        full_tokens = count_tokens_approximately(messages)
+        compacted_tokens = count_tokens_approximately(compacted)
+        full_total += full_tokens
+        compacted_total += compacted_tokens
+        if step in (1, 5, 10, 20) or step == args.steps:
+            print(f"{step:>5} {full_tokens:>9} {compacted_tokens:>10}")
+
+    print(f"session total: {full_total} tokens, {compacted_total} compacted")
+    print(f"compaction time: {compact_seconds / args.steps * 1000:.2f} ms per step")
+
+
+if __name__ == "__main__":
+    main()
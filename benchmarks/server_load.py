@@ -0,0 +1,167 @@
+"""Throughput and latency of the agent server under concurrent users.
+
+Virtual users post runs to an `AgentServer` and read their event streams to the
+end. Every run is a scripted ReAct turn (search, read a file, answer) against a
+local stub Box server with a fixed per-request latency, for `--users` users
+spread over `--tenants` tenants, so the client pool and the shared graphs are
+exercised too. The stub and the server each run in a process of their own.
+Run from the repository root:
+
+    uv run python -m benchmarks.server_load
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import statistics
+import time
+from typing import List, Tuple
+
+import httpx
+
+from src.langchain_box_agent.server import AgentPool, AgentServer
+from tests.box_stub_server import BoxStubServer, stub_client
+from tests.conftest import ConversationFakeChatModel
+
+
+def serve_stub(latency: float, base_url_queue: multiprocessing.Queue):
+    logging.getLogger().setLevel(logging.WARNING)
+    stub = BoxStubServer(latency=latency).start()
+    stub.add_file("100", "invoice-001.pdf", text="Invoice 001, PO-001")
+    base_url_queue.put(stub.base_url)
+    # serve until the benchmark process terminates us
+    stub._thread.join()
+
+
+def serve_agents(stub_url: str, base_url_queue: multiprocessing.Queue):
+    logging.getLogger().setLevel(logging.WARNING)
+    model = ConversationFakeChatModel.from_script(
+        [("box_search_tool", {"query": "invoice"})],
+        [("box_read_tool", {"file_id": "100"})],
+        "The invoice references PO-001.",
+    )
+    pool = AgentPool(model, lambda tenant_id, user_id: stub_client(stub_url))
+
+    async def main():
+        server = await AgentServer(pool, port=0).start()
+        base_url_queue.put(server.base_url)
+        await server.serve_forever()
+
+    asyncio.run(main())
+
+
+async def run_once(
+    client: httpx.AsyncClient, tenant_id: str, user_id: str
+) -> Tuple[float, float]:
+    """Posts a run and returns the seconds to its first event and to its end."""
+    start = time.perf_counter()
+    first_event = None
+    async with client.stream(
+        "POST",
+        "/v1/runs",
+        json={"message": "Which PO does invoice 001 reference?"},
+        headers={"X-Box-Tenant-Id": tenant_id, "X-Box-User-Id": user_id},
+    ) as response:
+        async for line in response.aiter_lines():
+            if first_event is None and line.startswith("event:"):
+                first_event = time.perf_counter() - start
+            if line == "event: error":
+                raise RuntimeError("a run failed")
+    return first_event or 0.0, time.perf_counter() - start
+
+
+async def load(
+    base_url: str, concurrency: int, runs: int, args: argparse.Namespace
+) -> Tuple[float, List[float], List[float]]:
+    """Runs `runs` runs, `concurrency` at a time, and returns the wall time and latencies."""
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=120
+    ) as client:
+        queue: asyncio.Queue[int] = asyncio.Queue()
+        for run in range(runs):
+            queue.put_nowait(run)
+        first_events: List[float] = []
+        totals: List[float] = []
+
+        async def virtual_user():
+            while not queue.empty():
+                run = queue.get_nowait()
+                user = run % args.users
+                first, total = await run_once(
+                    client, f"tenant-{user % args.tenants}", f"user-{user}"
+                )
+                first_events.append(first)
+                totals.append(total)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(virtual_user() for _ in range(concurrency)))
+        return time.perf_counter() - start, first_events, totals
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    return statistics.quantiles(values, n=100, method="inclusive")[
+        round(fraction * 100) - 1
+    ]
+
+
+async def benchmark(base_url: str, args: argparse.Namespace):
+    # warm up: every user gets its client and agent, every tenant its graph
+    await load(base_url, max(args.concurrency), args.users, args)
+
+    print(f"stub latency per request: {args.latency * 1000:.0f} ms")
+    print(
+        f"{'users':>6} {'runs':>6} {'runs/s':>8} {'first p50':>10} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    )
+    for concurrency in args.concurrency:
+        runs = concurrency * args.runs_per_user
+        elapsed, first_events, totals = await load(base_url, concurrency, runs, args)
+        print(
+            f"{concurrency:>6} {runs:>6} {runs / elapsed:>8.1f} "
+            f"{statistics.median(first_events) * 1000:>10.0f} "
+            f"{statistics.median(totals) * 1000:>8.0f} "
+            f"{percentile(totals, 0.95) * 1000:>8.0f} "
+            f"{percentile(totals, 0.99) * 1000:>8.0f}"
+        )
+
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        print("pool:", (await client.get("/healthz")).json())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--runs-per-user", type=int, default=5)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--tenants", type=int, default=10)
+    args = parser.parse_args()
+
+    # box_ai_agents_toolkit turns on DEBUG logging for the root logger at import
+    logging.getLogger().setLevel(logging.WARNING)
+
+    stub_queue = multiprocessing.Queue()
+    stub = multiprocessing.Process(
+        target=serve_stub, args=(args.latency, stub_queue), daemon=True
+    )
+    stub.start()
+    server = None
+    try:
+        server_queue = multiprocessing.Queue()
+        server = multiprocessing.Process(
+            target=serve_agents,
+            args=(stub_queue.get(timeout=30), server_queue),
+            daemon=True,
+        )
+        server.start()
+        asyncio.run(benchmark(server_queue.get(timeout=30), args))
+    finally:
+        if server is not None:
+            server.terminate()
+        stub.terminate()
+
+
+if __name__ == "__main__":
+    main()
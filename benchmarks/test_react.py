@@ -0,0 +1,69 @@
+from typing import Iterator
+
+import pytest
+from box_ai_agents_toolkit import BoxClient
+from langchain_core.messages import HumanMessage, ToolMessage
+
+from benchmarks.conftest import build_tree
+from src.langchain_box_agent.box_agent import LangChainBoxAgent
+from tests.box_stub_server import BoxStubServer
+from tests.conftest import ToolCallingFakeChatModel
+
+ANSWER = "Customer 1 has 20 contracts, 1020 and 1021 are the latest."
+
+
+def scripted_model() -> ToolCallingFakeChatModel:
+    """A five step session: locate a folder, list it, read two files, ask AI."""
+    return ToolCallingFakeChatModel.from_script(
+        [("box_search_folder_by_name", {"folder_name": "Customer 1"})],
+        [
+            (
+                "box_list_folder_content_by_folder_id",
+                {"folder_id": "21", "is_recursive": False},
+            )
+        ],
+        [
+            ("box_read_tool", {"file_id": "1020"}),
+            ("box_read_tool", {"file_id": "1021"}),
+        ],
+        [("box_ask_ai_tool", {"file_id": "1020", "prompt": "Summarize"})],
+        ANSWER,
+    )
+
+
+def inputs() -> dict:
+    return {"messages": [HumanMessage(content="What are Customer 1's contracts?")]}
+
+
+@pytest.fixture(scope="module")
+def flaky_client() -> Iterator[BoxClient]:
+    """A client of a stub that fails 10% of the requests with a retryable 503."""
+    with BoxStubServer(failure_rate=0.1, seed=1) as stub:
+        build_tree(stub)
+        yield stub.client()
+
+
+def test_react_run(measure, bench_client: BoxClient):
+    box_agent = LangChainBoxAgent(bench_client, scripted_model())
+
+    result = measure(box_agent.react_agent.invoke, inputs())
+
+    assert result["messages"][-1].content == ANSWER
+    assert sum(isinstance(m, ToolMessage) for m in result["messages"]) == 5
+
+
+def test_async_react_run(measure, event_loop_runner, bench_client: BoxClient):
+    box_agent = LangChainBoxAgent(bench_client, scripted_model())
+
+    result = measure(lambda: event_loop_runner(box_agent.react_agent.ainvoke(inputs())))
+
+    assert result["messages"][-1].content == ANSWER
+
+
+def test_react_run_with_failures(measure, flaky_client: BoxClient):
+    # the Box SDK retries the failed requests after the Retry-After delay
+    box_agent = LangChainBoxAgent(flaky_client, scripted_model())
+
+    result = measure(box_agent.react_agent.invoke, inputs())
+
+    assert result["messages"][-1].content == ANSWER
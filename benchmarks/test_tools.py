@@ -0,0 +1,55 @@
+import pytest
+from box_ai_agents_toolkit import BoxClient
+
+from src.langchain_box_agent.box_agent import TOOL_NAMES, LangChainBoxAgent
+from tests.conftest import ToolCallingFakeChatModel
+
+# arguments of one call of every tool, against the tree of `build_tree`
+TOOL_CALLS = {
+    "box_who_am_i": {},
+    "box_search_tool": {"query": "Customer 3"},
+    "box_read_tool": {"file_id": "1000"},
+    "box_ask_ai_tool": {"file_id": "1000", "prompt": "Who is the customer?"},
+    "box_ask_ai_multi_file_tool": {
+        "file_ids": [str(1000 + i) for i in range(50)],
+        "prompt": "Which contracts lack a date?",
+    },
+    "box_search_folder_by_name": {"folder_name": "Customer"},
+    "box_ai_extract_data": {"file_id": "1000", "fields": "customer, date"},
+    "box_ai_extract_data_batch": {"fields": "customer, date", "folder_id": "20"},
+    "box_list_folder_content_by_folder_id": {"folder_id": "10", "is_recursive": True},
+    "box_semantic_search": {"query": "customer clause", "folder_id": "20"},
+}
+
+
+@pytest.fixture(scope="module")
+def box_agent(bench_client: BoxClient, tmp_path_factory) -> LangChainBoxAgent:
+    from src.langchain_box_agent.retrieval import RetrievalIndex
+
+    index = RetrievalIndex(str(tmp_path_factory.mktemp("index")))
+    return LangChainBoxAgent(
+        bench_client,
+        ToolCallingFakeChatModel.from_script("done"),
+        retrieval_index=index,
+    )
+
+
+def test_every_tool_is_benchmarked(box_agent: LangChainBoxAgent):
+    assert set(TOOL_CALLS) == {tool.name for tool in box_agent.tools}
+    assert set(TOOL_NAMES) < set(TOOL_CALLS)
+
+
+@pytest.mark.parametrize("tool_name", TOOL_CALLS)
+def test_tool(measure, box_agent: LangChainBoxAgent, tool_name: str):
+    tool = next(tool for tool in box_agent.tools if tool.name == tool_name)
+
+    assert measure(tool.invoke, TOOL_CALLS[tool_name])
+
+
+@pytest.mark.parametrize("tool_name", TOOL_CALLS)
+def test_async_tool(
+    measure, event_loop_runner, box_agent: LangChainBoxAgent, tool_name: str
+):
+    tool = next(tool for tool in box_agent.tools if tool.name == tool_name)
+
+    assert measure(lambda: event_loop_runner(tool.ainvoke(TOOL_CALLS[tool_name])))
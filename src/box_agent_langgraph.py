@@ -1,20 +1,36 @@
-# Import required components
-from box_ai_agents_toolkit import get_ccg_client
-from langchain.chat_models import init_chat_model
+"""
+Graph of the LangChain Box Agent for `langgraph dev` and the LangGraph Platform.
+
+Importing this module builds nothing. LangGraph calls `make_graph` for the graph,
+which creates the language model; the Box client is only created, and
+authenticated, by the first tool call. Reloads and cold starts make no request.
+"""
+
+import functools
+from typing import TYPE_CHECKING
+
+from box_ai_agents_toolkit import BoxClient, get_ccg_client
 
 from langchain_box_agent.box_agent import LangChainBoxAgent
 
-# Initialize Box client
-client = get_ccg_client()
+if TYPE_CHECKING:
+    from langchain_core.language_models import BaseChatModel
+
+
+def chat_model() -> "BaseChatModel":
+    # langchain.chat_models imports the provider package, e.g. langchain_openai
+    from langchain.chat_models import init_chat_model
+
+    return init_chat_model("gpt-4", model_provider="openai")
 
-# Get user info for status message
-user_info = client.users.get_user_me()
-status_message = f"Connected as: {user_info.name}"
 
-# Initialize language model
-model = init_chat_model("gpt-4", model_provider="openai")
+def box_client() -> BoxClient:
+    # the client authenticates with its first request
+    return get_ccg_client()
 
-# Create the Box agent
-box_agent = LangChainBoxAgent(client, model, use_internal_memory=False)
 
-react_agent = box_agent.react_agent
+@functools.cache
+def make_graph():
+    """The ReAct graph of the agent, built once per process."""
+    box_agent = LangChainBoxAgent(box_client, chat_model, use_internal_memory=False)
+    return box_agent.react_agent
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Serves the LangChain Box Agent to many users over HTTP, streaming runs as
+server-sent events. Users are authenticated with the CCG app of BOX_CLIENT_ID
+and BOX_CLIENT_SECRET: the tenant is the enterprise ID, the user the Box user ID.
+"""
+
+import argparse
+import os
+
+from box_sdk_gen import BoxCCGAuth, BoxClient, CCGConfig
+from dotenv import load_dotenv
+from langchain.chat_models import init_chat_model
+
+from langchain_box_agent.cancellation import TurnBudget
+from langchain_box_agent.server import AgentPool, AgentServer
+
+
+def ccg_client(tenant_id: str, user_id: str) -> BoxClient:
+    config = CCGConfig(
+        client_id=os.environ["BOX_CLIENT_ID"],
+        client_secret=os.environ["BOX_CLIENT_SECRET"],
+        enterprise_id=tenant_id,
+        user_id=user_id,
+    )
+    return BoxClient(BoxCCGAuth(config))
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Serve the LangChain Box Agent")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-users", type=int, default=1000)
+    parser.add_argument("--turn-seconds", type=float, default=300.0)
+    parser.add_argument("--turn-tool-calls", type=int, default=50)
+    parser.add_argument("--turn-tokens", type=int, default=None)
+    args = parser.parse_args()
+
+    # Initialize language model, shared by every user
+    model = init_chat_model("gpt-4", model_provider="openai")
+
+    pool = AgentPool(
+        model, ccg_client, max_users=args.max_users, use_internal_memory=True
+    )
+    turn_budget = TurnBudget(
+        seconds=args.turn_seconds,
+        tool_calls=args.turn_tool_calls,
+        tokens=args.turn_tokens,
+    )
+    AgentServer(pool, host=args.host, port=args.port, turn_budget=turn_budget).run()
@@ -1,19 +1,25 @@
 import uuid
-from typing import Any, Iterator, Optional
+from typing import Iterator, Optional
 
-from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.messages import HumanMessage
 
 from langchain_box_agent.box_agent import LangChainBoxAgent
+from langchain_box_agent.cancellation import RunControl, TurnBudget
+from langchain_box_agent.streaming import AgentEvent, stream_events
 
 
 class RealBoxAgent:
     """Real Box agent that connects to Box API using LangChain."""
 
     def __init__(
-        self, langchain_agent: LangChainBoxAgent, chat_id: Optional[uuid.UUID] = None
+        self,
+        langchain_agent: LangChainBoxAgent,
+        chat_id: Optional[uuid.UUID] = None,
+        turn_budget: Optional[TurnBudget] = None,
     ):
-        """Initialize with a LangChain Box agent."""
+        """Initialize with a LangChain Box agent, and the limits of every turn."""
         self.agent = langchain_agent
+        self.turn_budget = turn_budget
         self.chat_id: uuid.UUID = None
         self.config: dict = {}
 
@@ -38,26 +44,18 @@ class RealBoxAgent:
         else:
             return "I received an empty response from the Box API."
 
-    def process_query_stream(self, query: str) -> Iterator[dict[str, Any] | Any]:
-        """Process a user query through the real Box agent."""
-        # Call the LangChain agent
-
-        for step in self.agent.react_agent.stream(
+    def process_query_stream(
+        self, query: str, control: Optional[RunControl] = None
+    ) -> Iterator[AgentEvent]:
+        """Process a user query, yielding the answer token by token.
+
+        Tool calls are yielded when they start and end, and the run ends with
+        the final answer. Cancelling `control` stops the run; by default, it
+        only ends with the turn budget.
+        """
+        yield from stream_events(
+            self.agent.react_agent,
             {"messages": [HumanMessage(content=query)]},
             config=self.config,
-            stream_mode="values",
-        ):
-            message = step["messages"][-1]
-
-            if isinstance(message, HumanMessage):
-                continue
-
-            if isinstance(message, ToolMessage):
-                content = f"Using tool {message.name}"
-                yield content
-
-            if isinstance(message, AIMessage):
-                content = message.content
-                if content == "":
-                    continue
-                yield content
+            control=control if control is not None else RunControl(self.turn_budget),
+        )
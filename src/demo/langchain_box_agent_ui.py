@@ -2,7 +2,15 @@ import threading
 import tkinter as tk
 from tkinter import scrolledtext, ttk
 
-from .langchain_box_agent_ui_utils import TypewriterText
+from langchain_box_agent.cancellation import RunControl
+from langchain_box_agent.streaming import (
+    FinalEvent,
+    TokenEvent,
+    ToolEndEvent,
+    ToolStartEvent,
+)
+
+from .langchain_box_agent_ui_utils import RenderQueue
 
 
 class LangChainBoxAgentUI(tk.Tk):
@@ -23,9 +31,8 @@ class LangChainBoxAgentUI(tk.Tk):
         self.agent = agent
         self.status_message = status_message
 
-        # Initialize typewriter effects
-        self.user_typewriter = None
-        self.agent_typewriter = None
+        # Control of the query being processed, the Stop button cancels it
+        self.control: RunControl | None = None
 
         # Sample predefined prompts
         self.predefined_prompts = [
@@ -38,6 +45,10 @@ class LangChainBoxAgentUI(tk.Tk):
         # Setup UI
         self.create_widgets()
 
+        # Widgets are only updated by the main loop, from this queue
+        self.render = RenderQueue(self, self.chat_history)
+        self.render.start()
+
         # Display welcome message
         self.add_agent_message("Hello! I'm your Box Agent. How can I help you today?")
 
@@ -120,6 +131,16 @@ class LangChainBoxAgentUI(tk.Tk):
         )
         send_button.pack(side=tk.RIGHT, padx=(5, 0))
 
+        # Stop button, cancelling the query being processed
+        stop_button = ttk.Button(
+            input_frame,
+            text="Stop",
+            command=self.stop_query,
+            style="Prompt.TButton",
+            width=8,
+        )
+        stop_button.pack(side=tk.RIGHT, padx=(5, 0))
+
         # Quick prompts (simple row of buttons)
         prompts_frame = ttk.Frame(main_frame)
         prompts_frame.pack(fill=tk.X, pady=(0, 5))
@@ -176,8 +197,17 @@ class LangChainBoxAgentUI(tk.Tk):
         # Display user message
         self.add_user_message(user_text)
 
-        # Process with agent in a separate thread
-        threading.Thread(target=self.process_with_agent, args=(user_text,)).start()
+        # Process with agent in a separate thread, until its turn budget runs out
+        # or the user stops it
+        self.control = RunControl(self.agent.turn_budget)
+        threading.Thread(
+            target=self.process_with_agent, args=(user_text, self.control)
+        ).start()
+
+    def stop_query(self):
+        """Stop the query being processed, and its Box requests."""
+        if self.control is not None:
+            self.control.cancel("stopped by the user")
 
     def on_enter_key(self, event):
         """Handle Enter key press in the input field."""
@@ -187,107 +217,73 @@ class LangChainBoxAgentUI(tk.Tk):
             return "break"  # Prevent the default behavior
         return None  # Allow default behavior
 
-    def process_with_agent(self, query: str):
-        """Process the user query with the Box agent."""
+    def process_with_agent(self, query: str, control: RunControl | None = None):
+        """Process the user query with the Box agent, off the main thread."""
         try:
             # Update status
-            self.status_var.set("Processing query...")
-
-            # Process query with the agent
-            for message in self.agent.process_query_stream(query):
-                # Add the agent's response to the chat
-                self.add_agent_message(message)
+            self.render.call(self.status_var.set, "Processing query...")
+
+            # Answers are shown token by token, tool calls as they start
+            answering = False
+            status = self.status_message
+            for event in self.agent.process_query_stream(query, control):
+                if isinstance(event, TokenEvent):
+                    if not answering:
+                        self.start_agent_message()
+                        answering = True
+                    self.append_agent_text(event.text)
+                    continue
+                answering = False
+                if isinstance(event, ToolStartEvent):
+                    self.add_agent_message(f"Using tool {event.name}")
+                elif isinstance(event, ToolEndEvent):
+                    self.render.call(
+                        self.status_var.set,
+                        f"{event.name} took {event.seconds:.1f} s",
+                    )
+                elif isinstance(event, FinalEvent) and event.stopped:
+                    self.add_agent_message(f"Stopped: {event.stopped}.")
+                    status = "Stopped"
 
             # Reset status
-            self.status_var.set(self.status_message)
+            self.render.call(self.status_var.set, status)
         except Exception as e:
             error_message = f"Error: {str(e)}"
             self.add_agent_message(error_message)
-            self.status_var.set("Error occurred")
+            self.render.call(self.status_var.set, "Error occurred")
             print(error_message)
         finally:
             # Re-enable the input field
-            self.user_input.config(state=tk.NORMAL)
-            self.user_input.delete(1.0, tk.END)
-            self.user_input.focus_set()
+            self.render.call(self.enable_input)
+
+    def enable_input(self):
+        """Re-enable the input field for the next query."""
+        self.user_input.config(state=tk.NORMAL)
+        self.user_input.delete(1.0, tk.END)
+        self.user_input.focus_set()
 
     def add_user_message(self, message: str):
         """Add user message to chat with imessage-like bubble effect."""
-
-        self.chat_history.config(state=tk.NORMAL)
-
-        # Add some padding before message
-        self.chat_history.insert(tk.END, "\n\n")
-
-        # Create marker for the start of message
-        start_position = self.chat_history.index(tk.END)
-
-        # Add the message header
-        self.chat_history.insert(tk.END, "You: \n", "user_message")
-
-        self.chat_history.config(state=tk.DISABLED)
-
-        # Start typewriter effect
-        if self.user_typewriter:
-            self.user_typewriter.stop_typing()
-
-        self.user_typewriter = TypewriterText(
-            widget=self.chat_history,
-            text=message,
-            delay=0.01,
-            callback=lambda: self.apply_message_formatting(
-                "user_message", start_position
-            ),
-        )
-        self.user_typewriter.start_typing()
+        self.render.put_text("\n\n")
+        self.render.put_text(f"You: \n{message}", "user_message")
 
     def add_agent_message(self, message: str):
         """Add agent message to chat with imessage-like bubble effect."""
+        self.start_agent_message()
+        self.append_agent_text(message)
 
-        self.chat_history.config(state=tk.NORMAL)
-
-        # Add some padding before message
-        self.chat_history.insert(tk.END, "\n\n")
-
-        # Create marker for the start of message
-        start_position = self.chat_history.index(tk.END)
-
-        # Add the message header
-        self.chat_history.insert(tk.END, "Box: \n", "agent_message")
-
-        self.chat_history.config(state=tk.DISABLED)
+    def start_agent_message(self):
+        """Start an agent message whose text is appended as it streams."""
+        self.render.put_text("\n\n")
+        self.render.put_text("Box: \n", "agent_message")
 
-        # Start typewriter effect
-        if self.agent_typewriter:
-            self.agent_typewriter.stop_typing()
-
-        self.agent_typewriter = TypewriterText(
-            widget=self.chat_history,
-            text=message,
-            delay=0.01,
-            callback=lambda: self.apply_message_formatting(
-                "agent_message", start_position
-            ),
-        )
-        self.agent_typewriter.start_typing()
-
-    def apply_message_formatting(self, tag_name, start_position):
-        """Apply message formatting after typewriter effect is complete."""
-        self.chat_history.config(state=tk.NORMAL)
-
-        # Get end position
-        end_position = self.chat_history.index(tk.END)
-
-        # Apply tag to the entire message
-        self.chat_history.tag_add(tag_name, start_position, end_position)
-
-        # Ensure message is visible
-        self.chat_history.see(tk.END)
-
-        self.chat_history.config(state=tk.DISABLED)
+    def append_agent_text(self, text: str):
+        """Append streamed text to the current agent message."""
+        self.render.put_text(text, "agent_message")
 
     def clear_chat(self):
         """Clear the chat history."""
+        self.render.clear()
         self.chat_history.config(state=tk.NORMAL)
         self.chat_history.delete(1.0, tk.END)
         self.chat_history.config(state=tk.DISABLED)
@@ -1,61 +1,137 @@
-import threading
-import time
+import queue
 import tkinter as tk
-from typing import Protocol
+from typing import TYPE_CHECKING, Callable, Iterator, List, Optional, Protocol, Tuple
+
+if TYPE_CHECKING:
+    from langchain_box_agent.cancellation import RunControl, TurnBudget
+    from langchain_box_agent.streaming import AgentEvent
 
 
 class Agent(Protocol):
     """Protocol for agent implementations."""
 
+    turn_budget: Optional["TurnBudget"]
+
     def process_query(self, query: str) -> str:
         """Process a user query and return a response."""
         ...
 
+    def process_query_stream(
+        self, query: str, control: Optional["RunControl"] = None
+    ) -> Iterator["AgentEvent"]:
+        """Process a user query, yielding events until `control` stops it."""
+        ...
 
-class TypewriterText:
-    """Simulates typewriter effect for text."""
 
-    def __init__(self, widget, text, delay=0.02, callback=None):
+class RenderQueue:
+    """Renders the chat on the Tk main loop, in batches of one frame.
+
+    Any thread can queue text and calls; Tk widgets are only touched by the
+    main loop, which drains the queue every `frame_ms` milliseconds with
+    `after()`. Consecutive texts with the same tag are merged into one insert,
+    and at most `chars_per_frame` characters are inserted per frame, so the
+    cost of a frame is bounded however long the message is, and long answers
+    still appear progressively.
+
+    Args:
+        root: The Tk root scheduling the frames.
+        widget: The text widget of the chat, kept disabled between frames.
+        frame_ms (int): Milliseconds between two frames.
+        chars_per_frame (int): Maximum characters inserted per frame.
+        calls_per_frame (int): Maximum queued calls run per frame.
+    """
+
+    def __init__(
+        self,
+        root,
+        widget,
+        frame_ms: int = 16,
+        chars_per_frame: int = 400,
+        calls_per_frame: int = 100,
+    ):
+        self.root = root
         self.widget = widget
-        self.text = text
-        self.delay = delay
-        self.callback = callback
-        self.i = 0
-        self.typing = False
-        self.cancel = False
-
-    def start_typing(self):
-        """Start the typewriter effect in a separate thread."""
-        if not self.typing:
-            self.typing = True
-            self.cancel = False
-            self.i = 0
-            threading.Thread(target=self._type_text).start()
-
-    def _type_text(self):
-        """Implementation of typewriter effect."""
-        while self.i < len(self.text) and not self.cancel:
-            char = self.text[self.i]
-            self.widget.config(state=tk.NORMAL)
-            self.widget.insert(tk.END, char)
-            self.widget.see(tk.END)
-            self.widget.config(state=tk.DISABLED)
-            self.i += 1
-            time.sleep(self.delay)
-
-        self.typing = False
-        if self.callback and not self.cancel:
-            self.callback()
-
-    def stop_typing(self):
-        """Stop the typewriter effect and display the full text immediately."""
-        self.cancel = True
-        remaining_text = self.text[self.i :]
-        if remaining_text:
-            self.widget.config(state=tk.NORMAL)
-            self.widget.insert(tk.END, remaining_text)
-            self.widget.see(tk.END)
-            self.widget.config(state=tk.DISABLED)
+        self.frame_ms = frame_ms
+        self.chars_per_frame = chars_per_frame
+        self.calls_per_frame = calls_per_frame
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        # the rest of a text that did not fit in the previous frame
+        self._pending: Optional[Tuple[str, Optional[str]]] = None
+        # texts are queued with the generation they belong to, `clear` starts
+        # a new one
+        self._generation = 0
+
+    def start(self):
+        """Starts drawing frames, from the main thread."""
+        self.root.after(self.frame_ms, self._frame)
+
+    def put_text(self, text: str, tag: Optional[str] = None):
+        """Appends text, e.g. a token delta, at the end of the chat."""
+        if text:
+            self._queue.put(("text", text, tag, self._generation))
+
+    def call(self, func: Callable, *args):
+        """Runs `func(*args)` on the main loop, after the texts queued before."""
+        self._queue.put(("call", func, args))
+
+    def clear(self):
+        """Drops the texts not rendered yet, from the main thread.
+
+        Queued calls are kept, e.g. the one enabling the input again. The
+        queue is left to the producers: the dropped texts are skipped when
+        they come out of it.
+        """
+        self._pending = None
+        self._generation += 1
+
+    def _frame(self):
+        try:
+            self.render_frame()
+        finally:
+            self.root.after(self.frame_ms, self._frame)
+
+    def render_frame(self):
+        """Renders what fits in one frame."""
+        chars = self.chars_per_frame
+        calls = self.calls_per_frame
+        batch: List[Tuple[str, Optional[str]]] = []
+        while chars > 0 and calls > 0:
+            if self._pending is not None:
+                item = ("text", *self._pending, self._generation)
+                self._pending = None
+            elif not self._queue.empty():
+                item = self._queue.get_nowait()
+            else:
+                break
+
+            if item[0] == "call":
+                # calls see the texts queued before them
+                self._insert(batch)
+                batch = []
+                item[1](*item[2])
+                calls -= 1
+                continue
+
+            _, text, tag, generation = item
+            if generation != self._generation:
+                continue
+            if len(text) > chars:
+                text, self._pending = text[:chars], (text[chars:], tag)
+            chars -= len(text)
+            if batch and batch[-1][1] == tag:
+                batch[-1] = (batch[-1][0] + text, tag)
+            else:
+                batch.append((text, tag))
+        self._insert(batch)
+
+    def _insert(self, batch: List[Tuple[str, Optional[str]]]):
+        if not batch:
+            return
+        self.widget.config(state=tk.NORMAL)
+        for text, tag in batch:
+            self.widget.insert(tk.END, text, *((tag,) if tag else ()))
+        self.widget.see(tk.END)
+        self.widget.config(state=tk.DISABLED)
 
 
 class MacStyles:
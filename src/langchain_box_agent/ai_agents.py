@@ -0,0 +1,73 @@
+from typing import Any, Dict, Union
+
+from box_ai_agents_toolkit import box_claude_ai_agent_ask, box_claude_ai_agent_extract
+from box_sdk_gen import AiAgentAsk, AiAgentExtract
+from box_sdk_gen.serialization.json import deserialize
+
+AiAgent = Union[AiAgentAsk, AiAgentExtract]
+
+# kind of Box AI agent used by each Box AI tool
+AI_AGENT_KINDS: Dict[str, str] = {
+    "box_ask_ai_tool": "ask",
+    "box_ask_ai_multi_file_tool": "ask",
+    "box_ai_extract_data": "extract",
+    "box_ai_extract_data_batch": "extract",
+}
+
+
+class AiAgentRegistry:
+    """Box AI agent configurations of the Box AI tools, built once and reused.
+
+    Every tool uses the configuration of its kind ("ask" or "extract"), unless
+    it has one of its own in `tools`. The defaults are the Claude agents of
+    box_ai_agents_toolkit.
+
+    Args:
+        ask (AiAgentAsk | None): Configuration of the ask tools.
+        extract (AiAgentExtract | None): Configuration of the extract tools.
+        tools (Dict[str, AiAgent] | None): Configuration per tool name.
+    """
+
+    def __init__(
+        self,
+        ask: AiAgentAsk | None = None,
+        extract: AiAgentExtract | None = None,
+        tools: Dict[str, AiAgent] | None = None,
+    ):
+        self.ask = ask if ask is not None else box_claude_ai_agent_ask()
+        self.extract = extract if extract is not None else box_claude_ai_agent_extract()
+        self.tools = dict(tools or {})
+        for tool_name in self.tools:
+            if tool_name not in AI_AGENT_KINDS:
+                raise ValueError(
+                    f"{tool_name} does not use Box AI, Box AI tools are: "
+                    + ", ".join(AI_AGENT_KINDS)
+                )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "AiAgentRegistry":
+        """Builds a registry from Box API JSON, e.g. read from a deployment config.
+
+        `data` has optional "ask" and "extract" agents and a "tools" mapping of
+        tool names to agents, each in the format of the Box AI `ai_agent` field.
+        """
+        tools = {}
+        for tool_name, agent in data.get("tools", {}).items():
+            agent_type = AiAgentExtract if "extract" in agent["type"] else AiAgentAsk
+            tools[tool_name] = deserialize(agent, agent_type)
+        return cls(
+            ask=deserialize(data["ask"], AiAgentAsk) if "ask" in data else None,
+            extract=(
+                deserialize(data["extract"], AiAgentExtract)
+                if "extract" in data
+                else None
+            ),
+            tools=tools,
+        )
+
+    def get(self, tool_name: str) -> AiAgent:
+        """Returns the configuration used by the `tool_name` tool."""
+        agent = self.tools.get(tool_name)
+        if agent is not None:
+            return agent
+        return self.extract if AI_AGENT_KINDS[tool_name] == "extract" else self.ask
@@ -1,92 +1,422 @@
+import asyncio
+import contextlib
+import csv
+import functools
+import io
 import json
-from typing import List, Union
+import threading
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    ContextManager,
+    Dict,
+    List,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
 
 from box_ai_agents_toolkit import (
     BoxClient,
     File,
     Folder,
     SearchForContentContentTypes,
-    box_claude_ai_agent_ask,
-    box_claude_ai_agent_extract,
     box_file_ai_ask,
     box_file_ai_extract,
     box_file_text_extract,
-    box_folder_list_content,
     box_locate_folder_by_name,
-    box_search,
+    box_multi_file_ai_ask,
+)
+from langchain_core.runnables import Runnable, RunnableBinding
+from langchain_core.runnables.config import (
+    ContextThreadPoolExecutor,
+    var_child_runnable_config,
+)
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.config import get_stream_writer
+from langgraph.types import StreamWriter
+from pydantic import BaseModel
+
+from .ai_agents import AiAgentRegistry
+from .box_async import AsyncBoxClient
+from .box_events import listing_group
+from .box_search import (
+    SEARCH_BASE_FIELDS,
+    SEARCH_PAGE_SIZE,
+    aiter_search_pages,
+    iter_search_pages,
 )
-from langchain.tools.base import StructuredTool
-from langchain_core.language_models import (
-    BaseChatModel,
+from .box_text import aread_text_window, iter_file_text, read_text_window
+from .cache import ToolCache
+from .cancellation import current_control, stoppable
+from .folder_index import FolderIndex
+from .output_budget import OutputBudget
+from .prefetch import (
+    FileVersions,
+    PrefetchPolicy,
+    Prefetcher,
+    aread_up_to,
+    read_up_to,
+)
+from .resilience import HttpPolicy
+from .telemetry import BYTES_BUCKETS, Span, Telemetry
+from .folder_walk import (
+    FOLDER_PAGE_SIZE,
+    FOLDER_WALK_CONCURRENCY,
+    PageCallback,
+    awalk_folder,
+    folder_item_dict,
+    walk_folder,
+)
+from .timing import ToolTimings
+
+if TYPE_CHECKING:
+    from langchain_core.language_models import BaseChatModel
+    from langchain_core.tools import BaseTool, StructuredTool
+    from langgraph.graph.graph import CompiledGraph
+
+    from .compaction import HistoryCompactor
+    from .retrieval import RetrievalIndex
+
+# build the client or the model on first use, e.g. to start serverless functions fast
+BoxClientFactory = Callable[[], BoxClient]
+ChatModelFactory = Callable[[], "BaseChatModel"]
+
+# maximum number of files Box AI answers about in one multiple_item_qa request
+AI_ASK_MAX_FILES = 20
+
+# tools whose results can be cached through the `tool_caches` option
+CACHEABLE_TOOLS = ("box_read_tool", "box_list_folder_content_by_folder_id")
+
+# tools every agent has, each one is a method with an "a" prefixed async twin
+TOOL_NAMES = (
+    "box_who_am_i",
+    "box_search_tool",
+    "box_read_tool",
+    "box_ask_ai_tool",
+    "box_ask_ai_multi_file_tool",
+    "box_search_folder_by_name",
+    "box_ai_extract_data",
+    "box_ai_extract_data_batch",
+    "box_list_folder_content_by_folder_id",
 )
-from langchain_core.tools import BaseTool
-from langgraph.checkpoint.memory import MemorySaver
-from langgraph.graph.graph import CompiledGraph
-from langgraph.prebuilt import create_react_agent
+
+# (name, description, args schema) of the tools, keyed by agent class and method
+_TOOL_SCHEMAS: Dict[Tuple[type, str], Tuple[str, str, Type[BaseModel]]] = {}
 
 
 class LangChainBoxAgent:
-    client: BoxClient
-    react_agent: CompiledGraph
-    tools: List[BaseTool] = []
+    tool_caches: Dict[str, ToolCache]
+    read_max_chars: int | None
+    search_limit: int
+    list_max_items: int | None
+    list_page_size: int
+    list_concurrency: int
+    extract_concurrency: int
+    ask_concurrency: int
+    extract_max_files: int
+    ai_agents: AiAgentRegistry
+    timings: ToolTimings
+    retrieval_index: "RetrievalIndex | None"
+    folder_index: FolderIndex | None
+    http_policy: HttpPolicy | None
+    telemetry: Telemetry | None
+    output_budgets: Dict[str, OutputBudget | None]
+    prefetcher: Prefetcher | None
 
     def __init__(
-        self, client: BoxClient, model: BaseChatModel, use_internal_memory: bool = False
+        self,
+        client: BoxClient | BoxClientFactory,
+        model: "BaseChatModel | ChatModelFactory",
+        use_internal_memory: bool = False,
+        max_async_connections: int = 100,
+        max_tool_concurrency: int = 10,
+        tool_concurrency: Dict[str, int | None] | None = None,
+        tool_caches: Dict[str, ToolCache] | None = None,
+        read_max_chars: int | None = 20_000,
+        retrieval_index: "RetrievalIndex | None" = None,
+        list_max_items: int | None = 1000,
+        list_page_size: int = FOLDER_PAGE_SIZE,
+        list_concurrency: int = FOLDER_WALK_CONCURRENCY,
+        checkpointer: BaseCheckpointSaver | None = None,
+        history_compactor: "HistoryCompactor | None" = None,
+        extract_concurrency: int = 4,
+        extract_max_files: int = 500,
+        ai_agents: AiAgentRegistry | None = None,
+        ask_concurrency: int = 4,
+        search_limit: int = 30,
+        folder_index: FolderIndex | None = None,
+        http_policy: HttpPolicy | None = None,
+        telemetry: Telemetry | None = None,
+        max_output_tokens: int | None = 8_000,
+        output_budgets: Dict[str, OutputBudget | None] | None = None,
+        prefetch: PrefetchPolicy | None = None,
     ):
-        self.client = client
+        # clients and models given as factories are built on first use
+        self._client_factory = (
+            client if not isinstance(client, BoxClient) else lambda: client
+        )
+        self._client: BoxClient | None = None
+        self._async_client: AsyncBoxClient | None = None
+        self._max_async_connections = max_async_connections
+        self._tools: "List[BaseTool] | None" = None
+        self._lock = threading.Lock()
+        self.http_policy = http_policy
+        self.telemetry = telemetry
+        self.read_max_chars = read_max_chars
+        self.search_limit = search_limit
+        self.list_max_items = list_max_items
+        self.list_page_size = list_page_size
+        self.list_concurrency = list_concurrency
+        self.extract_concurrency = extract_concurrency
+        self.extract_max_files = extract_max_files
+        self.ask_concurrency = ask_concurrency
+        self.retrieval_index = retrieval_index
+        self.folder_index = folder_index
+        # Box AI agent configs are built once and sent with every request
+        self.ai_agents = ai_agents if ai_agents is not None else AiAgentRegistry()
+        self.timings = ToolTimings()
 
-        self._init_tools()
-        memory = None
+        self.tool_caches = dict(tool_caches or {})
+        for tool_name in self.tool_caches:
+            if tool_name not in CACHEABLE_TOOLS:
+                raise ValueError(
+                    f"{tool_name} can not be cached, cacheable tools are: "
+                    + ", ".join(CACHEABLE_TOOLS)
+                )
 
-        if use_internal_memory:
-            memory = MemorySaver()
+        # files are read ahead into the cache of the read tool
+        if prefetch is not None and "box_read_tool" not in self.tool_caches:
+            raise ValueError("prefetch needs a tool cache for box_read_tool")
+        self.prefetcher = Prefetcher(prefetch) if prefetch is not None else None
 
-        self.react_agent = create_react_agent(model, self.tools, checkpointer=memory)
+        if use_internal_memory and checkpointer is not None:
+            raise ValueError("use_internal_memory and checkpointer are exclusive")
 
-    def _init_tools(self):
-        """Initialize the tools for the agent."""
-        self.tools.append(
-            StructuredTool.from_function(
-                self.box_who_am_i,
-                parse_docstring=True,
-            )
+        memory = checkpointer
+
+        # every tool output fits a budget, unless its tool has None for budget
+        default_budget = (
+            OutputBudget(max_tokens=max_output_tokens)
+            if max_output_tokens is not None
+            else None
         )
-        self.tools.append(
-            StructuredTool.from_function(
-                self.box_search_tool,
-                parse_docstring=True,
-            )
+        tool_names = self._tool_names()
+        for tool_name in output_budgets or {}:
+            if tool_name not in tool_names:
+                raise ValueError(
+                    f"{tool_name} is not a tool of this agent, its tools are: "
+                    + ", ".join(tool_names)
+                )
+        self.output_budgets = {
+            tool_name: (output_budgets or {}).get(tool_name, default_budget)
+            for tool_name in tool_names
+        }
+
+        # conversations are kept in process memory, forgetting the least recent ones
+        if use_internal_memory:
+            from .checkpoint import BoundedMemorySaver
+
+            memory = BoundedMemorySaver()
+
+        # old tool outputs are compacted in the model input, not in the history
+        prompt = None
+        if history_compactor is not None:
+            prompt = history_compactor.as_prompt()
+
+        # the graph is compiled on first use, agents only lending their tools skip it
+        self._graph_options = {
+            "model": model,
+            "prompt": prompt,
+            "checkpointer": memory,
+            "max_tool_concurrency": max_tool_concurrency,
+            "tool_concurrency": tool_concurrency,
+        }
+        self._react_agent: "CompiledGraph | RunnableBinding | None" = None
+
+    @property
+    def client(self) -> BoxClient:
+        """The Box client of the tools, built on first use from a client factory."""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    client = self._client_factory()
+                    # the tools send their requests through the policy, if any
+                    if self.http_policy is not None:
+                        client = self.http_policy.wrap(client)
+                    if self.telemetry is not None:
+                        client = self.telemetry.instrument(client)
+                    # and send none once the run they belong to is stopped
+                    self._client = stoppable(client)
+        return self._client
+
+    @property
+    def async_client(self) -> AsyncBoxClient:
+        """Async client of the async tools, sharing the auth of `client`."""
+        if self._async_client is None:
+            client = self.client
+            with self._lock:
+                if self._async_client is None:
+                    self._async_client = AsyncBoxClient(
+                        client,
+                        max_connections=self._max_async_connections,
+                        http_policy=self.http_policy,
+                        telemetry=self.telemetry,
+                    )
+        return self._async_client
+
+    @property
+    def tools(self) -> List["BaseTool"]:
+        """The tools of the agent, built on first use."""
+        if self._tools is None:
+            with self._lock:
+                if self._tools is None:
+                    self._tools = [
+                        self._bind_tool(tool_name) for tool_name in self._tool_names()
+                    ]
+        return self._tools
+
+    @property
+    def react_agent(self) -> "CompiledGraph | RunnableBinding":
+        """The ReAct graph of the agent, bound to the telemetry callbacks if any."""
+        if self._react_agent is None:
+            self._react_agent = self.build_react_agent(self.tools)
+        return self._react_agent
+
+    def build_react_agent(
+        self, tools: Sequence["BaseTool"]
+    ) -> "CompiledGraph | RunnableBinding":
+        """Compiles a ReAct graph calling `tools` with the model and options of this agent.
+
+        `react_agent` calls the tools of this agent. Servers compile one graph for
+        many agents, with tools passing each call on to the agent of the request.
+        """
+        # langgraph.prebuilt is imported with the first graph, not with the agent
+        from langgraph.prebuilt import create_react_agent
+
+        from .tool_node import BoxToolNode
+
+        options = self._graph_options
+        model = options["model"]
+        if callable(model) and not isinstance(model, Runnable):
+            model = options["model"] = model()
+        # tool calls of one model turn run in parallel, with Box AI calls capped
+        tool_node = BoxToolNode(
+            tools,
+            max_concurrency=options["max_tool_concurrency"],
+            tool_concurrency=options["tool_concurrency"],
         )
-        self.tools.append(
-            StructuredTool.from_function(
-                self.box_read_tool,
-                parse_docstring=True,
-            )
+        graph = create_react_agent(
+            model,
+            tool_node,
+            prompt=options["prompt"],
+            checkpointer=options["checkpointer"],
         )
-        self.tools.append(
-            StructuredTool.from_function(
-                self.box_ask_ai_tool,
-                parse_docstring=True,
+        if self.telemetry is not None:
+            return graph.with_config(callbacks=[self.telemetry.callback_handler()])
+        return graph
+
+    def _tool_names(self) -> List[str]:
+        tool_names = list(TOOL_NAMES)
+        if self.retrieval_index is not None:
+            tool_names.append("box_semantic_search")
+        return tool_names
+
+    def _bind_tool(self, tool_name: str) -> "StructuredTool":
+        """Builds a tool running the `tool_name` method of this agent.
+
+        Parsing the docstring into the tool schema is the expensive part of building
+        a tool, so it is done once per class and the schema is shared by every agent.
+        """
+        # langchain_core.tools is imported with the first tools, not with the agent
+        from langchain_core.tools import StructuredTool
+
+        func = getattr(self, tool_name)
+        coroutine = getattr(self, f"a{tool_name}")
+        key = (type(self), tool_name)
+        schema = _TOOL_SCHEMAS.get(key)
+        if schema is None:
+            tool = StructuredTool.from_function(
+                func, coroutine=coroutine, parse_docstring=True
             )
+            schema = (tool.name, tool.description, tool.args_schema)
+            _TOOL_SCHEMAS[key] = schema
+
+        name, description, args_schema = schema
+        return StructuredTool(
+            name=name,
+            description=description,
+            args_schema=args_schema,
+            func=self._timed(tool_name, func),
+            coroutine=self._atimed(tool_name, coroutine),
         )
-        self.tools.append(
-            StructuredTool.from_function(
-                self.box_search_folder_by_name,
-                parse_docstring=True,
-            )
+
+    def _timed(self, tool_name: str, func: Callable) -> Callable:
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            control = current_control()
+            if control is not None:
+                control.start_tool_call()
+            with self.timings.call(tool_name), self._traced(tool_name) as span:
+                result = self._fit_output(tool_name, func(*args, **kwargs))
+                return self._record_payload(tool_name, span, result)
+
+        return timed
+
+    def _atimed(self, tool_name: str, coroutine: Callable) -> Callable:
+        @functools.wraps(coroutine)
+        async def timed(*args, **kwargs):
+            control = current_control()
+            if control is not None:
+                control.start_tool_call()
+            with self.timings.call(tool_name), self._traced(tool_name) as span:
+                if control is None:
+                    result = await coroutine(*args, **kwargs)
+                else:
+                    # a stopped run cancels the call, and its requests in flight
+                    result = await control.run(coroutine(*args, **kwargs))
+                result = self._fit_output(tool_name, result)
+                return self._record_payload(tool_name, span, result)
+
+        return timed
+
+    def _traced(self, tool_name: str) -> ContextManager[Span | None]:
+        if self.telemetry is None:
+            return contextlib.nullcontext()
+        # the tool run of the graph, whose step is the parent of the tool span
+        config = var_child_runnable_config.get() or {}
+        run_id = getattr(config.get("callbacks"), "parent_run_id", None)
+        return self.telemetry.span(
+            f"tool {tool_name}",
+            metric="box_agent_tool_seconds",
+            labels={"tool": tool_name},
+            run_id=run_id,
+            counters=True,
+            tool=tool_name,
         )
-        self.tools.append(
-            StructuredTool.from_function(
-                self.box_ai_extract_data,
-                parse_docstring=True,
-            )
+
+    def _fit_output(self, tool_name: str, result: str) -> str:
+        # listings, searches and reads fit their budget already, with an offset
+        budget = self.output_budgets.get(tool_name)
+        if budget is None or not isinstance(result, str):
+            return result
+        return budget.truncate(
+            result,
+            f"[Output cut to {budget.limit} {budget.unit} of {budget.size(result)}. "
+            f"Call {tool_name} again with narrower arguments to see the rest.]",
         )
-        self.tools.append(
-            StructuredTool.from_function(
-                self.box_list_folder_content_by_folder_id,
-                parse_docstring=True,
+
+    def _record_payload(self, tool_name: str, span: Span | None, result: str) -> str:
+        if span is not None and isinstance(result, str):
+            size = len(result.encode("utf-8"))
+            span.attributes["payload_bytes"] = size
+            self.telemetry.observe(
+                "box_agent_tool_payload_bytes", size, BYTES_BUCKETS, tool=tool_name
             )
-        )
+        return result
 
     def box_who_am_i(self) -> str:
         """who am I, Retrieves the current user's information in box. Checks the connection to Box
@@ -98,12 +428,21 @@ class LangChainBoxAgent:
 
         return f"Authenticated as: {current_user.name}"
 
+    async def abox_who_am_i(self) -> str:
+        """Async version of `box_who_am_i`."""
+        current_user = await self.async_client.get_user_me()
+
+        return f"Authenticated as: {current_user.name}"
+
     def box_search_tool(
         self,
         query: str,
         file_extensions: List[str] | None = None,
         where_to_look_for_query: List[str] | None = None,
         ancestor_folder_ids: List[str] | None = None,
+        limit: int | None = None,
+        offset: int = 0,
+        fields: List[str] | None = None,
     ) -> str:
         """Searches for files in Box using the specified query and filters.
 
@@ -117,42 +456,149 @@ class LangChainBoxAgent:
                 COMMENTS
                 TAG
             ancestor_folder_ids (List[str] | None): A list of ancestor folder IDs to limit the search scope.
+            limit (int | None): The maximum number of results to return, None for the default limit.
+            offset (int): The number of results to skip, to see the next results of a search.
+            fields (List[str] | None): The fields shown after the name and ID of each file, e.g. ['modified_at', 'size']. None shows the description.
 
         Returns:
-            str: A formatted string containing the search results.
+            str: One line per file with its name, ID and the requested fields. When more results are available, a note with the offset of the next results follows.
         """
 
         # Convert the where to look for query to content types
-        content_types: List[SearchForContentContentTypes] = []
-        if where_to_look_for_query:
-            for content_type in where_to_look_for_query:
-                content_types.append(SearchForContentContentTypes[content_type])
+        content_types = self._content_types(where_to_look_for_query)
+        limit = limit or self.search_limit
+        fields = ["description"] if fields is None else fields
 
-        # Search for files with the query
-        search_results = box_search(
-            self.client, query, file_extensions, content_types, ancestor_folder_ids
+        # pages are requested lazily, only as many as the limit needs
+        search_results: List[File] = []
+        total_count = 0
+        for page in iter_search_pages(
+            self.client,
+            query,
+            file_extensions,
+            content_types,
+            ancestor_folder_ids,
+            fields=self._search_fields(fields),
+            offset=offset,
+            page_size=min(limit, SEARCH_PAGE_SIZE),
+        ):
+            total_count = page.total_count or 0
+            search_results.extend((page.entries or [])[: limit - len(search_results)])
+            if len(search_results) >= limit:
+                break
+
+        self._prefetch(search_results)
+        return self._format_search_results(
+            search_results,
+            fields,
+            offset,
+            total_count,
+            self.output_budgets.get("box_search_tool"),
         )
 
-        # Return the "id", "name", "description" of the search results
-        search_results = [
-            f"{file.name} (id:{file.id})"
-            + (f" {file.description}" if file.description else "")
-            for file in search_results
-        ]
+    async def abox_search_tool(
+        self,
+        query: str,
+        file_extensions: List[str] | None = None,
+        where_to_look_for_query: List[str] | None = None,
+        ancestor_folder_ids: List[str] | None = None,
+        limit: int | None = None,
+        offset: int = 0,
+        fields: List[str] | None = None,
+    ) -> str:
+        """Async version of `box_search_tool`."""
+        content_types = self._content_types(where_to_look_for_query)
+        limit = limit or self.search_limit
+        fields = ["description"] if fields is None else fields
 
-        return "\n".join(search_results)
+        search_results: List[File] = []
+        total_count = 0
+        async for page in aiter_search_pages(
+            self.async_client,
+            query,
+            file_extensions,
+            content_types,
+            ancestor_folder_ids,
+            fields=self._search_fields(fields),
+            offset=offset,
+            page_size=min(limit, SEARCH_PAGE_SIZE),
+        ):
+            total_count = page.total_count or 0
+            search_results.extend((page.entries or [])[: limit - len(search_results)])
+            if len(search_results) >= limit:
+                break
+
+        self._aprefetch(search_results)
+        return self._format_search_results(
+            search_results,
+            fields,
+            offset,
+            total_count,
+            self.output_budgets.get("box_search_tool"),
+        )
 
-    def box_read_tool(self, file_id: str) -> str:
+    def box_read_tool(
+        self, file_id: str, offset: int = 0, max_chars: int | None = None
+    ) -> str:
         """Reads the text content of a file in Box.
 
+        Long documents are returned one window of text at a time. When more text follows, the response ends with the offset to pass to read the next window.
+
         Args:
             file_id (str): The ID of the file to read.
+            offset (int): The character offset to start reading from, 0 for the start of the file.
+            max_chars (int | None): The maximum number of characters to return, None for the default window size.
 
         Returns:
             str: The text content of the file.
         """
-        response = box_file_text_extract(self.client, file_id)
-        return response
+        max_chars = self._read_window(max_chars)
+        cache = self.tool_caches.get("box_read_tool")
+        if cache is None:
+            if max_chars is None:
+                return box_file_text_extract(self.client, file_id)[offset:]
+
+            # stream the text so only the requested window is downloaded
+            text, next_offset = read_text_window(
+                iter_file_text(self.client, file_id), offset, max_chars
+            )
+            return self._format_text_window(file_id, text, offset, next_offset)
+
+        # the extracted text is cached per file version
+        file = self.client.files.get_file_by_id(file_id, fields=["etag", "sha1"])
+        key = ToolCache.key("text", file_id, file.sha_1 or file.etag)
+        if self.prefetcher is not None:
+            self.prefetcher.join(file_id)
+        response = cache.get(key)
+        if response is None:
+            response = box_file_text_extract(self.client, file_id)
+            cache.set(key, response)
+        return self._slice_text(file_id, response, offset, max_chars)
+
+    async def abox_read_tool(
+        self, file_id: str, offset: int = 0, max_chars: int | None = None
+    ) -> str:
+        """Async version of `box_read_tool`."""
+        max_chars = self._read_window(max_chars)
+        cache = self.tool_caches.get("box_read_tool")
+        if cache is None:
+            if max_chars is None:
+                return (await self.async_client.file_text_extract(file_id))[offset:]
+
+            text, next_offset = await aread_text_window(
+                self.async_client.iter_file_text(file_id), offset, max_chars
+            )
+            return self._format_text_window(file_id, text, offset, next_offset)
+
+        file = await self.async_client.get_file(file_id, fields=["etag", "sha1"])
+        key = ToolCache.key("text", file_id, file.sha_1 or file.etag)
+        if self.prefetcher is not None:
+            await self.prefetcher.ajoin(file_id)
+        response = cache.get(key)
+        if response is None:
+            response = await self.async_client.file_text_extract(file_id)
+            cache.set(key, response)
+        return self._slice_text(file_id, response, offset, max_chars)
 
     def box_ask_ai_tool(self, file_id: str, prompt: str) -> str:
         """Asks Box AI about a file in Box.
@@ -164,31 +610,244 @@ class LangChainBoxAgent:
         Returns:
             str: The AI-generated response based on the file's content.
         """
-        ai_agent = box_claude_ai_agent_ask()
-        response = box_file_ai_ask(
-            self.client, file_id, prompt=prompt, ai_agent=ai_agent
-        )
+        ai_agent = self.ai_agents.get("box_ask_ai_tool")
+        with self.timings.box_ai_request():
+            response = box_file_ai_ask(
+                self.client, file_id, prompt=prompt, ai_agent=ai_agent
+            )
+
+        return response
+
+    async def abox_ask_ai_tool(self, file_id: str, prompt: str) -> str:
+        """Async version of `box_ask_ai_tool`."""
+        ai_agent = self.ai_agents.get("box_ask_ai_tool")
+        with self.timings.box_ai_request():
+            response = await self.async_client.file_ai_ask(
+                file_id, prompt=prompt, ai_agent=ai_agent
+            )
 
         return response
 
+    def box_ask_ai_multi_file_tool(self, file_ids: List[str], prompt: str) -> str:
+        """Asks Box AI one question about several files in Box, answered across all of them.
+
+        Use it instead of calling box_ask_ai_tool once per file for questions comparing or combining files.
+
+        Args:
+            file_ids (List[str]): The IDs of the files to analyze.
+            prompt (str): The prompt or question to ask the AI.
+
+        Returns:
+            str: The AI-generated answer. When there are more than 20 files, they are asked about in groups of 20, and the answer of each group follows the IDs of its files.
+        """
+        ai_agent = self.ai_agents.get("box_ask_ai_multi_file_tool")
+        chunks = self._ai_ask_chunks(file_ids)
+
+        def ask(chunk: List[str]) -> Dict:
+            with self.timings.box_ai_request():
+                return box_multi_file_ai_ask(
+                    self.client, chunk, prompt=prompt, ai_agent=ai_agent
+                )
+
+        with ContextThreadPoolExecutor(
+            max_workers=max(1, min(self.ask_concurrency, len(chunks)))
+        ) as executor:
+            responses = list(executor.map(ask, chunks))
+
+        return self._merge_answers(chunks, responses)
+
+    async def abox_ask_ai_multi_file_tool(
+        self, file_ids: List[str], prompt: str
+    ) -> str:
+        """Async version of `box_ask_ai_multi_file_tool`."""
+        ai_agent = self.ai_agents.get("box_ask_ai_multi_file_tool")
+        chunks = self._ai_ask_chunks(file_ids)
+        semaphore = asyncio.Semaphore(self.ask_concurrency)
+
+        async def ask(chunk: List[str]) -> Dict:
+            async with semaphore:
+                with self.timings.box_ai_request():
+                    return await self.async_client.multi_file_ai_ask(
+                        chunk, prompt=prompt, ai_agent=ai_agent
+                    )
+
+        responses = await asyncio.gather(*(ask(chunk) for chunk in chunks))
+
+        return self._merge_answers(chunks, responses)
+
     def box_search_folder_by_name(self, folder_name: str) -> str:
-        """Locates a folder in Box by its name.
+        """Locates a folder in Box by its name, or by its path.
 
         Args:
-            folder_name (str): The name of the folder to locate.
+            folder_name (str): The name of the folder to locate, or a path of folder names separated by "/", e.g. "Procurement/Invoices/2024". A path starts from the root folder, or from any folder named like its first segment.
 
         Returns:
-            str: A formatted string containing the folder's ID and name.
+            str: A formatted string containing the folder's ID and name, or path.
         """
+        if "/" in folder_name.strip("/"):
+            return self._format_folder_paths(self._resolve_folder_path(folder_name))
 
-        search_results = box_locate_folder_by_name(self.client, folder_name)
+        return self._format_folder_results(self._locate_folders(folder_name))
 
-        # Return the "id", "name", "description" of the search results
-        search_results = [
-            f"{folder.name} (id:{folder.id})" for folder in search_results
-        ]
+    async def abox_search_folder_by_name(self, folder_name: str) -> str:
+        """Async version of `box_search_folder_by_name`."""
+        if "/" in folder_name.strip("/"):
+            return self._format_folder_paths(
+                await self._aresolve_folder_path(folder_name)
+            )
 
-        return "\n".join(search_results)
+        return self._format_folder_results(await self._alocate_folders(folder_name))
+
+    @property
+    def _on_folder_page(self) -> PageCallback | None:
+        # folder listings warm the folder index
+        return None if self.folder_index is None else self.folder_index.add_items
+
+    def _indexed_folders(self, folder_name: str) -> List[Folder] | None:
+        # only a search done before answers, listings miss other matches
+        index = self.folder_index
+        if index is None:
+            return None
+        ids = index.search(folder_name)
+        if not ids:
+            return None
+        return [Folder(id=folder_id, name=index.name(folder_id)) for folder_id in ids]
+
+    def _locate_folders(self, folder_name: str) -> List[Folder]:
+        folders = self._indexed_folders(folder_name)
+        if folders is None:
+            folders = box_locate_folder_by_name(self.client, folder_name)
+            if self.folder_index is not None:
+                self.folder_index.remember_search(folder_name, folders)
+        return folders
+
+    async def _alocate_folders(self, folder_name: str) -> List[Folder]:
+        folders = self._indexed_folders(folder_name)
+        if folders is None:
+            folders = await self.async_client.locate_folder_by_name(folder_name)
+            if self.folder_index is not None:
+                self.folder_index.remember_search(folder_name, folders)
+        return folders
+
+    def _child_folder(
+        self, index: FolderIndex, parent_id: str, name: str
+    ) -> str | None:
+        folder_id = index.child(parent_id, name)
+        if folder_id is None and not index.is_listed(parent_id):
+            # one listing indexes every sub folder, the next segments are local
+            for _ in walk_folder(
+                self.client,
+                parent_id,
+                max_depth=1,
+                page_size=self.list_page_size,
+                max_concurrency=self.list_concurrency,
+                on_page=index.add_items,
+            ):
+                pass
+            index.mark_listed(parent_id)
+            folder_id = index.child(parent_id, name)
+        return folder_id
+
+    async def _achild_folder(
+        self, index: FolderIndex, parent_id: str, name: str
+    ) -> str | None:
+        folder_id = index.child(parent_id, name)
+        if folder_id is None and not index.is_listed(parent_id):
+            async for _ in awalk_folder(
+                self.async_client,
+                parent_id,
+                max_depth=1,
+                page_size=self.list_page_size,
+                max_concurrency=self.list_concurrency,
+                on_page=index.add_items,
+            ):
+                pass
+            index.mark_listed(parent_id)
+            folder_id = index.child(parent_id, name)
+        return folder_id
+
+    def _path_index(self) -> FolderIndex:
+        # without a folder index, listings are only shared by the segments of one path
+        if self.folder_index is None:
+            return FolderIndex(ttl=None)
+        return self.folder_index
+
+    def _resolve_folder_path(self, path: str) -> List[Tuple[str, str]]:
+        """Returns the (path, id) of the folders at `path`.
+
+        The path is looked up from the root folder first, then from the folders
+        found by a search for its first segment.
+        """
+        index = self._path_index()
+        first, *segments = [segment.strip() for segment in path.split("/") if segment]
+        root_child = self._child_folder(index, "0", first)
+        folder_ids = self._descend(index, [root_child] if root_child else [], segments)
+        if not folder_ids:
+            start_ids = []
+            for folder in self._locate_folders(first):
+                if (
+                    folder.name.casefold() == first.casefold()
+                    and folder.id != root_child
+                ):
+                    index.add(folder.id, folder.name)
+                    start_ids.append(folder.id)
+            folder_ids = self._descend(index, start_ids, segments)
+        return self._folder_paths(index, folder_ids, len(segments))
+
+    async def _aresolve_folder_path(self, path: str) -> List[Tuple[str, str]]:
+        index = self._path_index()
+        first, *segments = [segment.strip() for segment in path.split("/") if segment]
+        root_child = await self._achild_folder(index, "0", first)
+        folder_ids = await self._adescend(
+            index, [root_child] if root_child else [], segments
+        )
+        if not folder_ids:
+            start_ids = []
+            for folder in await self._alocate_folders(first):
+                if (
+                    folder.name.casefold() == first.casefold()
+                    and folder.id != root_child
+                ):
+                    index.add(folder.id, folder.name)
+                    start_ids.append(folder.id)
+            folder_ids = await self._adescend(index, start_ids, segments)
+        return self._folder_paths(index, folder_ids, len(segments))
+
+    def _descend(
+        self, index: FolderIndex, folder_ids: List[str], segments: List[str]
+    ) -> List[str]:
+        for segment in segments:
+            folder_ids = [
+                child_id
+                for folder_id in folder_ids
+                if (child_id := self._child_folder(index, folder_id, segment))
+            ]
+        return folder_ids
+
+    async def _adescend(
+        self, index: FolderIndex, folder_ids: List[str], segments: List[str]
+    ) -> List[str]:
+        for segment in segments:
+            folder_ids = [
+                child_id
+                for folder_id in folder_ids
+                if (child_id := await self._achild_folder(index, folder_id, segment))
+            ]
+        return folder_ids
+
+    @staticmethod
+    def _folder_paths(
+        index: FolderIndex, folder_ids: List[str], depth: int
+    ) -> List[Tuple[str, str]]:
+        # names are read back from the index, with the case used in Box
+        paths = []
+        for folder_id in folder_ids:
+            names, current = [], folder_id
+            for _ in range(depth + 1):
+                names.append(index.name(current) or "?")
+                current = index.parent_id(current)
+            paths.append(("/".join(reversed(names)), folder_id))
+        return paths
 
     def box_ai_extract_data(self, file_id: str, fields: str) -> str:
         """Extracts data from a file in Box using AI.
@@ -201,37 +860,681 @@ class LangChainBoxAgent:
             str: The extracted data in JSON string format.
         """
 
-        ai_agent = box_claude_ai_agent_extract()
-        response = box_file_ai_extract(self.client, file_id, fields, ai_agent=ai_agent)
+        ai_agent = self.ai_agents.get("box_ai_extract_data")
+        with self.timings.box_ai_request():
+            response = box_file_ai_extract(
+                self.client, file_id, fields, ai_agent=ai_agent
+            )
 
         return json.dumps(response)
 
+    async def abox_ai_extract_data(self, file_id: str, fields: str) -> str:
+        """Async version of `box_ai_extract_data`."""
+        ai_agent = self.ai_agents.get("box_ai_extract_data")
+        with self.timings.box_ai_request():
+            response = await self.async_client.file_ai_extract(
+                file_id, fields, ai_agent=ai_agent
+            )
+
+        return json.dumps(response)
+
+    def box_ai_extract_data_batch(
+        self,
+        fields: str,
+        file_ids: List[str] | None = None,
+        folder_id: str | None = None,
+        is_recursive: bool = False,
+    ) -> str:
+        """Extracts the same data from many files in Box using AI, in a single call.
+
+        Use it instead of calling box_ai_extract_data once per file.
+
+        Args:
+            fields (str): The fields to extract from every file.
+            file_ids (List[str] | None): The IDs of the files to analyze.
+            folder_id (str | None): The ID of a folder whose files are analyzed, in addition to file_ids.
+            is_recursive (bool): Whether the files of the sub folders of folder_id are analyzed too.
+
+        Returns:
+            str: A CSV table with one row per file: its ID and name, one column per extracted field, and an error column for the files that could not be analyzed.
+        """
+        files: Dict[str, str | None] = dict.fromkeys(file_ids or [])
+        if folder_id is not None:
+            for item in walk_folder(
+                self.client,
+                folder_id,
+                max_depth=None if is_recursive else 1,
+                page_size=self.list_page_size,
+                max_concurrency=self.list_concurrency,
+                on_page=self._on_folder_page,
+            ):
+                if item.type == "file":
+                    files.setdefault(item.id, item.name)
+                if len(files) > self.extract_max_files:
+                    break
+
+        ai_agent = self.ai_agents.get("box_ai_extract_data_batch")
+
+        def extract(file_id: str) -> Dict | Exception:
+            try:
+                with self.timings.box_ai_request():
+                    return box_file_ai_extract(
+                        self.client, file_id, fields, ai_agent=ai_agent
+                    )
+            except Exception as error:
+                return error
+
+        ids = list(files)[: self.extract_max_files]
+        # the context carries the timing of this call to the worker threads
+        with ContextThreadPoolExecutor(
+            max_workers=max(1, min(self.extract_concurrency, len(ids)))
+        ) as executor:
+            responses = list(executor.map(extract, ids))
+
+        return self._format_extractions(files, responses)
+
+    async def abox_ai_extract_data_batch(
+        self,
+        fields: str,
+        file_ids: List[str] | None = None,
+        folder_id: str | None = None,
+        is_recursive: bool = False,
+    ) -> str:
+        """Async version of `box_ai_extract_data_batch`."""
+        files: Dict[str, str | None] = dict.fromkeys(file_ids or [])
+        if folder_id is not None:
+            async for item in awalk_folder(
+                self.async_client,
+                folder_id,
+                max_depth=None if is_recursive else 1,
+                page_size=self.list_page_size,
+                max_concurrency=self.list_concurrency,
+                on_page=self._on_folder_page,
+            ):
+                if item.type == "file":
+                    files.setdefault(item.id, item.name)
+                if len(files) > self.extract_max_files:
+                    break
+
+        ai_agent = self.ai_agents.get("box_ai_extract_data_batch")
+        semaphore = asyncio.Semaphore(self.extract_concurrency)
+
+        async def extract(file_id: str) -> Dict | Exception:
+            async with semaphore:
+                try:
+                    with self.timings.box_ai_request():
+                        return await self.async_client.file_ai_extract(
+                            file_id, fields, ai_agent=ai_agent
+                        )
+                except Exception as error:
+                    return error
+
+        ids = list(files)[: self.extract_max_files]
+        responses = await asyncio.gather(*(extract(file_id) for file_id in ids))
+
+        return self._format_extractions(files, responses)
+
     def box_list_folder_content_by_folder_id(
-        self, folder_id: str, is_recursive: bool
+        self,
+        folder_id: str,
+        is_recursive: bool,
+        max_depth: int | None = None,
+        max_items: int | None = None,
+        offset: int = 0,
     ) -> str:
         """Lists the content of a folder in Box by its ID.
 
+        Recursive listings are breadth first: the content of the folder comes first, then the content of its sub folders, one level at a time.
+
         Args:
             folder_id (str): The ID of the folder to list the content of.
             is_recursive (bool): Whether to list the content recursively.
+            max_depth (int | None): For recursive listings, the number of folder levels to list, None for no limit.
+            max_items (int | None): The maximum number of items to return, None for the default limit.
+            offset (int): The number of items to skip, to see the next items of a listing.
 
         Returns:
-            str: The content of the folder in JSON string format, including the "id", "name", "type", and "description".
+            str: The content of the folder as a JSON list, one item per line with its "id", "name", "type" and "description" if it has one. When the listing stops before its end, a note with the offset of the next items follows the JSON.
         """
+        max_depth = max_depth if is_recursive else 1
+        max_items = max_items or self.list_max_items
+
+        # folder listings carry no version, cached entries expire with the cache
+        # ttl or are invalidated from the Box events stream by an `EventSync`
+        cache = self.tool_caches.get("box_list_folder_content_by_folder_id")
+        if cache is not None:
+            key = cache.group_key(
+                listing_group(folder_id, max_depth),
+                is_recursive,
+                max_depth,
+                max_items,
+                offset,
+            )
+            if (cached := cache.get(key)) is not None:
+                return cached
+
+        # one more item than returned tells whether the listing is complete
+        writer = self._stream_writer()
+        items: List[Union[File, Folder]] = []
+        for item in walk_folder(
+            self.client,
+            folder_id,
+            max_depth=max_depth,
+            max_items=offset + max_items + 1 if max_items else None,
+            page_size=self.list_page_size,
+            max_concurrency=self.list_concurrency,
+            on_page=self._on_folder_page,
+        ):
+            items.append(item)
+            self._stream_folder_item(
+                writer, folder_id, item, len(items) - offset, max_items
+            )
+
+        self._prefetch(items[offset:][:max_items])
+        content = self._format_folder_content(
+            folder_id,
+            items[offset:],
+            offset,
+            max_items,
+            self.output_budgets.get("box_list_folder_content_by_folder_id"),
+        )
+        if cache is not None:
+            cache.set(key, content)
+        return content
+
+    async def abox_list_folder_content_by_folder_id(
+        self,
+        folder_id: str,
+        is_recursive: bool,
+        max_depth: int | None = None,
+        max_items: int | None = None,
+        offset: int = 0,
+    ) -> str:
+        """Async version of `box_list_folder_content_by_folder_id`."""
+        max_depth = max_depth if is_recursive else 1
+        max_items = max_items or self.list_max_items
+
+        cache = self.tool_caches.get("box_list_folder_content_by_folder_id")
+        if cache is not None:
+            key = cache.group_key(
+                listing_group(folder_id, max_depth),
+                is_recursive,
+                max_depth,
+                max_items,
+                offset,
+            )
+            if (cached := cache.get(key)) is not None:
+                return cached
+
+        writer = self._stream_writer()
+        items: List[Union[File, Folder]] = []
+        async for item in awalk_folder(
+            self.async_client,
+            folder_id,
+            max_depth=max_depth,
+            max_items=offset + max_items + 1 if max_items else None,
+            page_size=self.list_page_size,
+            max_concurrency=self.list_concurrency,
+            on_page=self._on_folder_page,
+        ):
+            items.append(item)
+            self._stream_folder_item(
+                writer, folder_id, item, len(items) - offset, max_items
+            )
+
+        self._aprefetch(items[offset:][:max_items])
+        content = self._format_folder_content(
+            folder_id,
+            items[offset:],
+            offset,
+            max_items,
+            self.output_budgets.get("box_list_folder_content_by_folder_id"),
+        )
+        if cache is not None:
+            cache.set(key, content)
+        return content
+
+    def box_semantic_search(
+        self,
+        query: str,
+        folder_id: str | None = None,
+        file_ids: List[str] | None = None,
+        top_k: int = 5,
+    ) -> str:
+        """Finds the passages of Box files most relevant to a query, without reading the whole files.
+
+        Files are indexed on first use and re-indexed when they change.
+
+        Args:
+            query (str): What to look for, in natural language.
+            folder_id (str | None): The ID of a folder whose files, recursively, are searched.
+            file_ids (List[str] | None): The IDs of the files to search. When neither folder_id nor file_ids are given, all the files indexed so far are searched.
+            top_k (int): The maximum number of passages to return.
+
+        Returns:
+            str: The most relevant passages, each with the name and ID of its file.
+        """
+        files = None
+        walked = 0
+        if folder_id is not None or file_ids:
+            files = []
+            if folder_id is not None:
+                files.extend(
+                    walk_folder(
+                        self.client,
+                        folder_id,
+                        max_items=self.list_max_items,
+                        page_size=self.list_page_size,
+                        max_concurrency=self.list_concurrency,
+                        on_page=self._on_folder_page,
+                    )
+                )
+            walked = len(files)
+            for file_id in file_ids or []:
+                files.append(
+                    self.client.files.get_file_by_id(
+                        file_id, fields=["name", "etag", "sha1"]
+                    )
+                )
+            stale = self._stale_files(files)
+            texts = [self._indexed_text(file) for file in stale]
+            self._update_retrieval_index(stale, texts)
+
+        return self._semantic_search(query, files, top_k) + self._walk_note(
+            folder_id, walked
+        )
+
+    async def abox_semantic_search(
+        self,
+        query: str,
+        folder_id: str | None = None,
+        file_ids: List[str] | None = None,
+        top_k: int = 5,
+    ) -> str:
+        """Async version of `box_semantic_search`."""
+        files = None
+        walked = 0
+        if folder_id is not None or file_ids:
+            files = []
+            if folder_id is not None:
+                async for item in awalk_folder(
+                    self.async_client,
+                    folder_id,
+                    max_items=self.list_max_items,
+                    page_size=self.list_page_size,
+                    max_concurrency=self.list_concurrency,
+                    on_page=self._on_folder_page,
+                ):
+                    files.append(item)
+            walked = len(files)
+
+            # files are fetched and extracted extract_concurrency at a time
+            semaphore = asyncio.Semaphore(self.extract_concurrency)
+
+            async def bounded(coroutine: Awaitable) -> Any:
+                async with semaphore:
+                    return await coroutine
+
+            files.extend(
+                await asyncio.gather(
+                    *(
+                        bounded(
+                            self.async_client.get_file(
+                                file_id, fields=["name", "etag", "sha1"]
+                            )
+                        )
+                        for file_id in file_ids or []
+                    )
+                )
+            )
+            stale = self._stale_files(files)
+            texts = await asyncio.gather(
+                *(bounded(self._aindexed_text(file)) for file in stale)
+            )
+            # embedding and searching are CPU bound, keep them off the event loop
+            await asyncio.to_thread(self._update_retrieval_index, stale, texts)
+
+        result = await asyncio.to_thread(self._semantic_search, query, files, top_k)
+        return result + self._walk_note(folder_id, walked)
 
-        response: List[Union[File, Folder]] = box_folder_list_content(
-            self.client, folder_id, is_recursive
+    def _walk_note(self, folder_id: str | None, walked: int) -> str:
+        # the walk of a large folder tree stops after list_max_items items
+        if (
+            folder_id is None
+            or self.list_max_items is None
+            or walked < self.list_max_items
+        ):
+            return ""
+        return (
+            f"\n\n[Only the first {self.list_max_items} items of folder {folder_id} "
+            "were searched. Call box_semantic_search with the file_ids or the "
+            "folder_id of a sub folder to search the others.]"
         )
 
-        response = [
-            {
-                "id": item.id,
-                "name": item.name,
-                "type": item.type,
-                "description": item.description
-                if hasattr(item, "description")
-                else None,
-            }
-            for item in response
+    def _stale_files(self, files: List[Union[File, Folder]]) -> List[File]:
+        # only files whose version changed since they were indexed are re-embedded
+        return [
+            file
+            for file in files
+            if file.type == "file"
+            and self.retrieval_index.indexed_version(file.id)
+            != (file.sha_1 or file.etag)
         ]
-        return json.dumps(response)
+
+    def _indexed_text(self, file: File) -> str:
+        # shares the cached text of box_read_tool, which uses the same keys
+        cache = self.tool_caches.get("box_read_tool")
+        key = ToolCache.key("text", file.id, file.sha_1 or file.etag)
+        if cache is not None and (cached := cache.get(key)) is not None:
+            return cached
+        text = box_file_text_extract(self.client, file.id)
+        if cache is not None:
+            cache.set(key, text)
+        return text
+
+    async def _aindexed_text(self, file: File) -> str:
+        cache = self.tool_caches.get("box_read_tool")
+        key = ToolCache.key("text", file.id, file.sha_1 or file.etag)
+        if cache is not None and (cached := cache.get(key)) is not None:
+            return cached
+        text = await self.async_client.file_text_extract(file.id)
+        if cache is not None:
+            cache.set(key, text)
+        return text
+
+    def _search_fields(self, fields: List[str]) -> List[str]:
+        # files read ahead are cached by version, without asking Box for it again
+        if self.prefetcher is None:
+            return SEARCH_BASE_FIELDS + fields
+        return SEARCH_BASE_FIELDS + fields + ["sha1", "etag"]
+
+    @staticmethod
+    def _file_versions(items: List[Union[File, Folder]]) -> FileVersions:
+        return [
+            (item.id, getattr(item, "sha_1", None) or getattr(item, "etag", None))
+            for item in items
+            if item.type == "file"
+        ]
+
+    def _prefetch(self, items: List[Union[File, Folder]]):
+        # the model reads some of the files it was shown next, start on them now
+        if self.prefetcher is not None:
+            self.prefetcher.prefetch(self._file_versions(items), self._prefetch_text)
+
+    def _aprefetch(self, items: List[Union[File, Folder]]):
+        if self.prefetcher is not None:
+            self.prefetcher.aprefetch(self._file_versions(items), self._aprefetch_text)
+
+    def _prefetch_text(self, file_id: str, version: str | None) -> bool:
+        if version is None:
+            file = self.client.files.get_file_by_id(file_id, fields=["etag", "sha1"])
+            version = file.sha_1 or file.etag
+        cache = self.tool_caches["box_read_tool"]
+        key = ToolCache.key("text", file_id, version)
+        # the backend is asked directly, the hits of the tool are counted alone
+        if cache.backend.get(key) is not None:
+            return False
+        text = read_up_to(
+            iter_file_text(self.client, file_id), self.prefetcher.policy.max_chars
+        )
+        if text is None:
+            return False
+        cache.set(key, text)
+        return True
+
+    async def _aprefetch_text(self, file_id: str, version: str | None) -> bool:
+        if version is None:
+            file = await self.async_client.get_file(file_id, fields=["etag", "sha1"])
+            version = file.sha_1 or file.etag
+        cache = self.tool_caches["box_read_tool"]
+        key = ToolCache.key("text", file_id, version)
+        if cache.backend.get(key) is not None:
+            return False
+        text = await aread_up_to(
+            self.async_client.iter_file_text(file_id),
+            self.prefetcher.policy.max_chars,
+        )
+        if text is None:
+            return False
+        cache.set(key, text)
+        return True
+
+    def _update_retrieval_index(self, files: List[File], texts: List[str]):
+        from .retrieval import IndexedDocument
+
+        self.retrieval_index.update_files(
+            IndexedDocument(file.id, file.sha_1 or file.etag, file.name, text)
+            for file, text in zip(files, texts)
+        )
+
+    def _semantic_search(
+        self, query: str, files: List[Union[File, Folder]] | None, top_k: int
+    ) -> str:
+        file_ids = None
+        if files is not None:
+            file_ids = [file.id for file in files if file.type == "file"]
+        passages = self.retrieval_index.search(query, top_k, file_ids=file_ids)
+        if not passages:
+            return "No matching passages found."
+
+        return "\n\n".join(
+            f"{passage.name} (id:{passage.file_id}) score:{passage.score:.2f}\n"
+            + passage.text
+            for passage in passages
+        )
+
+    @staticmethod
+    def _content_types(
+        where_to_look_for_query: List[str] | None,
+    ) -> List[SearchForContentContentTypes]:
+        content_types: List[SearchForContentContentTypes] = []
+        if where_to_look_for_query:
+            for content_type in where_to_look_for_query:
+                content_types.append(SearchForContentContentTypes[content_type])
+        return content_types
+
+    def _read_window(self, max_chars: int | None) -> int | None:
+        max_chars = max_chars or self.read_max_chars
+        budget = self.output_budgets.get("box_read_tool")
+        if budget is None:
+            return max_chars
+        # the window read is then measured, and shortened to fit the budget
+        return min(max_chars or budget.max_chars(), budget.max_chars())
+
+    def _slice_text(
+        self, file_id: str, text: str, offset: int, max_chars: int | None
+    ) -> str:
+        if max_chars is None:
+            return text[offset:]
+        next_offset = offset + max_chars if len(text) > offset + max_chars else None
+        return self._format_text_window(
+            file_id, text[offset : offset + max_chars], offset, next_offset
+        )
+
+    def _format_text_window(
+        self, file_id: str, text: str, offset: int, next_offset: int | None
+    ) -> str:
+        budget = self.output_budgets.get("box_read_tool")
+        if budget is not None and not budget.fits(
+            text
+            if next_offset is None
+            else text + self._more_text(file_id, next_offset)
+        ):
+            # the note is measured with the largest offset it can have
+            kept = budget.fitting_chars(
+                text, self._more_text(file_id, offset + len(text))
+            )
+            # at least one character, for the next call to move on
+            kept = max(kept, 1)
+            text, next_offset = text[:kept], offset + kept
+        if next_offset is None:
+            return text
+        return text + self._more_text(file_id, next_offset)
+
+    @staticmethod
+    def _more_text(file_id: str, next_offset: int) -> str:
+        return (
+            f"\n\n[More text follows. Call box_read_tool with "
+            f"file_id={file_id} and offset={next_offset} to continue reading.]"
+        )
+
+    @staticmethod
+    def _format_search_results(
+        search_results: List[File],
+        fields: List[str],
+        offset: int,
+        total_count: int,
+        budget: OutputBudget | None = None,
+    ) -> str:
+        # one compact line per file: name, id, then the requested fields
+        lines = []
+        for file in search_results:
+            line = f"{file.name} (id:{file.id})"
+            for field in fields:
+                value = getattr(file, field, None)
+                if value is None or value == "":
+                    continue
+                if hasattr(value, "isoformat"):
+                    value = value.isoformat()
+                line += f" {value}" if field == "description" else f" {field}:{value}"
+            lines.append(line)
+
+        # the results that do not fit the budget are left for the next offset
+        if budget is not None:
+            lines = lines[: budget.count_fitting(lines)]
+            search_results = search_results[: len(lines)]
+        result = "\n".join(lines)
+        next_offset = offset + len(search_results)
+        if search_results and next_offset < total_count:
+            result += (
+                f"\n\n[Showing results {offset + 1} to {next_offset} of about "
+                f"{total_count}. Call box_search_tool with offset={next_offset} to "
+                "see more.]"
+            )
+        return result
+
+    @staticmethod
+    def _format_folder_paths(paths: List[Tuple[str, str]]) -> str:
+        if not paths:
+            return "No folder found at this path."
+        return "\n".join(f"{path} (id:{folder_id})" for path, folder_id in paths)
+
+    @staticmethod
+    def _format_folder_results(search_results: List[Folder]) -> str:
+        search_results = [
+            f"{folder.name} (id:{folder.id})" for folder in search_results
+        ]
+
+        return "\n".join(search_results)
+
+    @staticmethod
+    def _ai_ask_chunks(file_ids: List[str]) -> List[List[str]]:
+        file_ids = list(dict.fromkeys(file_ids))
+        if not file_ids:
+            raise ValueError("file_ids can not be empty")
+        return [
+            file_ids[i : i + AI_ASK_MAX_FILES]
+            for i in range(0, len(file_ids), AI_ASK_MAX_FILES)
+        ]
+
+    @staticmethod
+    def _merge_answers(chunks: List[List[str]], responses: List[Dict]) -> str:
+        if len(responses) == 1:
+            return responses[0].get("answer", "")
+        return "\n\n".join(
+            f"Files {', '.join(chunk)}:\n{response.get('answer', '')}"
+            for chunk, response in zip(chunks, responses)
+        )
+
+    def _format_extractions(
+        self, files: Dict[str, str | None], responses: List[Dict | Exception]
+    ) -> str:
+        # answers that are JSON objects are spread over one column per key
+        rows = []
+        columns: Dict[str, None] = {"file_id": None, "name": None}
+        for file_id, response in zip(files, responses):
+            row = {"file_id": file_id, "name": files[file_id] or ""}
+            if isinstance(response, Exception):
+                row["error"] = str(response).strip().splitlines()[0][:200]
+            else:
+                answer = response.get("answer", "")
+                try:
+                    values = json.loads(answer)
+                except (TypeError, ValueError):
+                    values = None
+                if not isinstance(values, dict):
+                    values = {"answer": answer}
+                for key, value in values.items():
+                    if not isinstance(value, (str, int, float, bool, type(None))):
+                        value = json.dumps(value)
+                    row[key] = value
+            columns.update(dict.fromkeys(key for key in row if key != "error"))
+            rows.append(row)
+        if any("error" in row for row in rows):
+            columns["error"] = None
+
+        output = io.StringIO()
+        writer = csv.DictWriter(output, fieldnames=list(columns), lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(rows)
+        result = output.getvalue()
+        if len(files) > self.extract_max_files:
+            result += (
+                f"\n[Extraction stopped after {self.extract_max_files} files. Call "
+                "box_ai_extract_data_batch with the file_ids of the remaining files "
+                "to extract them too.]"
+            )
+        return result
+
+    @staticmethod
+    def _stream_writer() -> StreamWriter | None:
+        # tools called outside of a graph run have nowhere to stream to
+        try:
+            return get_stream_writer()
+        except RuntimeError:
+            return None
+
+    @staticmethod
+    def _stream_folder_item(
+        writer: StreamWriter | None,
+        folder_id: str,
+        item: Union[File, Folder],
+        count: int,
+        max_items: int | None,
+    ):
+        # with stream_mode="custom", graph runs see the items as they are listed
+        if (
+            writer is not None
+            and 0 < count
+            and (max_items is None or count <= max_items)
+        ):
+            writer({"folder_id": folder_id, "folder_item": folder_item_dict(item)})
+
+    @staticmethod
+    def _format_folder_content(
+        folder_id: str,
+        items: List[Union[File, Folder]],
+        offset: int,
+        max_items: int | None,
+        budget: OutputBudget | None,
+    ) -> str:
+        # one compact JSON object per line, so that items are counted one by one
+        lines = [
+            json.dumps(folder_item_dict(item), separators=(",", ":"))
+            for item in items[:max_items]
+        ]
+        reason = ""
+        if budget is not None:
+            count = budget.count_fitting(lines, ",\n")
+            if count < len(lines):
+                lines = lines[:count]
+                reason = " to fit the output budget"
+        content = "[" + ",\n".join(lines) + "]"
+        if len(lines) == len(items):
+            return content
+        next_offset = offset + len(lines)
+        return (
+            content + f"\n\n[Listing stopped after {next_offset} items{reason}. Call "
+            f"box_list_folder_content_by_folder_id with folder_id={folder_id} and "
+            f"offset={next_offset} to see more.]"
+        )
@@ -0,0 +1,409 @@
+import asyncio
+import codecs
+import contextlib
+import threading
+import weakref
+from enum import Enum
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+import httpx
+from box_ai_agents_toolkit import (
+    BoxClient,
+    File,
+    Folder,
+    SearchForContentContentTypes,
+)
+from box_sdk_gen import (
+    AiAgentAsk,
+    AiAgentExtract,
+    AiResponse,
+    AiResponseFull,
+    FileFull,
+    Items,
+    UserFull,
+)
+from box_sdk_gen.schemas.search_results import SearchResults
+from box_sdk_gen.serialization.json import deserialize, serialize
+
+from .box_text import TEXT_CHUNK_BYTES, extracted_text_url
+from .cancellation import current_control
+from .resilience import HttpPolicy
+from .telemetry import Telemetry, count_in_span, request_route
+
+
+class AsyncBoxClient:
+    """Non-blocking access to the Box endpoints used by the agent tools.
+
+    Mirrors the `box_ai_agents_toolkit` helpers the agent relies on, but issues
+    the HTTP requests with `httpx.AsyncClient` so that many conversations can
+    share one event loop. Authentication, base URLs and custom headers are taken
+    from the wrapped `BoxClient`, and the number of requests in flight is capped
+    by `max_connections`. With an `http_policy`, requests are rate limited and
+    retried like the ones of the wrapped client, and with a `telemetry` they are
+    traced.
+    """
+
+    def __init__(
+        self,
+        client: BoxClient,
+        max_connections: int = 100,
+        timeout: float = 60.0,
+        http_policy: HttpPolicy | None = None,
+        telemetry: Telemetry | None = None,
+    ):
+        self.client = client
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.http_policy = http_policy
+        self.telemetry = telemetry
+        # connection pools and semaphores are bound to the loop that created them
+        self._sessions: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, Tuple[httpx.AsyncClient, asyncio.Semaphore]
+        ] = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return self.client.network_session.base_urls.base_url
+
+    def _session(self) -> Tuple[httpx.AsyncClient, asyncio.Semaphore]:
+        # one session per loop, loops running in other threads keep theirs
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            session = self._sessions.get(loop)
+            if session is None:
+                # the pools of closed loops can not be closed anymore, their
+                # connections were closed with the loop
+                for closed in [other for other in self._sessions if other.is_closed()]:
+                    del self._sessions[closed]
+                limits = httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                )
+                session = (
+                    httpx.AsyncClient(limits=limits, timeout=self.timeout),
+                    asyncio.Semaphore(self.max_connections),
+                )
+                self._sessions[loop] = session
+        return session
+
+    async def aclose(self):
+        """Closes the connection pool of the running loop."""
+        with self._lock:
+            session = self._sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None:
+            await session[0].aclose()
+
+    async def _headers(
+        self, headers: Optional[Dict[str, str]] = None
+    ) -> Dict[str, str]:
+        network_session = self.client.network_session
+        auth = self.client.auth
+
+        # fetching the first token is a blocking round trip, keep it off the loop
+        token_storage = getattr(auth, "token_storage", None)
+        if token_storage is not None and token_storage.get() is None:
+            await asyncio.to_thread(
+                auth.retrieve_token, network_session=network_session
+            )
+
+        authorization = auth.retrieve_authorization_header(
+            network_session=network_session
+        )
+        return {
+            **network_session.additional_headers,
+            **(headers or {}),
+            "Authorization": authorization,
+        }
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        params: Optional[Dict[str, Any]] = None,
+        json_body: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> httpx.Response:
+        """Sends an authenticated request, refreshing the token once on a 401."""
+        return await self._request(
+            method, url, params=params, json_body=json_body, headers=headers
+        )
+
+    @contextlib.asynccontextmanager
+    async def stream(
+        self, method: str, url: str, headers: Optional[Dict[str, str]] = None
+    ) -> AsyncIterator[httpx.Response]:
+        """Sends a request like `request`, whose body is read as it is iterated."""
+        response = await self._request(method, url, headers=headers, stream=True)
+        try:
+            yield response
+        finally:
+            await response.aclose()
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        *,
+        params: Optional[Dict[str, Any]] = None,
+        json_body: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        stream: bool = False,
+    ) -> httpx.Response:
+        http, semaphore = self._session()
+        params = _query_params(params or {})
+
+        attempts = 0
+        control = current_control()
+
+        async def send() -> httpx.Response:
+            nonlocal attempts
+            attempts += 1
+            # no request is sent for a stopped run, none outlives its deadline
+            timeout = self.timeout
+            if control is not None:
+                control.check()
+                timeout = control.timeout(timeout)
+            if attempts > 1:
+                count_in_span("retries")
+
+            async def send_once() -> httpx.Response:
+                request = http.build_request(
+                    method,
+                    url,
+                    params=params,
+                    json=json_body,
+                    headers=await self._headers(headers),
+                    timeout=timeout,
+                )
+                # the slot is released before a streamed body is read
+                return await http.send(request, stream=stream)
+
+            async with semaphore:
+                response = await send_once()
+                if response.status_code == 401:
+                    await response.aclose()
+                    await asyncio.to_thread(
+                        self.client.auth.refresh_token,
+                        network_session=self.client.network_session,
+                    )
+                    response = await send_once()
+                return response
+
+        if self.telemetry is None:
+            response = await self._send(url, send)
+        else:
+            route = request_route(url)
+            with self.telemetry.span(
+                f"{method} {route}",
+                metric="box_agent_box_request_seconds",
+                labels={"method": method, "route": route},
+                kind="client",
+            ) as span:
+                response = await self._send(url, send)
+                span.attributes["http.status_code"] = response.status_code
+        if response.is_error:
+            await response.aclose()
+        response.raise_for_status()
+        return response
+
+    async def _send(
+        self, url: str, send: Callable[[], Awaitable[httpx.Response]]
+    ) -> httpx.Response:
+        # retries wait outside of the semaphore, leaving the connection to others
+        if self.http_policy is None:
+            return await send()
+        return await self.http_policy.asend(url, send)
+
+    async def get_user_me(self) -> UserFull:
+        response = await self.request("GET", f"{self.base_url}/2.0/users/me")
+        return deserialize(response.json(), UserFull)
+
+    async def search(
+        self,
+        query: str,
+        file_extensions: List[str] | None = None,
+        content_types: List[SearchForContentContentTypes] | None = None,
+        ancestor_folder_ids: List[str] | None = None,
+        type: str = "file",
+        fields: List[str] | None = None,
+    ) -> List[Union[File, Folder]]:
+        if fields is None:
+            fields = ["id", "name", "type", "size", "description"]
+        page = await self.search_page(
+            query, file_extensions, content_types, ancestor_folder_ids, type, fields
+        )
+        return page.entries
+
+    async def search_page(
+        self,
+        query: str,
+        file_extensions: List[str] | None = None,
+        content_types: List[SearchForContentContentTypes] | None = None,
+        ancestor_folder_ids: List[str] | None = None,
+        type: str = "file",
+        fields: List[str] | None = None,
+        limit: int | None = None,
+        offset: int | None = None,
+    ) -> SearchResults:
+        response = await self.request(
+            "GET",
+            f"{self.base_url}/2.0/search",
+            params={
+                "query": query,
+                "file_extensions": file_extensions,
+                "content_types": content_types,
+                "ancestor_folder_ids": ancestor_folder_ids,
+                "type": type,
+                "fields": fields,
+                "limit": limit,
+                "offset": offset,
+            },
+        )
+        return deserialize(response.json(), SearchResults)
+
+    async def locate_folder_by_name(
+        self, folder_name: str, parent_folder_id: str = "0"
+    ) -> List[Folder]:
+        return await self.search(
+            folder_name,
+            content_types=[SearchForContentContentTypes.NAME],
+            ancestor_folder_ids=[parent_folder_id],
+            type="folder",
+            fields=["id", "name", "type"],
+        )
+
+    async def get_file(self, file_id: str, fields: List[str] | None = None) -> FileFull:
+        response = await self.request(
+            "GET", f"{self.base_url}/2.0/files/{file_id}", params={"fields": fields}
+        )
+        return deserialize(response.json(), FileFull)
+
+    async def _text_representation(
+        self, file_id: str
+    ) -> Tuple[Optional[str], Optional[str]]:
+        response = await self.request(
+            "GET",
+            f"{self.base_url}/2.0/files/{file_id}",
+            params={"fields": ["name", "representations"]},
+            headers={"x-rep-hints": "[extracted_text]"},
+        )
+        return extracted_text_url(deserialize(response.json(), FileFull))
+
+    async def file_text_extract(self, file_id: str) -> str:
+        url, generate_url = await self._text_representation(file_id)
+        if url is None:
+            return ""
+
+        # Handle cases where the extracted text needs generation
+        if generate_url:
+            await self.request("GET", generate_url)
+
+        response = await self.request("GET", url)
+        return response.content.decode("utf-8")
+
+    async def iter_file_text(
+        self, file_id: str, chunk_bytes: int = TEXT_CHUNK_BYTES
+    ) -> AsyncIterator[str]:
+        """Streams the extracted text of a file, see `box_text.iter_file_text`."""
+        url, generate_url = await self._text_representation(file_id)
+        if url is None:
+            return
+
+        if generate_url:
+            await self.request("GET", generate_url)
+
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        async with self.stream("GET", url) as response:
+            async for chunk in response.aiter_bytes(chunk_bytes):
+                text = decoder.decode(chunk)
+                if text:
+                    yield text
+        text = decoder.decode(b"", final=True)
+        if text:
+            yield text
+
+    async def file_ai_ask(
+        self, file_id: str, prompt: str, ai_agent: AiAgentAsk | None = None
+    ) -> Dict:
+        response = await self.request(
+            "POST",
+            f"{self.base_url}/2.0/ai/ask",
+            json_body={
+                "mode": "single_item_qa",
+                "prompt": prompt,
+                "items": [{"id": file_id, "type": "file"}],
+                "ai_agent": serialize(ai_agent) if ai_agent else None,
+            },
+        )
+        return deserialize(response.json(), AiResponseFull).to_dict()
+
+    async def multi_file_ai_ask(
+        self, file_ids: List[str], prompt: str, ai_agent: AiAgentAsk | None = None
+    ) -> Dict:
+        response = await self.request(
+            "POST",
+            f"{self.base_url}/2.0/ai/ask",
+            json_body={
+                "mode": "multiple_item_qa",
+                "prompt": prompt,
+                "items": [{"id": file_id, "type": "file"} for file_id in file_ids],
+                "ai_agent": serialize(ai_agent) if ai_agent else None,
+            },
+        )
+        return deserialize(response.json(), AiResponseFull).to_dict()
+
+    async def file_ai_extract(
+        self, file_id: str, prompt: str, ai_agent: AiAgentExtract | None = None
+    ) -> Dict:
+        response = await self.request(
+            "POST",
+            f"{self.base_url}/2.0/ai/extract",
+            json_body={
+                "prompt": prompt,
+                "items": [{"id": file_id, "type": "file"}],
+                "ai_agent": serialize(ai_agent) if ai_agent else None,
+            },
+        )
+        return deserialize(response.json(), AiResponse).to_dict()
+
+    async def get_folder_items(
+        self,
+        folder_id: str,
+        offset: int | None = None,
+        limit: int | None = None,
+        fields: List[str] | None = None,
+    ) -> Items:
+        response = await self.request(
+            "GET",
+            f"{self.base_url}/2.0/folders/{folder_id}/items",
+            params={"offset": offset, "limit": limit, "fields": fields},
+        )
+        return deserialize(response.json(), Items)
+
+
+def _query_params(params: Dict[str, Any]) -> Dict[str, str]:
+    """Formats query parameters the way the Box SDK does, dropping empty values."""
+    result = {}
+    for key, value in params.items():
+        if value is None:
+            continue
+        if isinstance(value, list):
+            value = ",".join(
+                item.value if isinstance(item, Enum) else str(item) for item in value
+            )
+        elif isinstance(value, Enum):
+            value = value.value
+        result[key] = str(value)
+    return result
@@ -0,0 +1,331 @@
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Set
+
+from box_ai_agents_toolkit import BoxClient
+from box_sdk_gen import GetEventsStreamType
+
+from .cache import ToolCache
+
+if TYPE_CHECKING:
+    from .box_agent import LangChainBoxAgent
+    from .folder_index import FolderIndex
+    from .retrieval import RetrievalIndex
+
+# events after which an item is new, changed, or somewhere else; user events
+# first, then their enterprise (admin logs) names
+UPDATE_EVENTS = {
+    "ITEM_CREATE",
+    "ITEM_UPLOAD",
+    "ITEM_MODIFY",
+    "ITEM_COPY",
+    "ITEM_MOVE",
+    "ITEM_RENAME",
+    "ITEM_MAKE_CURRENT_VERSION",
+    "ITEM_UNDELETE_VIA_TRASH",
+    "UPLOAD",
+    "EDIT",
+    "COPY",
+    "MOVE",
+    "RENAME",
+    "UNDELETE",
+}
+# events after which an item is gone
+REMOVE_EVENTS = {"ITEM_TRASH", "DELETE"}
+# events after which an item left a folder the event does not tell
+MOVE_EVENTS = {"ITEM_MOVE", "MOVE"}
+
+# cache group of the recursive folder listings, which hold the items of every
+# sub folder
+RECURSIVE_LISTINGS = "folders/recursive"
+
+# Box returns at most 500 events per page
+EVENTS_PAGE_SIZE = 500
+
+
+@dataclass
+class ItemChange:
+    """A change of a file or folder, read from a Box event."""
+
+    event_type: str
+    item_type: str
+    item_id: str
+    name: str | None = None
+    parent_id: str | None = None
+
+    @property
+    def removed(self) -> bool:
+        return self.event_type in REMOVE_EVENTS
+
+
+def listing_group(folder_id: str, max_depth: int | None) -> str:
+    """The `ToolCache` group of a cached listing of `folder_id`.
+
+    Listings of the direct children of a folder are grouped per folder, so a
+    change only invalidates the listings of its parents; recursive listings
+    share one group, invalidated by any change.
+    """
+    return f"folder/{folder_id}" if max_depth == 1 else RECURSIVE_LISTINGS
+
+
+def _field(value: Any, name: str) -> Any:
+    # event sources are SDK objects or plain dicts, depending on the caller
+    if isinstance(value, dict):
+        return value.get(name)
+    return getattr(value, name, None)
+
+
+def item_change(event: Any) -> ItemChange | None:
+    """Reads the file or folder change of an event, None for other events.
+
+    Both user events, whose source is the file or folder, and enterprise
+    events, whose source has `item_type` and `item_id`, are understood.
+    """
+    event_type = _field(event, "event_type")
+    event_type = getattr(event_type, "value", event_type)
+    if event_type not in UPDATE_EVENTS and event_type not in REMOVE_EVENTS:
+        return None
+    source = _field(event, "source")
+    if source is None:
+        return None
+    item_type = _field(source, "item_type") or _field(source, "type")
+    item_type = getattr(item_type, "value", item_type)
+    if item_type not in ("file", "folder"):
+        return None
+    parent = _field(source, "parent")
+    return ItemChange(
+        event_type=event_type,
+        item_type=item_type,
+        item_id=_field(source, "item_id") or _field(source, "id"),
+        name=_field(source, "item_name") or _field(source, "name"),
+        parent_id=None if parent is None else _field(parent, "id"),
+    )
+
+
+@dataclass
+class SyncStats:
+    polls: int = 0
+    events: int = 0
+    duplicates: int = 0
+    changes: int = 0
+    errors: int = 0
+
+
+class EventSync:
+    """Keeps local caches and indexes fresh from the Box events stream.
+
+    Every page of events is applied as one batch: folder changes go to the
+    folder index, trashed files are dropped from the retrieval index, and the
+    cached listings of the folders holding the changed items are invalidated.
+    Extracted text needs no invalidation, as it is cached per file version.
+    The stream position is saved after every page to `cursor_path`, so a
+    restart resumes where the previous run stopped instead of re-listing.
+
+    Args:
+        client (BoxClient): The Box client reading the events.
+        tool_caches (Dict[str, ToolCache] | None): Tool caches of the agent.
+        folder_index (FolderIndex | None): Folder index to keep up to date.
+        retrieval_index (RetrievalIndex | None): Retrieval index to keep up to
+            date.
+        cursor_path (str | None): File holding the stream position, None to
+            start from the current position on every run.
+        stream_type (str): The events stream, "changes" for the events of
+            the user, "admin_logs_streaming" for the enterprise.
+        page_size (int): Number of events requested per page.
+        interval (float): Seconds between two polls of the background thread.
+    """
+
+    def __init__(
+        self,
+        client: BoxClient,
+        tool_caches: Dict[str, ToolCache] | None = None,
+        folder_index: "FolderIndex | None" = None,
+        retrieval_index: "RetrievalIndex | None" = None,
+        cursor_path: str | None = None,
+        stream_type: str = "changes",
+        page_size: int = EVENTS_PAGE_SIZE,
+        interval: float = 10.0,
+    ):
+        self.client = client
+        self.tool_caches = tool_caches or {}
+        self.folder_index = folder_index
+        self.retrieval_index = retrieval_index
+        self.cursor_path = cursor_path
+        self.stream_type = GetEventsStreamType(stream_type)
+        self.page_size = page_size
+        self.interval = interval
+        self.stats = SyncStats()
+        self.last_error: Exception | None = None
+        self.cursor: str | None = self._load_cursor()
+        # Box may deliver an event more than once
+        self._seen: OrderedDict[str, None] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @classmethod
+    def from_agent(cls, box_agent: "LangChainBoxAgent", **kwargs) -> "EventSync":
+        """Builds a sync of the caches and indexes of `box_agent`."""
+        return cls(
+            box_agent.client,
+            tool_caches=box_agent.tool_caches,
+            folder_index=box_agent.folder_index,
+            retrieval_index=box_agent.retrieval_index,
+            **kwargs,
+        )
+
+    def _load_cursor(self) -> str | None:
+        if self.cursor_path is None:
+            return None
+        try:
+            with open(self.cursor_path, encoding="utf-8") as file:
+                return file.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _save_cursor(self, position: str | float):
+        # positions can come back as JSON numbers
+        if isinstance(position, float) and position.is_integer():
+            position = int(position)
+        self.cursor = str(position)
+        if self.cursor_path is None:
+            return
+        # write to a temporary file first so a crash never leaves half a cursor
+        directory = os.path.dirname(os.path.abspath(self.cursor_path))
+        fd, temp_path = tempfile.mkstemp(dir=directory)
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            file.write(self.cursor)
+        os.replace(temp_path, self.cursor_path)
+
+    def poll(self) -> int:
+        """Reads the events since the cursor, page by page, and applies them.
+
+        Without a cursor, only the current stream position is read, as there
+        is nothing cached from before it.
+
+        Returns:
+            int: The number of file and folder changes applied.
+        """
+        with self._lock:
+            self.stats.polls += 1
+            if self.cursor is None:
+                page = self.client.events.get_events(
+                    stream_type=self.stream_type, stream_position="now"
+                )
+                self._save_cursor(page.next_stream_position)
+                return 0
+
+            changes = 0
+            while True:
+                page = self.client.events.get_events(
+                    stream_type=self.stream_type,
+                    stream_position=self.cursor,
+                    limit=self.page_size,
+                )
+                changes += self.apply(page.entries or [])
+                if page.next_stream_position is not None:
+                    self._save_cursor(page.next_stream_position)
+                # the stream is read until a page comes back empty
+                if not page.entries:
+                    return changes
+
+    def apply(self, events: Iterable[Any]) -> int:
+        """Applies a batch of events, SDK `Event` objects or dicts.
+
+        Returns:
+            int: The number of file and folder changes applied.
+        """
+        fresh: List[Any] = []
+        changes: List[ItemChange] = []
+        for event in events:
+            self.stats.events += 1
+            event_id = _field(event, "event_id")
+            if event_id is not None:
+                if event_id in self._seen:
+                    self.stats.duplicates += 1
+                    continue
+                self._seen[event_id] = None
+                if len(self._seen) > 10 * self.page_size:
+                    self._seen.popitem(last=False)
+            change = item_change(event)
+            if change is not None:
+                fresh.append(event)
+                changes.append(change)
+        if not changes:
+            return 0
+
+        listings = self.tool_caches.get("box_list_folder_content_by_folder_id")
+        if listings is not None:
+            # read before the folder index forgets where moved folders were
+            self._invalidate_listings(listings, changes)
+        if self.folder_index is not None:
+            self.folder_index.apply_events(fresh)
+        if self.retrieval_index is not None:
+            removed = [
+                change.item_id
+                for change in changes
+                if change.removed and change.item_type == "file"
+            ]
+            if removed:
+                self.retrieval_index.remove_files(removed)
+
+        self.stats.changes += len(changes)
+        return len(changes)
+
+    def _invalidate_listings(self, listings: ToolCache, changes: List[ItemChange]):
+        folders: Set[str] = set()
+        for change in changes:
+            if change.item_type == "folder":
+                folders.add(change.item_id)
+            if change.parent_id is None:
+                # the folder holding the item is unknown
+                listings.clear()
+                return
+            folders.add(change.parent_id)
+            if change.event_type in MOVE_EVENTS:
+                old_parent_id = None
+                if self.folder_index is not None and change.item_type == "folder":
+                    old_parent_id = self.folder_index.parent_id(change.item_id)
+                if old_parent_id is None:
+                    # the folder the item left is unknown, e.g. for files
+                    listings.clear()
+                    return
+                folders.add(old_parent_id)
+        for folder_id in folders:
+            listings.invalidate(listing_group(folder_id, 1))
+        listings.invalidate(RECURSIVE_LISTINGS)
+
+    def start(self) -> "EventSync":
+        """Polls every `interval` seconds in a background thread."""
+        if self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="box-event-sync", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.poll()
+            except Exception as error:
+                # the caches expire with their ttl meanwhile, try again later
+                self.stats.errors += 1
+                self.last_error = error
+            self._stopped.wait(self.interval)
+
+    def __enter__(self) -> "EventSync":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,72 @@
+from typing import TYPE_CHECKING, AsyncIterator, Iterator, List
+
+from box_ai_agents_toolkit import BoxClient, SearchForContentContentTypes
+from box_sdk_gen import SearchForContentType, SearchResults
+
+if TYPE_CHECKING:
+    from .box_async import AsyncBoxClient
+
+# Box returns at most 200 results per page of a search
+SEARCH_PAGE_SIZE = 200
+
+# fields every search result is requested with, on top of the displayed ones
+SEARCH_BASE_FIELDS = ["id", "name", "type"]
+
+
+def iter_search_pages(
+    client: BoxClient,
+    query: str,
+    file_extensions: List[str] | None = None,
+    content_types: List[SearchForContentContentTypes] | None = None,
+    ancestor_folder_ids: List[str] | None = None,
+    fields: List[str] | None = None,
+    offset: int = 0,
+    page_size: int = SEARCH_PAGE_SIZE,
+) -> Iterator[SearchResults]:
+    """Searches for files, one page of results at a time.
+
+    A page is only requested when the previous one has been consumed, so
+    stopping the iteration early saves the requests for the remaining pages.
+    """
+    while True:
+        page = client.search.search_for_content(
+            query=query,
+            file_extensions=file_extensions,
+            content_types=content_types,
+            ancestor_folder_ids=ancestor_folder_ids,
+            type=SearchForContentType.FILE,
+            fields=fields,
+            limit=page_size,
+            offset=offset,
+        )
+        yield page
+        offset += len(page.entries or [])
+        if not page.entries or offset >= (page.total_count or 0):
+            return
+
+
+async def aiter_search_pages(
+    async_client: "AsyncBoxClient",
+    query: str,
+    file_extensions: List[str] | None = None,
+    content_types: List[SearchForContentContentTypes] | None = None,
+    ancestor_folder_ids: List[str] | None = None,
+    fields: List[str] | None = None,
+    offset: int = 0,
+    page_size: int = SEARCH_PAGE_SIZE,
+) -> AsyncIterator[SearchResults]:
+    """Async version of `iter_search_pages`."""
+    while True:
+        page = await async_client.search_page(
+            query,
+            file_extensions=file_extensions,
+            content_types=content_types,
+            ancestor_folder_ids=ancestor_folder_ids,
+            fields=fields,
+            limit=page_size,
+            offset=offset,
+        )
+        yield page
+        offset += len(page.entries or [])
+        if not page.entries or offset >= (page.total_count or 0):
+            return
@@ -0,0 +1,185 @@
+import codecs
+from contextlib import aclosing
+from typing import AsyncIterator, Iterator, Optional, Tuple
+
+import requests
+from box_ai_agents_toolkit import BoxClient
+from box_sdk_gen import FileFull
+
+from .cancellation import check_cancelled, current_control
+from .telemetry import request_route
+
+TEXT_CHUNK_BYTES = 64 * 1024
+
+
+def extracted_text_url(file: FileFull) -> Tuple[Optional[str], Optional[str]]:
+    """Finds the download URL of a file's "extracted_text" representation.
+
+    Returns:
+        Tuple[Optional[str], Optional[str]]: The content URL, or None when the file
+            has no text representation, and the URL that triggers the text
+            generation when it has not been generated yet.
+    """
+    if not file.representations or not file.representations.entries:
+        return None, None
+
+    extracted_text_entry = next(
+        (
+            entry
+            for entry in file.representations.entries
+            if entry.representation == "extracted_text"
+        ),
+        None,
+    )
+    if not extracted_text_entry:
+        return None, None
+
+    generate_url = None
+    if extracted_text_entry.status.state == "none":
+        generate_url = extracted_text_entry.info.url
+
+    url = extracted_text_entry.content.url_template.replace("{+asset_path}", "")
+    return url, generate_url
+
+
+def _get(client: BoxClient, url: str, **kwargs) -> requests.Response:
+    # downloads share the connection pool and the policy of the client, if any
+    control = current_control()
+    if control is not None:
+        # none starts for a stopped run, nor waits past its deadline
+        control.check()
+        kwargs["timeout"] = control.timeout(kwargs.get("timeout"))
+    network_client = client.network_session.network_client
+    session = getattr(network_client, "requests_session", None) or requests
+    http_policy = getattr(network_client, "http_policy", None)
+    telemetry = getattr(network_client, "telemetry", None)
+    if telemetry is None:
+        return _send(session, http_policy, url, **kwargs)
+    route = request_route(url)
+    with telemetry.span(
+        f"GET {route}",
+        metric="box_agent_box_request_seconds",
+        labels={"method": "GET", "route": route},
+        kind="client",
+    ) as span:
+        response = _send(session, http_policy, url, **kwargs)
+        span.attributes["http.status_code"] = response.status_code
+        return response
+
+
+def _send(session, http_policy, url: str, **kwargs) -> requests.Response:
+    if http_policy is None:
+        return session.get(url, **kwargs)
+    return http_policy.send(url, lambda: session.get(url, **kwargs))
+
+
+def iter_file_text(
+    client: BoxClient, file_id: str, chunk_bytes: int = TEXT_CHUNK_BYTES
+) -> Iterator[str]:
+    """Streams the extracted text of a file, one decoded chunk at a time.
+
+    Unlike `box_file_text_extract`, the text is downloaded lazily: closing the
+    generator early stops the download.
+    """
+    file = client.files.get_file_by_id(
+        file_id,
+        x_rep_hints="[extracted_text]",
+        fields=["name", "representations"],
+    )
+    url, generate_url = extracted_text_url(file)
+    if url is None:
+        return
+
+    headers = {
+        "Authorization": client.auth.retrieve_authorization_header(
+            network_session=client.network_session
+        )
+    }
+    if generate_url:
+        _get(client, generate_url, headers=headers).raise_for_status()
+
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    with _get(client, url, headers=headers, stream=True) as response:
+        response.raise_for_status()
+        for chunk in response.iter_content(chunk_size=chunk_bytes):
+            check_cancelled()
+            text = decoder.decode(chunk)
+            if text:
+                yield text
+    text = decoder.decode(b"", final=True)
+    if text:
+        yield text
+
+
+class TextWindow:
+    """Keeps the `max_chars` characters starting at `offset` from a text stream.
+
+    Chunks are fed in order until `feed` reports the window is complete, so only
+    the requested window is held in memory and the stream is consumed just far
+    enough to know whether more text follows.
+    """
+
+    def __init__(self, offset: int, max_chars: int):
+        self.offset = offset
+        self.max_chars = max_chars
+        self.next_offset: Optional[int] = None
+        self._parts = []
+        self._chars = 0
+        self._position = 0
+
+    @property
+    def text(self) -> str:
+        return "".join(self._parts)
+
+    def feed(self, chunk: str) -> bool:
+        chunk_start = self._position
+        self._position += len(chunk)
+        if self._position <= self.offset:
+            return False
+
+        if self._chars >= self.max_chars:
+            # the window is full and more text follows it
+            self.next_offset = self.offset + self.max_chars
+            return True
+
+        part = chunk[max(0, self.offset - chunk_start) :]
+        part = part[: self.max_chars - self._chars]
+        self._parts.append(part)
+        self._chars += len(part)
+        if self._position > self.offset + self.max_chars:
+            self.next_offset = self.offset + self.max_chars
+            return True
+        return False
+
+
+def read_text_window(
+    chunks: Iterator[str], offset: int, max_chars: int
+) -> Tuple[str, Optional[int]]:
+    """Reads a window of text from a stream of chunks.
+
+    Returns:
+        Tuple[str, Optional[int]]: The window, and the offset to continue reading
+            from, or None when the end of the text was reached.
+    """
+    window = TextWindow(offset, max_chars)
+    try:
+        for chunk in chunks:
+            if window.feed(chunk):
+                break
+    finally:
+        # closing a streaming generator stops the rest of the download
+        if hasattr(chunks, "close"):
+            chunks.close()
+    return window.text, window.next_offset
+
+
+async def aread_text_window(
+    chunks: AsyncIterator[str], offset: int, max_chars: int
+) -> Tuple[str, Optional[int]]:
+    """Async version of `read_text_window`."""
+    window = TextWindow(offset, max_chars)
+    async with aclosing(chunks):
+        async for chunk in chunks:
+            if window.feed(chunk):
+                break
+    return window.text, window.next_offset
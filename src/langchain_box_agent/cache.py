@@ -0,0 +1,199 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Protocol, Tuple
+
+from .telemetry import count_in_span
+
+
+class CacheBackend(Protocol):
+    """Storage used by `ToolCache`. Keys and values are strings."""
+
+    def get(self, key: str) -> Optional[str]: ...
+
+    def set(self, key: str, value: str): ...
+
+    def delete(self, key: str): ...
+
+    def clear(self): ...
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class LRUCache:
+    """In-process cache bounded by the total size of its values and their age.
+
+    Args:
+        max_bytes (int): Maximum total size of the cached values, UTF-8 encoded.
+            The least recently used entries are evicted first.
+        ttl (float | None): Seconds an entry stays valid, None to keep entries
+            until they are evicted.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, ttl: float | None = 3600):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size_bytes = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, Tuple[str, int, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, _, expires_at = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str):
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        expires_at = (
+            time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+        )
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, expires_at)
+            self.size_bytes += size
+            while self.size_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self.size_bytes -= size
+
+
+class DiskCache:
+    """Cache persisted as one file per entry, so it survives restarts.
+
+    Args:
+        directory (str): Directory holding the cache files, created if missing.
+        ttl (float | None): Seconds an entry stays valid, None to keep entries
+            until they are deleted.
+    """
+
+    def __init__(self, directory: str, ttl: float | None = None):
+        self.directory = directory
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest)
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            if self.ttl is not None and os.path.getmtime(path) + self.ttl < time.time():
+                os.remove(path)
+                return None
+            with open(path, encoding="utf-8") as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+    def set(self, key: str, value: str):
+        # write to a temporary file first so readers never see a partial entry
+        fd, temp_path = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            file.write(value)
+        os.replace(temp_path, self._path(key))
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, name))
+
+
+class ToolCache:
+    """Caches tool results in a pluggable backend and counts hits and misses.
+
+    Entries can belong to a group, e.g. the listings of a folder, dropped at
+    once with `invalidate`: the keys of a group carry its generation, kept in
+    the backend, so a new generation leaves the old entries unreachable until
+    they are evicted or expire.
+    """
+
+    def __init__(self, backend: CacheBackend | None = None):
+        self.backend = backend if backend is not None else LRUCache()
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(*parts: object) -> str:
+        """Builds a cache key, e.g. `ToolCache.key("text", file_id, sha1)`."""
+        return "/".join(str(part) for part in parts)
+
+    def group_key(self, group: str, *parts: object) -> str:
+        """Builds the key of an entry of `group`, e.g. `("folder/10", 1, 0)`."""
+        generation_key = self.key("generation", group)
+        generation = self.backend.get(generation_key)
+        if generation is None:
+            # an evicted or expired generation is replaced, never reused
+            generation = uuid.uuid4().hex
+            self.backend.set(generation_key, generation)
+        return self.key(group, generation, *parts)
+
+    def invalidate(self, group: str):
+        """Drops the entries of `group`."""
+        self.backend.delete(self.key("generation", group))
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.backend.get(key)
+        with self._lock:
+            if value is None:
+                self.stats.misses += 1
+            else:
+                self.stats.hits += 1
+        count_in_span("cache_misses" if value is None else "cache_hits")
+        return value
+
+    def set(self, key: str, value: str):
+        self.backend.set(key, value)
+
+    def delete(self, key: str):
+        self.backend.delete(key)
+
+    def clear(self):
+        self.backend.clear()
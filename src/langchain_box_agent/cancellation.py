@@ -0,0 +1,356 @@
+import asyncio
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Awaitable, Dict, Iterator, List, Tuple, TypeVar
+from uuid import UUID
+
+from box_ai_agents_toolkit import BoxClient
+from box_sdk_gen import NetworkSession
+from box_sdk_gen.networking.fetch_options import FetchOptions
+from box_sdk_gen.networking.fetch_response import FetchResponse
+from box_sdk_gen.networking.network_client import NetworkClient
+from box_sdk_gen.networking.retries import RetryStrategy
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import BaseMessage, get_buffer_string
+from langchain_core.outputs import LLMResult
+from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables.config import merge_configs
+
+from .output_budget import approximate_tokens
+
+# control of the run the code of the current context belongs to, if any
+_current_control: contextvars.ContextVar["RunControl | None"] = contextvars.ContextVar(
+    "current_control", default=None
+)
+
+T = TypeVar("T")
+
+
+class RunCancelled(Exception):
+    """Raised in a run stopped by its caller, or by its turn budget."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+@dataclass(frozen=True)
+class TurnBudget:
+    """Limits of one turn of the agent, None for no limit.
+
+    Args:
+        seconds (float | None): Wall time of the turn.
+        tool_calls (int | None): Tool calls made in the turn.
+        tokens (int | None): Tokens of the model calls of the turn, input and
+            output, as reported by the model or estimated from the text.
+    """
+
+    seconds: float | None = None
+    tool_calls: int | None = None
+    tokens: int | None = None
+
+
+class RunControl:
+    """Cancels one run of the agent, and ends it when its turn budget is used up.
+
+    The caller keeps the control of a run to `cancel` it, e.g. from a Stop
+    button or when the client of a server disconnects, and runs the graph with
+    `stream_events(..., control=...)`, or in `active()` with the `config()` of
+    the control. Once stopped, no tool call starts, no Box request is sent and
+    no model call starts: async tool calls in flight are cancelled with their
+    requests, sync ones stop at their next Box request or downloaded chunk. The
+    graph raises `RunCancelled` before the next model call, after the tool
+    calls of the last step got their answers, so the conversation can go on.
+    """
+
+    def __init__(self, budget: TurnBudget | None = None):
+        self.budget = budget or TurnBudget()
+        self.deadline = (
+            time.monotonic() + self.budget.seconds
+            if self.budget.seconds is not None
+            else None
+        )
+        self.tool_calls = 0
+        self.tokens = 0
+        self._reason: str | None = None
+        self._stopped = threading.Event()
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self._children: List["RunControl"] = []
+        self._lock = threading.Lock()
+
+    @property
+    def reason(self) -> str | None:
+        """Why the run was stopped, None while it may go on."""
+        if (
+            self._reason is None
+            and self.deadline is not None
+            and time.monotonic() >= self.deadline
+        ):
+            self.cancel(f"the turn ran out of its {self.budget.seconds:g} seconds")
+        return self._reason
+
+    @property
+    def stopped(self) -> bool:
+        return self.reason is not None
+
+    def cancel(self, reason: str = "the run was cancelled"):
+        """Stops the run, from any thread. Only the first reason is kept."""
+        with self._lock:
+            if self._reason is not None:
+                return
+            self._reason = reason
+            waiters, self._waiters = self._waiters, []
+            children, self._children = self._children, []
+        self._stopped.set()
+        for loop, waiter in waiters:
+            loop.call_soon_threadsafe(_resolve, waiter)
+        for child in children:
+            child.cancel(reason)
+
+    def child(self, budget: TurnBudget | None = None) -> "RunControl":
+        """A control with its own budget, cancelled with this one.
+
+        E.g. for work started on behalf of the run that may outlive it.
+        """
+        child = RunControl(budget)
+        with self._lock:
+            if self._reason is None:
+                self._children.append(child)
+                return child
+        child.cancel(self._reason)
+        return child
+
+    def check(self):
+        """Raises RunCancelled when the run is stopped."""
+        reason = self.reason
+        if reason is not None:
+            raise RunCancelled(reason)
+
+    def remaining(self) -> float | None:
+        """Seconds left before the deadline, None without one."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def timeout(self, timeout: float | None) -> float | None:
+        """`timeout`, shortened to end before the deadline."""
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        return remaining if timeout is None else min(timeout, remaining)
+
+    def sleep(self, seconds: float):
+        """Sleeps, waking up when the run is stopped.
+
+        Raises:
+            RunCancelled: When the run is stopped before the end of the sleep.
+        """
+        self._stopped.wait(self.timeout(seconds))
+        self.check()
+
+    def start_tool_call(self):
+        """Counts a tool call.
+
+        Raises:
+            RunCancelled: When the run is stopped, or has made all its tool calls.
+        """
+        self.check()
+        limit = self.budget.tool_calls
+        with self._lock:
+            allowed = limit is None or self.tool_calls < limit
+            if allowed:
+                self.tool_calls += 1
+        if not allowed:
+            self.cancel(f"the turn used its {limit} tool calls")
+            self.check()
+
+    def add_tokens(self, count: int):
+        """Counts tokens of the model, stopping the run past its budget."""
+        limit = self.budget.tokens
+        with self._lock:
+            self.tokens += count
+            exceeded = limit is not None and self.tokens >= limit
+        if exceeded:
+            self.cancel(f"the turn used its {limit} tokens")
+
+    async def run(self, awaitable: Awaitable[T]) -> T:
+        """Awaits `awaitable`, cancelling it when the run is stopped.
+
+        Raises:
+            RunCancelled: When the run is stopped first.
+        """
+        self.check()
+        task = asyncio.ensure_future(awaitable)
+        waiter = asyncio.get_running_loop().create_future()
+        with self._lock:
+            if self._reason is None:
+                self._waiters.append((asyncio.get_running_loop(), waiter))
+            else:
+                waiter.set_result(None)
+        try:
+            await asyncio.wait(
+                (task, waiter),
+                timeout=self.remaining(),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        finally:
+            with self._lock:
+                self._waiters = [w for w in self._waiters if w[1] is not waiter]
+        if not task.done():
+            task.cancel()
+            # the requests of the task are cancelled before the run goes on
+            await asyncio.wait((task,))
+            self.check()
+        return task.result()
+
+    @contextmanager
+    def active(self) -> Iterator["RunControl"]:
+        """Makes this the control of the code run in the context, and its copies."""
+        token = _current_control.set(self)
+        try:
+            yield self
+        finally:
+            _current_control.reset(token)
+
+    def config(self, config: RunnableConfig | None = None) -> RunnableConfig:
+        """`config` with the callbacks stopping the model calls of a stopped run."""
+        return merge_configs(config, {"callbacks": [RunControlHandler(self)]})
+
+
+def _resolve(waiter: asyncio.Future):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+def current_control() -> RunControl | None:
+    """The control of the run of the current context, if any."""
+    return _current_control.get()
+
+
+def check_cancelled():
+    """Raises RunCancelled when the run of the current context is stopped."""
+    control = _current_control.get()
+    if control is not None:
+        control.check()
+
+
+def sleep(seconds: float):
+    """Sleeps, waking up early when the run of the current context is stopped."""
+    control = _current_control.get()
+    if control is None:
+        time.sleep(seconds)
+    else:
+        control.sleep(seconds)
+
+
+class RunControlHandler(BaseCallbackHandler):
+    """Stops model calls of a stopped run, and counts the tokens of the others."""
+
+    # the exception must reach the graph, ending its run; inline handlers that
+    # raise would leave the other handlers of the event unawaited
+    raise_error = True
+
+    def __init__(self, control: RunControl):
+        self.control = control
+        # estimated input tokens of the model calls in flight
+        self._input_tokens: Dict[UUID, int] = {}
+
+    def on_chat_model_start(
+        self,
+        serialized: Dict[str, Any],
+        messages: List[List[BaseMessage]],
+        *,
+        run_id: UUID,
+        **kwargs: Any,
+    ):
+        self.control.check()
+        self._input_tokens[run_id] = sum(
+            approximate_tokens(get_buffer_string(prompt)) for prompt in messages
+        )
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any):
+        estimated = self._input_tokens.pop(run_id, 0)
+        reported = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(
+                    getattr(generation, "message", None), "usage_metadata", None
+                )
+                if usage:
+                    reported += usage.get("total_tokens", 0)
+                else:
+                    estimated += approximate_tokens(generation.text)
+        self.control.add_tokens(reported or estimated)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._input_tokens.pop(run_id, None)
+
+
+class StoppableNetworkClient(NetworkClient):
+    """Box SDK network client sending no request for a stopped run."""
+
+    def __init__(self, network_client: NetworkClient):
+        super().__init__()
+        self.network_client = network_client
+
+    def __getattr__(self, name: str) -> Any:
+        # e.g. the requests session, HTTP policy and telemetry of the wrapped client
+        return getattr(self.__dict__["network_client"], name)
+
+    def fetch(self, options: FetchOptions) -> FetchResponse:
+        check_cancelled()
+        return self.network_client.fetch(options)
+
+
+class StoppableRetryStrategy(RetryStrategy):
+    """Box SDK retry strategy retrying no request of a stopped run."""
+
+    def __init__(self, retry_strategy: RetryStrategy):
+        super().__init__()
+        self.retry_strategy = retry_strategy
+
+    def should_retry(
+        self,
+        fetch_options: FetchOptions,
+        fetch_response: FetchResponse,
+        attempt_number: int,
+    ) -> bool:
+        control = _current_control.get()
+        if control is not None and control.stopped:
+            return False
+        return self.retry_strategy.should_retry(
+            fetch_options, fetch_response, attempt_number
+        )
+
+    def retry_after(
+        self,
+        fetch_options: FetchOptions,
+        fetch_response: FetchResponse,
+        attempt_number: int,
+    ) -> float:
+        delay = self.retry_strategy.retry_after(
+            fetch_options, fetch_response, attempt_number
+        )
+        control = _current_control.get()
+        return delay if control is None else control.timeout(delay)
+
+
+def stoppable(client: BoxClient) -> BoxClient:
+    """Returns a client of the same user sending no request for a stopped run."""
+    session = client.network_session
+    return BoxClient(
+        auth=client.auth,
+        network_session=NetworkSession(
+            network_client=StoppableNetworkClient(session.network_client),
+            retry_strategy=StoppableRetryStrategy(session.retry_strategy),
+            additional_headers=session.additional_headers,
+            base_urls=session.base_urls,
+            proxy_url=session.proxy_url,
+        ),
+    )
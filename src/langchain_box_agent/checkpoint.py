@@ -0,0 +1,520 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.serde.types import TASKS
+
+
+@dataclass
+class _ThreadEntry:
+    size: int = 0
+    blob_keys: set = field(default_factory=set)
+    write_keys: set = field(default_factory=set)
+
+
+class BoundedMemorySaver(InMemorySaver):
+    """In-memory checkpointer that forgets the least recently used threads.
+
+    `InMemorySaver` keeps every checkpoint of every thread until the process
+    exits. This saver keeps at most `max_threads` threads and `max_bytes` of
+    serialized state; past either bound, whole threads are evicted, least
+    recently read or written first. An evicted thread starts over as a new
+    conversation. The most recently used thread is never evicted.
+
+    Args:
+        max_threads (int | None): Maximum number of threads kept, None for no limit.
+        max_bytes (int | None): Maximum size of the serialized checkpoints and
+            writes kept, None for no limit.
+    """
+
+    def __init__(
+        self,
+        max_threads: int | None = 1000,
+        max_bytes: int | None = 256 * 1024 * 1024,
+        **kwargs: Any,
+    ):
+        super().__init__(**kwargs)
+        self.max_threads = max_threads
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self.evictions = 0
+        self._threads: OrderedDict[str, _ThreadEntry] = OrderedDict()
+        self._lock = threading.RLock()
+
+    @property
+    def thread_count(self) -> int:
+        # no __len__, an empty checkpointer must not be falsy for langgraph
+        return len(self._threads)
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        with self._lock:
+            result = super().get_tuple(config)
+            if thread_id in self._threads:
+                self._threads.move_to_end(thread_id)
+            else:
+                # reads of unknown threads must not leave empty entries behind
+                self._forget(thread_id, _ThreadEntry())
+            return result
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        with self._lock:
+            results = list(
+                super().list(config, filter=filter, before=before, limit=limit)
+            )
+        yield from results
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        with self._lock:
+            result = super().put(config, checkpoint, metadata, new_versions)
+            entry = self._touch(thread_id)
+            size = 0
+            for channel, version in new_versions.items():
+                key = (thread_id, checkpoint_ns, channel, version)
+                if key not in entry.blob_keys:
+                    entry.blob_keys.add(key)
+                    size += len(self.blobs[key][1])
+            saved, saved_metadata, _ = self.storage[thread_id][checkpoint_ns][
+                checkpoint["id"]
+            ]
+            size += len(saved[1]) + len(saved_metadata[1])
+            self._grow(entry, size)
+            return result
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ):
+        thread_id = config["configurable"]["thread_id"]
+        key = (
+            thread_id,
+            config["configurable"].get("checkpoint_ns", ""),
+            config["configurable"]["checkpoint_id"],
+        )
+        with self._lock:
+            before = self._writes_size(key)
+            super().put_writes(config, writes, task_id, task_path)
+            entry = self._touch(thread_id)
+            entry.write_keys.add(key)
+            self._grow(entry, self._writes_size(key) - before)
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return self.get_tuple(config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        for item in self.list(config, filter=filter, before=before, limit=limit):
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ):
+        return self.put_writes(config, writes, task_id, task_path)
+
+    def _writes_size(self, key: Tuple[str, str, str]) -> int:
+        writes = self.writes.get(key)
+        return sum(len(value[1]) for _, _, value, _ in writes.values()) if writes else 0
+
+    def _touch(self, thread_id: str) -> _ThreadEntry:
+        entry = self._threads.get(thread_id)
+        if entry is None:
+            entry = self._threads[thread_id] = _ThreadEntry()
+        self._threads.move_to_end(thread_id)
+        return entry
+
+    def _grow(self, entry: _ThreadEntry, size: int):
+        entry.size += size
+        self.size_bytes += size
+        while len(self._threads) > 1 and (
+            (self.max_threads is not None and len(self._threads) > self.max_threads)
+            or (self.max_bytes is not None and self.size_bytes > self.max_bytes)
+        ):
+            self._forget(*self._threads.popitem(last=False))
+            self.evictions += 1
+
+    def _forget(self, thread_id: str, entry: _ThreadEntry):
+        for checkpoint_ns, checkpoints in self.storage.pop(thread_id, {}).items():
+            for checkpoint_id in checkpoints:
+                self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+        for key in entry.blob_keys:
+            self.blobs.pop(key, None)
+        for key in entry.write_keys:
+            self.writes.pop(key, None)
+        self.size_bytes -= entry.size
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT,
+    checkpoint BLOB,
+    metadata_type TEXT,
+    metadata BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT,
+    value BLOB,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+"""
+
+
+class SQLiteSaver(BaseCheckpointSaver[int]):
+    """Checkpointer persisting threads to a local SQLite database.
+
+    The database runs in WAL mode, and writes are buffered and committed in
+    batches of `batch_size` rows, or after `flush_interval` seconds. Reads
+    commit the buffer first, so they always see the latest state. Buffered
+    writes are lost if the process dies before they are committed; call
+    `flush` or `close` at shutdown.
+
+    Args:
+        path (str): Path of the database file, ":memory:" for a private database.
+        batch_size (int): Number of buffered rows that triggers a commit.
+        flush_interval (float): Seconds after which buffered rows are committed
+            on the next write.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        **kwargs: Any,
+    ):
+        super().__init__(**kwargs)
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+        self._lock = threading.RLock()
+        self._pending_checkpoints: List[tuple] = []
+        self._pending_writes: List[tuple] = []
+        self._first_pending_at: Optional[float] = None
+
+    def __enter__(self) -> "SQLiteSaver":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def flush(self):
+        """Commits the buffered writes."""
+        with self._lock:
+            if not self._pending_checkpoints and not self._pending_writes:
+                return
+            with self._connection:
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    self._pending_checkpoints,
+                )
+                # like InMemorySaver, regular writes of a task are only stored
+                # once while special writes (errors, interrupts) are replaced
+                self._connection.executemany(
+                    "INSERT OR IGNORE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (row for row in self._pending_writes if row[4] >= 0),
+                )
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (row for row in self._pending_writes if row[4] < 0),
+                )
+            self._pending_checkpoints.clear()
+            self._pending_writes.clear()
+            self._first_pending_at = None
+
+    def close(self):
+        """Commits the buffered writes and closes the database."""
+        with self._lock:
+            self.flush()
+            self._connection.close()
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        # pending sends are rebuilt from the writes of the parent checkpoint
+        saved = checkpoint.copy()
+        saved.pop("pending_sends", None)
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        row = (
+            thread_id,
+            checkpoint_ns,
+            checkpoint["id"],
+            config["configurable"].get("checkpoint_id"),
+            *self.serde.dumps_typed(saved),
+            *self.serde.dumps_typed(get_checkpoint_metadata(config, metadata)),
+        )
+        with self._lock:
+            self._pending_checkpoints.append(row)
+            self._maybe_flush()
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ):
+        configurable = config["configurable"]
+        key = (
+            configurable["thread_id"],
+            configurable.get("checkpoint_ns", ""),
+            configurable["checkpoint_id"],
+        )
+        with self._lock:
+            for idx, (channel, value) in enumerate(writes):
+                self._pending_writes.append(
+                    (
+                        *key,
+                        task_id,
+                        WRITES_IDX_MAP.get(channel, idx),
+                        channel,
+                        *self.serde.dumps_typed(value),
+                        task_path,
+                    )
+                )
+            self._maybe_flush()
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        configurable = config["configurable"]
+        query = "SELECT * FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+        params = [configurable["thread_id"], configurable.get("checkpoint_ns", "")]
+        if checkpoint_id := get_checkpoint_id(config):
+            query += " AND checkpoint_id = ?"
+            params.append(checkpoint_id)
+        query += " ORDER BY checkpoint_id DESC LIMIT 1"
+        with self._lock:
+            self.flush()
+            row = self._connection.execute(query, params).fetchone()
+            return self._checkpoint_tuple(row) if row else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        query = "SELECT * FROM checkpoints WHERE 1 = 1"
+        params = []
+        if config:
+            query += " AND thread_id = ?"
+            params.append(config["configurable"]["thread_id"])
+            if (
+                checkpoint_ns := config["configurable"].get("checkpoint_ns")
+            ) is not None:
+                query += " AND checkpoint_ns = ?"
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                query += " AND checkpoint_id = ?"
+                params.append(checkpoint_id)
+        if before and (before_checkpoint_id := get_checkpoint_id(before)):
+            query += " AND checkpoint_id < ?"
+            params.append(before_checkpoint_id)
+        query += " ORDER BY thread_id, checkpoint_ns, checkpoint_id DESC"
+
+        with self._lock:
+            self.flush()
+            rows = self._connection.execute(query, params).fetchall()
+            results = []
+            for row in rows:
+                if limit is not None and len(results) >= limit:
+                    break
+                metadata = self.serde.loads_typed((row[6], row[7]))
+                if filter and not all(
+                    metadata.get(key) == value for key, value in filter.items()
+                ):
+                    continue
+                results.append(self._checkpoint_tuple(row))
+        yield from results
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        results = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in results:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        # buffered writes are cheap, only a commit touches the disk
+        return await asyncio.to_thread(
+            self.put, config, checkpoint, metadata, new_versions
+        )
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ):
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    def _maybe_flush(self):
+        now = time.monotonic()
+        if self._first_pending_at is None:
+            self._first_pending_at = now
+        pending = len(self._pending_checkpoints) + len(self._pending_writes)
+        if (
+            pending >= self.batch_size
+            or now - self._first_pending_at >= self.flush_interval
+        ):
+            self.flush()
+
+    def _load_writes(
+        self, thread_id: str, checkpoint_ns: str, checkpoint_id: str
+    ) -> List[tuple]:
+        return self._connection.execute(
+            "SELECT task_id, channel, type, value, task_path, idx FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? "
+            "ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+
+    def _checkpoint_tuple(self, row: tuple) -> CheckpointTuple:
+        (
+            thread_id,
+            checkpoint_ns,
+            checkpoint_id,
+            parent_checkpoint_id,
+            type_,
+            checkpoint,
+            metadata_type,
+            metadata,
+        ) = row
+        writes = self._load_writes(thread_id, checkpoint_ns, checkpoint_id)
+        sends = []
+        if parent_checkpoint_id:
+            parent_writes = self._load_writes(
+                thread_id, checkpoint_ns, parent_checkpoint_id
+            )
+            sends = sorted(
+                (write for write in parent_writes if write[1] == TASKS),
+                key=lambda write: (write[4], write[0], write[5]),
+            )
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint={
+                **self.serde.loads_typed((type_, checkpoint)),
+                "pending_sends": [
+                    self.serde.loads_typed((write[2], write[3])) for write in sends
+                ],
+            },
+            metadata=self.serde.loads_typed((metadata_type, metadata)),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((value_type, value)))
+                for task_id, channel, value_type, value, _, _ in writes
+            ],
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_checkpoint_id,
+                    }
+                }
+                if parent_checkpoint_id
+                else None
+            ),
+        )
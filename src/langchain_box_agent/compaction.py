@@ -0,0 +1,267 @@
+import abc
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    HumanMessage,
+    SystemMessage,
+    ToolCall,
+    ToolMessage,
+)
+from langchain_core.messages.utils import count_tokens_approximately
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+from langgraph.constants import TAG_NOSTREAM
+
+
+def _tokens(message: BaseMessage) -> int:
+    return count_tokens_approximately([message])
+
+
+class CompactionPolicy(abc.ABC):
+    """Shortens the output of a tool call that is old enough to be compacted."""
+
+    @abc.abstractmethod
+    def compact(self, message: ToolMessage, tool_call: Optional[ToolCall]) -> str:
+        """Returns the text replacing the output of the tool call."""
+
+    async def acompact(
+        self, message: ToolMessage, tool_call: Optional[ToolCall]
+    ) -> str:
+        return self.compact(message, tool_call)
+
+
+def _call_description(message: ToolMessage, tool_call: Optional[ToolCall]) -> str:
+    if tool_call is None:
+        return message.name or "the tool"
+    return f"{tool_call['name']} with {json.dumps(tool_call['args'])}"
+
+
+class TruncateOutput(CompactionPolicy):
+    """Keeps the first `max_chars` characters of the output.
+
+    Args:
+        max_chars (int): Number of characters kept.
+    """
+
+    def __init__(self, max_chars: int = 1000):
+        self.max_chars = max_chars
+
+    def compact(self, message: ToolMessage, tool_call: Optional[ToolCall]) -> str:
+        text = message.text()
+        if len(text) <= self.max_chars:
+            return text
+        return (
+            f"{text[: self.max_chars]}\n\n[Output truncated from {len(text)} "
+            f"characters to save context. Call {_call_description(message, tool_call)} "
+            "again to see all of it.]"
+        )
+
+
+class ReferenceOutput(CompactionPolicy):
+    """Replaces the output with a note on how to get it again."""
+
+    def compact(self, message: ToolMessage, tool_call: Optional[ToolCall]) -> str:
+        return (
+            f"[Output of {len(message.text())} characters omitted to save context. "
+            f"Call {_call_description(message, tool_call)} again to see it.]"
+        )
+
+
+# summaries are written in the agent step, they must not stream as answer tokens
+_NOSTREAM: RunnableConfig = {"tags": [TAG_NOSTREAM]}
+
+
+class SummarizeOutput(CompactionPolicy):
+    """Replaces the output with a summary written by a chat model.
+
+    Args:
+        model (BaseChatModel): The model writing the summaries, usually a small one.
+        max_chars (int): Outputs up to this size are kept as they are.
+        instructions (str): The system prompt of the summary requests.
+    """
+
+    def __init__(
+        self,
+        model: BaseChatModel,
+        max_chars: int = 1000,
+        instructions: str = (
+            "Summarize this tool output in a few sentences. Keep every ID, name, "
+            "number and date that could be needed to answer later questions."
+        ),
+    ):
+        self.model = model
+        self.max_chars = max_chars
+        self.instructions = instructions
+
+    def _request(
+        self, message: ToolMessage, tool_call: Optional[ToolCall]
+    ) -> List[BaseMessage]:
+        return [
+            SystemMessage(content=self.instructions),
+            HumanMessage(
+                content=f"Output of {_call_description(message, tool_call)}:\n\n"
+                + message.text()
+            ),
+        ]
+
+    def _format(self, message: ToolMessage, summary: BaseMessage) -> str:
+        return (
+            f"[Summary of an output of {len(message.text())} characters]\n"
+            + summary.text()
+        )
+
+    def compact(self, message: ToolMessage, tool_call: Optional[ToolCall]) -> str:
+        if len(message.text()) <= self.max_chars:
+            return message.text()
+        summary = self.model.invoke(self._request(message, tool_call), _NOSTREAM)
+        return self._format(message, summary)
+
+    async def acompact(
+        self, message: ToolMessage, tool_call: Optional[ToolCall]
+    ) -> str:
+        if len(message.text()) <= self.max_chars:
+            return message.text()
+        summary = await self.model.ainvoke(self._request(message, tool_call), _NOSTREAM)
+        return self._format(message, summary)
+
+
+class HistoryCompactor:
+    """Compacts old tool outputs before the message history is sent to the model.
+
+    When the history exceeds `max_tokens`, the outputs of the oldest tool calls
+    are compacted first, until the history fits or only recent outputs are left.
+    The outputs of the last `keep_recent` model turns with tool calls are never
+    compacted. Only the model input changes, the stored history keeps the full
+    outputs. Compacted outputs are remembered per tool call, so older messages
+    sent to the model stay the same from one step to the next.
+
+    Args:
+        max_tokens (int): Approximate token budget of the history.
+        policies (Dict[str, CompactionPolicy | None] | None): Policy per tool
+            name, None to never compact the outputs of a tool.
+        default_policy (CompactionPolicy | None): Policy of the other tools.
+        keep_recent (int): Number of recent model turns whose tool outputs are
+            kept as they are.
+        max_cached (int): Number of compacted outputs remembered.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 8_000,
+        policies: Dict[str, CompactionPolicy | None] | None = None,
+        default_policy: CompactionPolicy | None = None,
+        keep_recent: int = 1,
+        max_cached: int = 10_000,
+    ):
+        self.max_tokens = max_tokens
+        self.policies = dict(policies or {})
+        self.default_policy = (
+            default_policy if default_policy is not None else TruncateOutput()
+        )
+        self.keep_recent = keep_recent
+        self.max_cached = max_cached
+        self._cache: OrderedDict[Tuple, ToolMessage] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def as_prompt(self) -> Runnable:
+        """Returns the runnable to pass as the `prompt` of a ReAct agent."""
+        return RunnableLambda(self.compact, afunc=self.acompact, name="Prompt")
+
+    def compact(self, state: Any) -> List[BaseMessage]:
+        """Returns the messages of an agent state, with old tool outputs compacted."""
+        messages, tokens, plan = self._plan(state)
+        for index, policy, tool_call in plan:
+            if tokens <= self.max_tokens:
+                break
+            message = messages[index]
+            compacted = self._cached(message, policy)
+            if compacted is None:
+                content = policy.compact(message, tool_call)
+                compacted = self._remember(message, policy, content)
+            messages[index] = compacted
+            tokens += _tokens(compacted) - _tokens(message)
+        return messages
+
+    async def acompact(self, state: Any) -> List[BaseMessage]:
+        """Async version of `compact`."""
+        messages, tokens, plan = self._plan(state)
+        for index, policy, tool_call in plan:
+            if tokens <= self.max_tokens:
+                break
+            message = messages[index]
+            compacted = self._cached(message, policy)
+            if compacted is None:
+                content = await policy.acompact(message, tool_call)
+                compacted = self._remember(message, policy, content)
+            messages[index] = compacted
+            tokens += _tokens(compacted) - _tokens(message)
+        return messages
+
+    def _plan(
+        self, state: Any
+    ) -> Tuple[
+        List[BaseMessage], int, List[Tuple[int, CompactionPolicy, Optional[ToolCall]]]
+    ]:
+        messages = list(
+            state["messages"] if isinstance(state, dict) else state.messages
+        )
+        tokens = count_tokens_approximately(messages)
+        if tokens <= self.max_tokens:
+            return messages, tokens, []
+
+        tool_turns = [
+            message
+            for message in messages
+            if isinstance(message, AIMessage) and message.tool_calls
+        ]
+        tool_calls = {
+            tool_call["id"]: tool_call
+            for message in tool_turns
+            for tool_call in message.tool_calls
+        }
+        recent = set()
+        if self.keep_recent > 0:
+            recent = {
+                tool_call["id"]
+                for message in tool_turns[-self.keep_recent :]
+                for tool_call in message.tool_calls
+            }
+
+        # oldest outputs first
+        plan = []
+        for index, message in enumerate(messages):
+            if not isinstance(message, ToolMessage) or message.tool_call_id in recent:
+                continue
+            policy = self.policies.get(message.name, self.default_policy)
+            if policy is not None:
+                plan.append((index, policy, tool_calls.get(message.tool_call_id)))
+        return messages, tokens, plan
+
+    @staticmethod
+    def _key(message: ToolMessage, policy: CompactionPolicy) -> Tuple:
+        return (message.id, message.tool_call_id, id(policy))
+
+    def _cached(
+        self, message: ToolMessage, policy: CompactionPolicy
+    ) -> Optional[ToolMessage]:
+        with self._lock:
+            key = self._key(message, policy)
+            compacted = self._cache.get(key)
+            if compacted is not None:
+                self._cache.move_to_end(key)
+            return compacted
+
+    def _remember(
+        self, message: ToolMessage, policy: CompactionPolicy, content: str
+    ) -> ToolMessage:
+        compacted = message.model_copy(update={"content": content})
+        with self._lock:
+            self._cache[self._key(message, policy)] = compacted
+            while len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+        return compacted
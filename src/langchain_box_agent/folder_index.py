@@ -0,0 +1,222 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Set, Tuple, Union
+
+from box_ai_agents_toolkit import File, Folder
+
+from .box_events import item_change
+
+
+@dataclass
+class _Folder:
+    name: str
+    parent_id: str | None
+    expires_at: float | None
+
+
+def _key(name: str) -> str:
+    return name.strip().casefold()
+
+
+class FolderIndex:
+    """Local index of folder names and paths to folder IDs.
+
+    The index is warmed from folder listings and folder searches, so repeated
+    folder searches are answered without a request, and paths without one
+    request per segment. Entries expire after `ttl` seconds, and can be invalidated from
+    the Box events stream with `apply_events`. Names are matched without case.
+
+    Args:
+        ttl (float | None): Seconds an entry stays valid, None to keep entries
+            until they are invalidated.
+        max_folders (int): Maximum number of folders indexed; the oldest
+            entries are dropped first.
+    """
+
+    def __init__(self, ttl: float | None = 3600, max_folders: int = 100_000):
+        self.ttl = ttl
+        self.max_folders = max_folders
+        self.hits = 0
+        self.misses = 0
+        self._folders: Dict[str, _Folder] = {}
+        self._children: Dict[str, Dict[str, str]] = {}
+        self._names: Dict[str, Set[str]] = {}
+        self._listed: Dict[str, float | None] = {}
+        self._searches: Dict[str, Tuple[List[str], float | None]] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._folders)
+
+    def _expires_at(self) -> float | None:
+        return None if self.ttl is None else time.monotonic() + self.ttl
+
+    @staticmethod
+    def _fresh(expires_at: float | None) -> bool:
+        return expires_at is None or expires_at > time.monotonic()
+
+    def add(self, folder_id: str, name: str, parent_id: str | None = None):
+        """Indexes a folder. A known parent is kept when `parent_id` is None."""
+        with self._lock:
+            old = self._folders.get(folder_id)
+            if old is not None:
+                parent_id = parent_id if parent_id is not None else old.parent_id
+                self._unlink(folder_id, old)
+            self._folders[folder_id] = _Folder(name, parent_id, self._expires_at())
+            self._names.setdefault(_key(name), set()).add(folder_id)
+            if parent_id is not None:
+                self._children.setdefault(parent_id, {})[_key(name)] = folder_id
+            while len(self._folders) > self.max_folders:
+                self._remove(next(iter(self._folders)))
+
+    def add_items(self, parent_id: str, items: Iterable[Union[File, Folder]]):
+        """Indexes the folders of one page of a listing of `parent_id`."""
+        for item in items:
+            if item.type == "folder":
+                self.add(item.id, item.name, parent_id)
+
+    def mark_listed(self, parent_id: str):
+        """Records that every sub folder of `parent_id` is indexed."""
+        with self._lock:
+            self._listed[parent_id] = self._expires_at()
+
+    def is_listed(self, parent_id: str) -> bool:
+        with self._lock:
+            return parent_id in self._listed and self._fresh(self._listed[parent_id])
+
+    def name(self, folder_id: str) -> str | None:
+        with self._lock:
+            folder = self._get(folder_id)
+            return None if folder is None else folder.name
+
+    def parent_id(self, folder_id: str) -> str | None:
+        with self._lock:
+            folder = self._get(folder_id)
+            return None if folder is None else folder.parent_id
+
+    def child(self, parent_id: str, name: str) -> str | None:
+        """Returns the ID of the `name` sub folder of `parent_id`, if indexed."""
+        with self._lock:
+            folder_id = self._children.get(parent_id, {}).get(_key(name))
+            if folder_id is None or self._get(folder_id) is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return folder_id
+
+    def find(self, name: str) -> List[str]:
+        """Returns the IDs of the indexed folders named `name`."""
+        with self._lock:
+            ids = [
+                folder_id
+                for folder_id in sorted(self._names.get(_key(name), ()))
+                if self._get(folder_id) is not None
+            ]
+            if ids:
+                self.hits += 1
+            else:
+                self.misses += 1
+            return ids
+
+    def remember_search(self, query: str, folders: Iterable[Folder]):
+        """Indexes the folders found by a search, and the search itself."""
+        folders = list(folders)
+        for folder in folders:
+            self.add(folder.id, folder.name)
+        with self._lock:
+            self._searches[_key(query)] = (
+                [folder.id for folder in folders],
+                self._expires_at(),
+            )
+
+    def search(self, query: str) -> List[str] | None:
+        """Returns the folder IDs a search for `query` found, None if unknown."""
+        with self._lock:
+            search = self._searches.get(_key(query))
+            if search is None or not self._fresh(search[1]):
+                self._searches.pop(_key(query), None)
+                return None
+            ids, _ = search
+            if any(self._get(folder_id) is None for folder_id in ids):
+                # a folder found by the search changed since
+                del self._searches[_key(query)]
+                return None
+            self.hits += 1
+            return list(ids)
+
+    def invalidate(self, folder_id: str):
+        """Forgets a folder and every folder indexed below it."""
+        with self._lock:
+            self._listed.pop(folder_id, None)
+            for child_id in list(self._children.get(folder_id, {}).values()):
+                self.invalidate(child_id)
+            self._children.pop(folder_id, None)
+            if folder_id in self._folders:
+                self._remove(folder_id)
+
+    def apply_events(self, events: Iterable[Any]):
+        """Updates the index from Box events, SDK `Event` objects or dicts.
+
+        Folders are added, renamed or moved by create, copy, move, rename and
+        restore events, and forgotten with their sub folders when trashed.
+        """
+        with self._lock:
+            for event in events:
+                self._apply_event(event)
+
+    def _apply_event(self, event: Any):
+        change = item_change(event)
+        if change is None or change.item_type != "folder":
+            return
+        if change.removed:
+            self.invalidate(change.item_id)
+            return
+        old = self._folders.get(change.item_id)
+        if old is not None and old.parent_id != change.parent_id:
+            # the folder moved, the listing of its old parent is stale
+            self._listed.pop(old.parent_id, None)
+        name = change.name
+        if name is None and old is not None:
+            name = old.name
+        if name is None:
+            # some events carry no name: the folder is left to the next
+            # listing of its parent
+            self._listed.pop(change.parent_id, None)
+            return
+        self.add(change.item_id, name, change.parent_id)
+        # a new folder name can match a search done before
+        self._searches.clear()
+
+    def clear(self):
+        with self._lock:
+            self._folders.clear()
+            self._children.clear()
+            self._names.clear()
+            self._listed.clear()
+            self._searches.clear()
+
+    def _get(self, folder_id: str) -> _Folder | None:
+        folder = self._folders.get(folder_id)
+        if folder is None:
+            return None
+        if not self._fresh(folder.expires_at):
+            self._remove(folder_id)
+            return None
+        return folder
+
+    def _unlink(self, folder_id: str, folder: _Folder):
+        ids = self._names.get(_key(folder.name))
+        if ids is not None:
+            ids.discard(folder_id)
+            if not ids:
+                del self._names[_key(folder.name)]
+        children = self._children.get(folder.parent_id)
+        if children is not None and children.get(_key(folder.name)) == folder_id:
+            del children[_key(folder.name)]
+
+    def _remove(self, folder_id: str):
+        folder = self._folders.pop(folder_id)
+        self._unlink(folder_id, folder)
+        if folder.parent_id is not None:
+            self._listed.pop(folder.parent_id, None)
@@ -0,0 +1,189 @@
+import asyncio
+import json
+from collections import deque
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterator,
+    Callable,
+    Deque,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Union,
+)
+
+from box_ai_agents_toolkit import BoxClient, File, Folder
+from box_sdk_gen import Items
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+
+from .cancellation import check_cancelled
+
+if TYPE_CHECKING:
+    from .box_async import AsyncBoxClient
+
+# Box returns at most 1000 items per page of a folder listing
+FOLDER_PAGE_SIZE = 1000
+FOLDER_WALK_CONCURRENCY = 8
+
+# called with the folder id and the items of every page listed
+PageCallback = Callable[[str, List[Union[File, Folder]]], None]
+
+
+class _Page(NamedTuple):
+    folder_id: str
+    depth: int
+    offset: int
+
+
+class _Frontier:
+    """Pages of folders waiting to be listed, in breadth-first order.
+
+    Only folder ids wait in the frontier; items are handed to the caller as soon
+    as their page is listed.
+    """
+
+    def __init__(self, folder_id: str, max_depth: int | None, page_size: int):
+        self.max_depth = max_depth
+        self.page_size = page_size
+        self.waiting: Deque[_Page] = deque([_Page(folder_id, 0, 0)])
+
+    def next_pages(self, count: int) -> List[_Page]:
+        pages = []
+        while self.waiting and len(pages) < count:
+            pages.append(self.waiting.popleft())
+        return pages
+
+    def add_page(self, page: _Page, items: Items) -> List[Union[File, Folder]]:
+        if page.offset == 0 and items.total_count:
+            # the rest of a folder is listed before the folders queued after it
+            for offset in reversed(
+                range(self.page_size, items.total_count, self.page_size)
+            ):
+                self.waiting.appendleft(_Page(page.folder_id, page.depth, offset))
+
+        entries = [item for item in items.entries or [] if item.type != "web_link"]
+        if self.max_depth is None or page.depth + 1 < self.max_depth:
+            for item in entries:
+                if item.type == "folder":
+                    self.waiting.append(_Page(item.id, page.depth + 1, 0))
+        return entries
+
+
+def walk_folder(
+    client: BoxClient,
+    folder_id: str,
+    max_depth: int | None = None,
+    max_items: int | None = None,
+    page_size: int = FOLDER_PAGE_SIZE,
+    max_concurrency: int = FOLDER_WALK_CONCURRENCY,
+    on_page: PageCallback | None = None,
+) -> Iterator[Union[File, Folder]]:
+    """Lists the content of a folder tree, breadth first.
+
+    Up to `max_concurrency` pages are listed at once, and items are yielded as
+    soon as their page arrives, in an order that does not depend on timing.
+    Closing the generator, or stopping the run of the current context, stops
+    the walk.
+
+    Args:
+        client (BoxClient): The Box client.
+        folder_id (str): The folder to list.
+        max_depth (int | None): The number of levels to list, 1 for the direct
+            content of the folder only, None for no limit.
+        max_items (int | None): Stop after this many items, None for no limit.
+        page_size (int): The number of items requested per page.
+        max_concurrency (int): The maximum number of pages listed at once.
+        on_page (PageCallback | None): Called with every page listed, e.g. to
+            index the folders seen on the way.
+    """
+    if max_items is not None and max_items <= 0:
+        return
+    frontier = _Frontier(folder_id, max_depth, page_size)
+    pending: Deque = deque()
+    count = 0
+    # page requests run in the context of the walk: its span and run control
+    with ContextThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        try:
+            while True:
+                check_cancelled()
+                for page in frontier.next_pages(max_concurrency - len(pending)):
+                    future = executor.submit(
+                        client.folders.get_folder_items,
+                        page.folder_id,
+                        offset=page.offset,
+                        limit=page_size,
+                    )
+                    pending.append((page, future))
+                if not pending:
+                    return
+
+                page, future = pending.popleft()
+                entries = frontier.add_page(page, future.result())
+                if on_page is not None:
+                    on_page(page.folder_id, entries)
+                for item in entries:
+                    yield item
+                    count += 1
+                    if count == max_items:
+                        return
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+
+async def awalk_folder(
+    async_client: "AsyncBoxClient",
+    folder_id: str,
+    max_depth: int | None = None,
+    max_items: int | None = None,
+    page_size: int = FOLDER_PAGE_SIZE,
+    max_concurrency: int = FOLDER_WALK_CONCURRENCY,
+    on_page: PageCallback | None = None,
+) -> AsyncIterator[Union[File, Folder]]:
+    """Async version of `walk_folder`."""
+    if max_items is not None and max_items <= 0:
+        return
+    frontier = _Frontier(folder_id, max_depth, page_size)
+    pending: Deque = deque()
+    count = 0
+    try:
+        while True:
+            check_cancelled()
+            for page in frontier.next_pages(max_concurrency - len(pending)):
+                task = asyncio.ensure_future(
+                    async_client.get_folder_items(
+                        page.folder_id, offset=page.offset, limit=page_size
+                    )
+                )
+                pending.append((page, task))
+            if not pending:
+                return
+
+            page, task = pending.popleft()
+            entries = frontier.add_page(page, await task)
+            if on_page is not None:
+                on_page(page.folder_id, entries)
+            for item in entries:
+                yield item
+                count += 1
+                if count == max_items:
+                    return
+    finally:
+        for _, task in pending:
+            task.cancel()
+
+
+def folder_item_dict(item: Union[File, Folder]) -> dict:
+    """The fields of a folder item returned to the agent, without empty ones."""
+    fields = {"id": item.id, "name": item.name, "type": item.type}
+    description = getattr(item, "description", None)
+    if description:
+        fields["description"] = description
+    return fields
+
+
+def iter_ndjson(items: Iterable[Union[File, Folder]]) -> Iterator[str]:
+    """Formats folder items as newline delimited JSON, one line per item."""
+    for item in items:
+        yield json.dumps(folder_item_dict(item)) + "\n"
@@ -0,0 +1,106 @@
+import math
+from typing import Callable, List
+
+# characters per token of English text and JSON, the estimate LangChain uses too
+CHARS_PER_TOKEN = 4
+
+# room left for the note following a shortened output
+NOTE_RESERVE = 80
+
+TokenCounter = Callable[[str], int]
+
+
+def approximate_tokens(text: str) -> int:
+    """Estimates the number of tokens of a text from its length."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+class OutputBudget:
+    """The maximum size of the output of a tool, in tokens or in bytes.
+
+    Tools shape their output to fit: listings and search results keep the
+    items that fit and end with the offset of the next ones, text windows are
+    made smaller. Any other output is cut at a line break, with a note saying
+    how much was left out.
+
+    Args:
+        max_tokens (int | None): Maximum tokens of an output.
+        max_bytes (int | None): Maximum UTF-8 bytes of an output, instead of tokens.
+        token_counter (TokenCounter | None): Counts the tokens of a text, e.g.
+            with the tokenizer of the model. None estimates them from the length.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int | None = None,
+        max_bytes: int | None = None,
+        token_counter: TokenCounter | None = None,
+    ):
+        if (max_tokens is None) == (max_bytes is None):
+            raise ValueError("Give either max_tokens or max_bytes")
+        self.max_tokens = max_tokens
+        self.max_bytes = max_bytes
+        self.token_counter = token_counter or approximate_tokens
+
+    @property
+    def limit(self) -> int:
+        return self.max_tokens if self.max_tokens is not None else self.max_bytes
+
+    @property
+    def unit(self) -> str:
+        return "tokens" if self.max_tokens is not None else "bytes"
+
+    def size(self, text: str) -> int:
+        """The size of a text, in the unit of the budget."""
+        if self.max_tokens is not None:
+            return self.token_counter(text)
+        return len(text.encode("utf-8"))
+
+    def fits(self, text: str) -> bool:
+        return self.size(text) <= self.limit
+
+    def max_chars(self) -> int:
+        """The characters of a text window to read, before it is measured.
+
+        A byte holds at most one character, a token about `CHARS_PER_TOKEN`.
+        The window is then shortened with `fitting_chars` until it fits.
+        """
+        if self.max_tokens is not None:
+            return self.limit * CHARS_PER_TOKEN
+        return self.limit
+
+    def fitting_chars(self, text: str, suffix: str = "") -> int:
+        """The length of the longest start of `text` fitting the budget with `suffix`."""
+        # found by bisection, the size of a text only grows with its length
+        low, high = 0, len(text)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.fits(text[:middle] + suffix):
+                low = middle
+            else:
+                high = middle - 1
+        return low
+
+    def count_fitting(self, parts: List[str], separator: str = "\n") -> int:
+        """The number of leading `parts` that fit the budget once joined.
+
+        Room is left for a note, so that a shortened output still fits. The
+        first part is always counted, for the next call to move on.
+        """
+        available = self.limit - NOTE_RESERVE
+        used = 0
+        for count, part in enumerate(parts):
+            used += self.size(part) + (self.size(separator) if count else 0)
+            if used > available:
+                return max(count, 1)
+        return len(parts)
+
+    def truncate(self, text: str, note: str) -> str:
+        """Returns `text` when it fits, else its start cut at a line break and `note`."""
+        if self.fits(text):
+            return text
+        head = text[: self.fitting_chars(text, f"\n\n{note}")]
+        line_end = head.rfind("\n")
+        if line_end > 0:
+            head = head[:line_end]
+        return f"{head.rstrip()}\n\n{note}"
@@ -0,0 +1,240 @@
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterator,
+    NamedTuple,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from .cancellation import RunControl, TurnBudget, current_control
+
+# the files of a result read ahead, as (file id, version or None when unknown)
+FileVersions = Sequence[Tuple[str, Union[str, None]]]
+
+
+@dataclass(frozen=True)
+class PrefetchPolicy:
+    """Which files an agent reads ahead, while the model thinks about a result.
+
+    Args:
+        files (int): The first files of a search or folder listing whose text is
+            read into the cache of `box_read_tool`.
+        max_chars (int): Longer texts are not kept, their download stops there.
+        concurrency (int): Downloads in flight.
+        seconds (float): Time a file may take to be read ahead.
+    """
+
+    files: int = 5
+    max_chars: int = 200_000
+    concurrency: int = 4
+    seconds: float = 30.0
+
+
+@dataclass
+class PrefetchStats:
+    started: int = 0
+    cached: int = 0
+    skipped: int = 0
+    cancelled: int = 0
+    failed: int = 0
+
+
+class _Job(NamedTuple):
+    control: RunControl
+    future: Union[Future, asyncio.Task]
+
+
+class Prefetcher:
+    """Reads the text of files ahead of the `box_read_tool` calls likely to need them.
+
+    Each result starts a batch, which supersedes the files of the previous
+    result still waiting or downloading, unless they are in the new batch too.
+    Every file has its own deadline, and is stopped with the run that started
+    it. Reads of a file being read ahead wait for it instead of downloading it
+    again.
+    """
+
+    def __init__(self, policy: PrefetchPolicy):
+        self.policy = policy
+        self._stats = PrefetchStats()
+        self._jobs: Dict[str, _Job] = {}
+        self._executor: ThreadPoolExecutor | None = None
+        self._semaphores: Dict[asyncio.AbstractEventLoop, asyncio.Semaphore] = {}
+        self._lock = threading.Lock()
+
+    def stats(self) -> PrefetchStats:
+        with self._lock:
+            return PrefetchStats(**asdict(self._stats))
+
+    def _count(self, name: str):
+        with self._lock:
+            setattr(self._stats, name, getattr(self._stats, name) + 1)
+
+    def _new_batch(self, files: FileVersions) -> FileVersions:
+        """Cancels the jobs left out of the batch, and returns the files to start."""
+        files = list(files)[: self.policy.files]
+        file_ids = {file_id for file_id, _ in files}
+        with self._lock:
+            for file_id, job in list(self._jobs.items()):
+                if job.future.done():
+                    del self._jobs[file_id]
+                elif file_id not in file_ids:
+                    self._cancel(job, "a newer result superseded the file")
+                    del self._jobs[file_id]
+            return [(file_id, v) for file_id, v in files if file_id not in self._jobs]
+
+    def _cancel(self, job: _Job, reason: str):
+        # started jobs count themselves once stopped, async ones always start
+        job.control.cancel(reason)
+        if isinstance(job.future, Future) and job.future.cancel():
+            self._stats.cancelled += 1
+
+    def _control(self) -> RunControl:
+        budget = TurnBudget(seconds=self.policy.seconds)
+        run = current_control()
+        return run.child(budget) if run is not None else RunControl(budget)
+
+    def prefetch(self, files: FileVersions, fetch: Callable[[str, str | None], bool]):
+        """Reads ahead the first files of a result in background threads.
+
+        `fetch(file_id, version)` reads the text of a file into the cache, and
+        returns whether it did.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.policy.concurrency, thread_name_prefix="box-prefetch"
+            )
+        for file_id, version in self._new_batch(files):
+            control = self._control()
+            future = self._executor.submit(self._run, control, fetch, file_id, version)
+            with self._lock:
+                self._jobs[file_id] = _Job(control, future)
+
+    def _run(
+        self,
+        control: RunControl,
+        fetch: Callable[[str, str | None], bool],
+        file_id: str,
+        version: str | None,
+    ):
+        self._count("started")
+        try:
+            with control.active():
+                control.check()
+                self._count("cached" if fetch(file_id, version) else "skipped")
+        except Exception:
+            self._count("cancelled" if control.stopped else "failed")
+
+    def aprefetch(
+        self,
+        files: FileVersions,
+        afetch: Callable[[str, str | None], Awaitable[bool]],
+    ):
+        """Async version of `prefetch`, reading ahead in tasks of the running loop."""
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            # semaphores are bound to their loop, only the current one is kept
+            semaphore = asyncio.Semaphore(self.policy.concurrency)
+            self._semaphores = {loop: semaphore}
+        for file_id, version in self._new_batch(files):
+            control = self._control()
+            task = asyncio.ensure_future(
+                self._arun(control, semaphore, afetch, file_id, version)
+            )
+            with self._lock:
+                self._jobs[file_id] = _Job(control, task)
+
+    async def _arun(
+        self,
+        control: RunControl,
+        semaphore: asyncio.Semaphore,
+        afetch: Callable[[str, str | None], Awaitable[bool]],
+        file_id: str,
+        version: str | None,
+    ):
+        async with semaphore:
+            self._count("started")
+            try:
+                with control.active():
+                    cached = await control.run(afetch(file_id, version))
+                self._count("cached" if cached else "skipped")
+            except Exception:
+                self._count("cancelled" if control.stopped else "failed")
+
+    def join(self, file_id: str):
+        """Waits for the file to be read ahead, if it is being read."""
+        with self._lock:
+            job = self._jobs.get(file_id)
+        if job is None or not isinstance(job.future, Future):
+            return
+        try:
+            job.future.result(timeout=job.control.remaining())
+        except Exception:
+            # the read downloads the file itself
+            pass
+
+    async def ajoin(self, file_id: str):
+        """Async version of `join`."""
+        with self._lock:
+            job = self._jobs.get(file_id)
+        if (
+            job is None
+            or not isinstance(job.future, asyncio.Task)
+            or job.future.get_loop() is not asyncio.get_running_loop()
+        ):
+            return
+        # waiting must not cancel the job, other reads may wait for it too
+        await asyncio.wait((job.future,), timeout=job.control.remaining())
+
+    def close(self):
+        """Stops every file being read ahead."""
+        with self._lock:
+            for job in self._jobs.values():
+                self._cancel(job, "the prefetcher was closed")
+            self._jobs = {}
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+def read_up_to(chunks: Iterator[str], max_chars: int) -> str | None:
+    """Joins a stream of text, or returns None once it is longer than `max_chars`.
+
+    The stream is closed as soon as it is too long, stopping its download.
+    """
+    parts = []
+    size = 0
+    try:
+        for chunk in chunks:
+            size += len(chunk)
+            if size > max_chars:
+                return None
+            parts.append(chunk)
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+    return "".join(parts)
+
+
+async def aread_up_to(chunks: AsyncIterator[str], max_chars: int) -> str | None:
+    """Async version of `read_up_to`."""
+    parts = []
+    size = 0
+    try:
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > max_chars:
+                return None
+            parts.append(chunk)
+    finally:
+        await chunks.aclose()
+    return "".join(parts)
@@ -0,0 +1,435 @@
+import asyncio
+import random
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+from urllib.parse import urlparse
+
+import httpx
+import requests
+from box_ai_agents_toolkit import BoxClient
+from box_sdk_gen import BoxRetryStrategy, NetworkSession
+from box_sdk_gen.networking.box_network_client import (
+    APIRequest,
+    APIResponse,
+    BoxNetworkClient,
+)
+from box_sdk_gen.networking.fetch_options import FetchOptions
+from box_sdk_gen.networking.fetch_response import FetchResponse
+from requests.adapters import HTTPAdapter
+
+from . import cancellation
+
+Response = TypeVar("Response", requests.Response, httpx.Response)
+
+# classes of Box endpoints, each with its own rate limit and circuit breaker
+ENDPOINT_CLASSES = ("search", "content", "ai", "other")
+
+# requests per second of each endpoint class, below the Box limits per user
+DEFAULT_RATES: Dict[str, float] = {
+    "search": 6.0,
+    "content": 16.0,
+    "ai": 4.0,
+    "other": 16.0,
+}
+
+
+def endpoint_class(url: str) -> str:
+    """Returns the endpoint class of a Box URL: search, content, ai or other."""
+    path = urlparse(url).path
+    if path.startswith("/oauth2/"):
+        return "other"
+    if "/ai/" in path:
+        return "ai"
+    if path.rstrip("/").endswith("/search"):
+        return "search"
+    # representations are downloaded from outside the API
+    if not path.startswith("/2.0/") or path.endswith("/content"):
+        return "content"
+    return "other"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of sending a request to an endpoint class that keeps failing."""
+
+
+class TokenBucket:
+    """Limits requests to `rate` per second, with bursts of up to `burst`.
+
+    Tokens are reserved in arrival order, so waiting callers are served first
+    come, first served instead of racing for the next token.
+    """
+
+    def __init__(self, rate: float, burst: float | None = None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Takes a token and returns the seconds to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self) -> float:
+        wait = self.reserve()
+        if wait:
+            cancellation.sleep(wait)
+        return wait
+
+    async def aacquire(self) -> float:
+        wait = self.reserve()
+        if wait:
+            await asyncio.sleep(wait)
+        return wait
+
+
+class CircuitBreaker:
+    """Stops requests after `failure_threshold` failures in a row.
+
+    After `reset_timeout` seconds one probe request is let through: the
+    circuit closes again when it succeeds, and stays open when it fails. A
+    probe stopped before its response, e.g. cancelled, lets the next request
+    probe instead.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at: float | None = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half_open"
+            return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._probing:
+                return False
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+    def release(self):
+        """Records a request that got no response, releasing the probe if any."""
+        with self._lock:
+            self._probing = False
+
+
+@dataclass
+class EndpointCounters:
+    requests: int = 0
+    retries: int = 0
+    throttled: int = 0
+    server_errors: int = 0
+    network_errors: int = 0
+    rejected: int = 0
+    wait_seconds: float = 0.0
+
+
+class HttpPolicy:
+    """Rate limits, retries and circuit breaking of the requests sent to Box.
+
+    Requests are sorted in endpoint classes (search, content, ai and other).
+    Each class has a token bucket limiting its request rate, and a circuit
+    breaker failing fast once it keeps getting server or network errors.
+    Throttled (429) and failed (5xx) requests are retried after the
+    `Retry-After` delay sent by Box, or else after an exponential backoff with
+    full jitter, so that clients throttled together do not retry together.
+
+    Args:
+        rates (Dict[str, float | None] | None): Requests per second per endpoint
+            class, merged with `DEFAULT_RATES`. None for no limit.
+        max_attempts (int): Attempts of a request, the first one included.
+        backoff_base (float): Seconds of the first backoff, doubled on every
+            attempt.
+        backoff_max (float): Maximum seconds of a backoff or Retry-After delay.
+        failure_threshold (int): Failures in a row opening a circuit.
+        reset_timeout (float): Seconds a circuit stays open before a probe.
+        pool_size (int): Keep-alive connections kept per host.
+    """
+
+    def __init__(
+        self,
+        rates: Dict[str, float | None] | None = None,
+        max_attempts: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        pool_size: int = 32,
+    ):
+        rates = {**DEFAULT_RATES, **(rates or {})}
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.pool_size = pool_size
+        self.buckets: Dict[str, TokenBucket] = {
+            name: TokenBucket(rate) for name, rate in rates.items() if rate is not None
+        }
+        self.breakers = {
+            name: CircuitBreaker(failure_threshold, reset_timeout)
+            for name in ENDPOINT_CLASSES
+        }
+        self._counters = {name: EndpointCounters() for name in ENDPOINT_CLASSES}
+        self._random = random.Random()
+        self._lock = threading.Lock()
+
+    def counters(self) -> Dict[str, Dict[str, Any]]:
+        """Returns the counters and circuit state of every endpoint class."""
+        with self._lock:
+            return {
+                name: {**asdict(counters), "circuit": self.breakers[name].state}
+                for name, counters in self._counters.items()
+            }
+
+    def _count(self, endpoint: str, **increments: float):
+        with self._lock:
+            counters = self._counters[endpoint]
+            for name, value in increments.items():
+                setattr(counters, name, getattr(counters, name) + value)
+
+    def _admit(self, url: str) -> str:
+        endpoint = endpoint_class(url)
+        if not self.breakers[endpoint].allow():
+            self._count(endpoint, rejected=1)
+            raise CircuitOpenError(
+                f"Box {endpoint} requests are failing, retry in a few seconds"
+            )
+        self._count(endpoint, requests=1)
+        return endpoint
+
+    def before_request(self, url: str) -> str:
+        """Waits for the rate limit of the request and returns its endpoint class.
+
+        Raises:
+            CircuitOpenError: When the circuit of the endpoint class is open.
+        """
+        endpoint = self._admit(url)
+        bucket = self.buckets.get(endpoint)
+        if bucket is not None:
+            try:
+                self._count(endpoint, wait_seconds=bucket.acquire())
+            except BaseException:
+                self.abort_request(endpoint)
+                raise
+        return endpoint
+
+    async def abefore_request(self, url: str) -> str:
+        """Async version of `before_request`."""
+        endpoint = self._admit(url)
+        bucket = self.buckets.get(endpoint)
+        if bucket is not None:
+            try:
+                self._count(endpoint, wait_seconds=await bucket.aacquire())
+            except BaseException:
+                self.abort_request(endpoint)
+                raise
+        return endpoint
+
+    def abort_request(self, endpoint: str):
+        """Records a request stopped before its response, e.g. cancelled.
+
+        The request tells nothing about Box, it is neither a success nor a
+        failure, but a probe of a half open circuit must make room for another.
+        """
+        self.breakers[endpoint].release()
+
+    def after_response(self, endpoint: str, status: int | None):
+        """Records a response status, None for a network error."""
+        if status is None:
+            self._count(endpoint, network_errors=1)
+            self.breakers[endpoint].record_failure()
+        elif status >= 500:
+            self._count(endpoint, server_errors=1)
+            self.breakers[endpoint].record_failure()
+        else:
+            # a throttled request reached a healthy Box
+            if status == 429:
+                self._count(endpoint, throttled=1)
+            self.breakers[endpoint].record_success()
+
+    def should_retry(self, endpoint: str, status: int | None, attempt: int) -> bool:
+        # requests of a stopped run are not retried
+        control = cancellation.current_control()
+        retry = (
+            attempt < self.max_attempts
+            and (status is None or status == 429 or status >= 500)
+            and self.breakers[endpoint].state != "open"
+            and (control is None or not control.stopped)
+        )
+        if retry:
+            self._count(endpoint, retries=1)
+        return retry
+
+    def retry_delay(self, attempt: int, retry_after: str | None = None) -> float:
+        """Seconds to wait before the next attempt of a request."""
+        if retry_after is not None:
+            try:
+                return min(self.backoff_max, max(0.0, float(retry_after)))
+            except ValueError:
+                pass
+        ceiling = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        return self._random.uniform(0, ceiling)
+
+    def send(self, url: str, send: Callable[[], Response]) -> Response:
+        """Sends a request outside the Box SDK, e.g. a download, with the policy."""
+        attempt = 1
+        while True:
+            endpoint = self.before_request(url)
+            try:
+                response = send()
+            except requests.RequestException:
+                self.after_response(endpoint, None)
+                if not self.should_retry(endpoint, None, attempt):
+                    raise
+                cancellation.sleep(self.retry_delay(attempt))
+            except BaseException:
+                self.abort_request(endpoint)
+                raise
+            else:
+                self.after_response(endpoint, response.status_code)
+                if not self.should_retry(endpoint, response.status_code, attempt):
+                    return response
+                response.close()
+                cancellation.sleep(
+                    self.retry_delay(attempt, response.headers.get("Retry-After"))
+                )
+            attempt += 1
+
+    async def asend(
+        self, url: str, send: Callable[[], Awaitable[httpx.Response]]
+    ) -> httpx.Response:
+        """Async version of `send`, for `httpx` requests."""
+        attempt = 1
+        while True:
+            endpoint = await self.abefore_request(url)
+            try:
+                response = await send()
+            except httpx.TransportError:
+                self.after_response(endpoint, None)
+                if not self.should_retry(endpoint, None, attempt):
+                    raise
+                await asyncio.sleep(self.retry_delay(attempt))
+            except BaseException:
+                self.abort_request(endpoint)
+                raise
+            else:
+                self.after_response(endpoint, response.status_code)
+                if not self.should_retry(endpoint, response.status_code, attempt):
+                    return response
+                # a streamed response holds its connection until it is closed
+                await response.aclose()
+                await asyncio.sleep(
+                    self.retry_delay(attempt, response.headers.get("Retry-After"))
+                )
+            attempt += 1
+
+    def wrap(self, client: BoxClient) -> BoxClient:
+        """Returns a client of the same user sending its requests with the policy."""
+        session = client.network_session
+        return BoxClient(
+            auth=client.auth,
+            network_session=NetworkSession(
+                network_client=PolicyNetworkClient(self),
+                retry_strategy=PolicyRetryStrategy(self),
+                additional_headers=session.additional_headers,
+                base_urls=session.base_urls,
+                proxy_url=session.proxy_url,
+            ),
+        )
+
+
+class PolicyNetworkClient(BoxNetworkClient):
+    """Box SDK network client limiting its requests with an `HttpPolicy`."""
+
+    def __init__(self, http_policy: HttpPolicy):
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=http_policy.pool_size,
+            pool_maxsize=http_policy.pool_size,
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        super().__init__(requests_session=session)
+        self.http_policy = http_policy
+
+    def _make_request(self, request: APIRequest) -> APIResponse:
+        endpoint = self.http_policy.before_request(request.url)
+        try:
+            response = super()._make_request(request)
+        except BaseException:
+            self.http_policy.abort_request(endpoint)
+            raise
+        network_response: Optional[requests.Response] = response.network_response
+        self.http_policy.after_response(
+            endpoint, None if network_response is None else network_response.status_code
+        )
+        return response
+
+
+class PolicyRetryStrategy(BoxRetryStrategy):
+    """Box SDK retry strategy following an `HttpPolicy`.
+
+    Token refreshes on a 401 and accepted (202) requests with a Retry-After
+    are handled like in the default Box strategy.
+    """
+
+    def __init__(self, http_policy: HttpPolicy):
+        super().__init__(max_attempts=http_policy.max_attempts)
+        self.http_policy = http_policy
+
+    def should_retry(
+        self,
+        fetch_options: FetchOptions,
+        fetch_response: FetchResponse,
+        attempt_number: int,
+    ) -> bool:
+        status = fetch_response.status
+        if status == 429 or status >= 500:
+            return self.http_policy.should_retry(
+                endpoint_class(fetch_options.url), status, attempt_number
+            )
+        return super().should_retry(fetch_options, fetch_response, attempt_number)
+
+    def retry_after(
+        self,
+        fetch_options: FetchOptions,
+        fetch_response: FetchResponse,
+        attempt_number: int,
+    ) -> float:
+        return self.http_policy.retry_delay(
+            attempt_number, fetch_response.headers.get("Retry-After")
+        )
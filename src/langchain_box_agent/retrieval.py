@@ -0,0 +1,395 @@
+import contextlib
+import json
+import os
+import re
+import tempfile
+import threading
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+try:
+    import numpy as np
+except ImportError as e:  # pragma: no cover
+    raise ImportError(
+        "The retrieval index requires numpy, install it with "
+        "`pip install langchain-box-agent[retrieval]`."
+    ) from e
+
+# the generation of the files changes every time the index is compacted
+VECTORS_FILE = "vectors-{}.f32"
+TEXTS_FILE = "chunks-{}.txt"
+# every update appends its change to the log, folded into the metadata file
+# when the index is compacted
+CHANGES_FILE = "changes-{}.jsonl"
+METADATA_FILE = "index.json"
+# rows copied at once when the index is compacted
+COMPACT_BATCH_ROWS = 4096
+
+
+class HashingEmbeddings(Embeddings):
+    """Embeds text by hashing its words and word pairs into a fixed size vector.
+
+    It needs no model or network access, so it works offline and out of the box,
+    but it only matches passages sharing words with the query. Pass any LangChain
+    `Embeddings` to `RetrievalIndex` for real semantic matches.
+
+    Args:
+        dimensions (int): Size of the vectors.
+    """
+
+    def __init__(self, dimensions: int = 1024):
+        self.dimensions = dimensions
+
+    def _embed(self, text: str) -> List[float]:
+        words = re.findall(r"\w+", text.lower())
+        features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for feature in features:
+            # crc32 is stable across processes, unlike hash()
+            digest = zlib.crc32(feature.encode("utf-8"))
+            sign = 1.0 if digest & 0x80000000 else -1.0
+            vector[digest % self.dimensions] += sign
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+@dataclass
+class IndexedDocument:
+    """The text of one version of a Box file, ready to be indexed."""
+
+    file_id: str
+    version: str
+    name: str
+    text: str
+
+
+@dataclass
+class Passage:
+    """A chunk of a file returned by `RetrievalIndex.search`."""
+
+    file_id: str
+    name: str
+    text: str
+    score: float
+
+
+class RetrievalIndex:
+    """Local vector index over chunks of the text of Box files.
+
+    The vectors and the texts of the chunks are appended to two files on disk,
+    memory-mapped for searches, so the index does not have to fit in memory and
+    an update only writes its new chunks, and one line of metadata. The chunks
+    of replaced or removed files are marked as deleted, and both files are
+    rewritten without them once they make up `compact_ratio` of the index. Each file is indexed with its
+    version (sha1 or etag) and only re-embedded when the version changes.
+
+    Args:
+        directory (str): Directory holding the index, created if missing.
+        embeddings (Embeddings | None): Model used to embed chunks and queries,
+            `HashingEmbeddings` when None. Changing the model of an existing
+            index requires clearing it.
+        chunk_size (int): Maximum number of characters per chunk.
+        chunk_overlap (int): Number of characters shared by consecutive chunks.
+        compact_ratio (float): Share of deleted chunks that triggers a rewrite
+            of the index.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        embeddings: Embeddings | None = None,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+        compact_ratio: float = 0.5,
+    ):
+        self.directory = directory
+        self.embeddings = embeddings if embeddings is not None else HashingEmbeddings()
+        self.compact_ratio = compact_ratio
+        self._splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size, chunk_overlap=chunk_overlap
+        )
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def __len__(self) -> int:
+        return int(self._live.sum())
+
+    def _path(self, name: str, generation: int) -> str:
+        return os.path.join(self.directory, name.format(generation))
+
+    def _load(self):
+        self._files: Dict[str, Dict[str, str]] = {}
+        # (file ID, None once deleted; offset and length of the text in bytes)
+        self._rows: List[Tuple[Optional[str], int, int]] = []
+        self._generation = 0
+        self._dimensions = 0
+        self._text_bytes = 0
+
+        metadata_path = os.path.join(self.directory, METADATA_FILE)
+        if os.path.exists(metadata_path):
+            with open(metadata_path, encoding="utf-8") as file:
+                metadata = json.load(file)
+            self._files = metadata["files"]
+            self._rows = [tuple(row) for row in metadata["rows"]]
+            self._generation = metadata["generation"]
+            self._dimensions = metadata["dimensions"]
+            self._text_bytes = metadata["text_bytes"]
+
+        changes_path = self._path(CHANGES_FILE, self._generation)
+        if os.path.exists(changes_path):
+            with open(changes_path, "rb+") as file:
+                for line in iter(file.readline, b""):
+                    try:
+                        change = json.loads(line)
+                    except ValueError:
+                        # the end of a change cut short, drop it
+                        file.truncate(file.tell() - len(line))
+                        break
+                    self._apply(change)
+        self._map()
+
+    def _map(self):
+        # new maps on every change: a search keeps using the ones it started with
+        self._vectors: Optional[np.ndarray] = None
+        self._texts: Optional[np.ndarray] = None
+        if self._rows:
+            self._vectors = np.memmap(
+                self._path(VECTORS_FILE, self._generation),
+                dtype=np.float32,
+                mode="r",
+                shape=(len(self._rows), self._dimensions),
+            )
+            self._texts = np.memmap(
+                self._path(TEXTS_FILE, self._generation),
+                dtype=np.uint8,
+                mode="r",
+                shape=(self._text_bytes,),
+            )
+        # deleted rows have no file ID
+        self._row_file_ids = np.array(
+            [file_id or "" for file_id, _, _ in self._rows], dtype=object
+        )
+        self._live = self._row_file_ids != ""
+
+    def indexed_version(self, file_id: str) -> Optional[str]:
+        """Returns the version of a file in the index, None if it is not indexed."""
+        entry = self._files.get(file_id)
+        return entry["version"] if entry else None
+
+    def update_files(self, documents: Iterable[IndexedDocument]):
+        """Indexes files, replacing the chunks of their previous versions.
+
+        The metadata of the index is saved once per call, so updating many
+        files is cheaper in a single call.
+        """
+        documents = list(documents)
+        if not documents:
+            return
+
+        texts = []
+        file_ids = []
+        for document in documents:
+            for text in self._splitter.split_text(document.text):
+                texts.append(text)
+                file_ids.append(document.file_id)
+        new_vectors = self._embed(texts)
+
+        with self._lock:
+            change = self._append(file_ids, texts, new_vectors)
+            change["files"] = {
+                document.file_id: {"version": document.version, "name": document.name}
+                for document in documents
+            }
+            change["deleted"] = list(change["files"])
+            self._commit(change)
+
+    def remove_files(self, file_ids: Iterable[str]):
+        """Removes files from the index."""
+        file_ids = list(dict.fromkeys(file_ids))
+        with self._lock:
+            self._commit(
+                {"files": dict.fromkeys(file_ids), "deleted": file_ids, "rows": []}
+            )
+
+    def clear(self):
+        """Removes every file from the index."""
+        self.remove_files(list(self._files))
+
+    def search(
+        self, query: str, top_k: int = 5, file_ids: Iterable[str] | None = None
+    ) -> List[Passage]:
+        """Finds the chunks closest to a query.
+
+        Args:
+            query (str): The text to look for.
+            top_k (int): The maximum number of passages to return.
+            file_ids (Iterable[str] | None): Restricts the search to these files.
+
+        Returns:
+            List[Passage]: The passages, best match first.
+        """
+        with self._lock:
+            vectors, texts, rows, row_file_ids, live = (
+                self._vectors,
+                self._texts,
+                self._rows,
+                self._row_file_ids,
+                self._live,
+            )
+            files = self._files
+        if vectors is None or top_k <= 0:
+            return []
+
+        query_vector = self._embed([query], embed_query=True)[0]
+        scores = vectors @ query_vector
+        mask = live
+        if file_ids is not None:
+            mask = mask & np.isin(row_file_ids, list(file_ids))
+        scores = np.where(mask, scores, -np.inf)
+        top_k = min(top_k, int(mask.sum()))
+        if top_k == 0:
+            return []
+
+        # argpartition finds the top k in linear time, only those get sorted
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[np.argsort(-scores[best])]
+        passages = []
+        for i in best:
+            file_id, offset, length = rows[i]
+            passages.append(
+                Passage(
+                    file_id=file_id,
+                    name=files[file_id]["name"],
+                    text=texts[offset : offset + length].tobytes().decode("utf-8"),
+                    score=float(scores[i]),
+                )
+            )
+        return passages
+
+    def _embed(self, texts: List[str], embed_query: bool = False) -> np.ndarray:
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        if embed_query:
+            vectors = np.asarray(
+                [self.embeddings.embed_query(text) for text in texts], dtype=np.float32
+            )
+        else:
+            vectors = np.asarray(
+                self.embeddings.embed_documents(texts), dtype=np.float32
+            )
+        # normalized vectors make the dot product a cosine similarity
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def _apply(self, change: Dict[str, Any]):
+        # new objects, searches keep the ones they started with
+        files = dict(self._files)
+        for file_id, entry in change["files"].items():
+            if entry is None:
+                files.pop(file_id, None)
+            else:
+                files[file_id] = entry
+        deleted = set(change["deleted"])
+        self._files = files
+        self._rows = [
+            (None, offset, length) if file_id in deleted else (file_id, offset, length)
+            for file_id, offset, length in self._rows
+        ] + [tuple(row) for row in change["rows"]]
+        self._dimensions = change.get("dimensions", self._dimensions)
+        self._text_bytes = change.get("text_bytes", self._text_bytes)
+
+    def _append(
+        self, file_ids: List[str], texts: List[str], vectors: np.ndarray
+    ) -> Dict[str, Any]:
+        """Writes new chunks after the others, returns the change adding them."""
+        if not texts:
+            return {"rows": []}
+        if self._rows and vectors.shape[1] != self._dimensions:
+            raise ValueError(
+                f"The embeddings have {vectors.shape[1]} dimensions and the index "
+                f"{self._dimensions}, clear the index to change the model."
+            )
+        dimensions = vectors.shape[1]
+        encoded = [text.encode("utf-8") for text in texts]
+
+        # the metadata saved last tells what was written, drop what a failed
+        # update may have appended after it
+        with open(self._path(VECTORS_FILE, self._generation), "ab") as file:
+            file.truncate(len(self._rows) * dimensions * 4)
+            file.write(vectors.astype(np.float32).tobytes())
+        with open(self._path(TEXTS_FILE, self._generation), "ab") as file:
+            file.truncate(self._text_bytes)
+            file.write(b"".join(encoded))
+
+        rows = []
+        text_bytes = self._text_bytes
+        for file_id, text in zip(file_ids, encoded):
+            rows.append((file_id, text_bytes, len(text)))
+            text_bytes += len(text)
+        return {"rows": rows, "dimensions": dimensions, "text_bytes": text_bytes}
+
+    def _commit(self, change: Dict[str, Any]):
+        self._apply(change)
+        self._map()
+        deleted = len(self._rows) - len(self)
+        if not deleted or deleted < self.compact_ratio * len(self._rows):
+            # only the change is written, after the ones before it
+            with open(
+                self._path(CHANGES_FILE, self._generation), "a", encoding="utf-8"
+            ) as file:
+                file.write(json.dumps(change) + "\n")
+            return
+
+        old_generation = self._generation
+        self._compact()
+        # write to a temporary file first so readers never see a partial index
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".json")
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "files": self._files,
+                    "rows": self._rows,
+                    "generation": self._generation,
+                    "dimensions": self._dimensions,
+                    "text_bytes": self._text_bytes,
+                },
+                file,
+            )
+        os.replace(temp_path, os.path.join(self.directory, METADATA_FILE))
+        self._map()
+        for name in (VECTORS_FILE, TEXTS_FILE, CHANGES_FILE):
+            # searches still mapping the old files keep reading them
+            with contextlib.suppress(OSError):
+                os.remove(self._path(name, old_generation))
+
+    def _compact(self):
+        """Writes the chunks left to the files of the next generation."""
+        generation = self._generation + 1
+        live = np.flatnonzero(self._live)
+        rows = []
+        text_bytes = 0
+        with (
+            open(self._path(VECTORS_FILE, generation), "wb") as vectors_file,
+            open(self._path(TEXTS_FILE, generation), "wb") as texts_file,
+        ):
+            for start in range(0, len(live), COMPACT_BATCH_ROWS):
+                batch = live[start : start + COMPACT_BATCH_ROWS]
+                vectors_file.write(np.ascontiguousarray(self._vectors[batch]).tobytes())
+                for i in batch:
+                    file_id, offset, length = self._rows[i]
+                    texts_file.write(self._texts[offset : offset + length].tobytes())
+                    rows.append((file_id, text_bytes, length))
+                    text_bytes += length
+        self._rows = rows
+        self._text_bytes = text_bytes
+        self._generation = generation
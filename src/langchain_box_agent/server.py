@@ -0,0 +1,504 @@
+import asyncio
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterator, Callable, Dict, Tuple
+
+from box_ai_agents_toolkit import BoxClient
+from langchain.tools.base import StructuredTool
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.runnables import RunnableBinding
+from langchain_core.tools import BaseTool
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.graph.graph import CompiledGraph
+
+from .box_agent import LangChainBoxAgent
+from .cancellation import RunCancelled, RunControl, TurnBudget
+
+# builds the Box client of a user: client_factory(tenant_id, user_id)
+ClientFactory = Callable[[str, str], BoxClient]
+
+# builds the agent options of a user, e.g. its caches: user_options(tenant_id, user_id)
+UserOptions = Callable[[str, str], Dict[str, Any]]
+
+# identifies the caller of a request from its headers, as (tenant_id, user_id)
+Authenticator = Callable[[Dict[str, str]], Tuple[str, str]]
+
+# agent options holding what a user can see, never shared by the agents of a pool
+USER_STATE_OPTIONS = ("tool_caches", "folder_index", "retrieval_index")
+
+# the tools of the user of a run, called by the tools of the shared graphs
+_run_tools: ContextVar[Dict[str, BaseTool]] = ContextVar("run_tools")
+
+MAX_BODY_BYTES = 1_000_000
+
+
+@dataclass
+class PoolStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    refreshes: int = 0
+    users: int = 0
+    graphs: int = 0
+
+
+@dataclass
+class _PooledAgent:
+    agent: LangChainBoxAgent
+    tools: Dict[str, BaseTool]
+    refreshed_at: float
+
+
+def _routed_tool(tool: BaseTool) -> StructuredTool:
+    """A tool with the schema of `tool`, calling the tool of the user of the run."""
+
+    def func(**kwargs):
+        return _run_tools.get()[tool.name].func(**kwargs)
+
+    async def coroutine(**kwargs):
+        return await _run_tools.get()[tool.name].coroutine(**kwargs)
+
+    return StructuredTool(
+        name=tool.name,
+        description=tool.description,
+        args_schema=tool.args_schema,
+        func=func,
+        coroutine=coroutine,
+    )
+
+
+class AgentPool:
+    """The Box clients and agents of many users, with one graph per tenant.
+
+    The client of a user is built by `client_factory(tenant_id, user_id)` on the
+    first request of the user, and kept with its agent for the next requests, up
+    to `max_users` users; the least recently used ones are evicted. Tokens older
+    than `token_ttl` seconds are refreshed before a run, instead of after a 401
+    in the middle of it.
+
+    The users of a tenant share one compiled ReAct graph, and so its caps on the
+    Box AI calls in flight, which Box rate limits per enterprise. The tools of
+    the shared graph pass every call on to the agent of the user of the run.
+    Every graph keeps its conversations in the checkpointer of the pool, so
+    they outlive the eviction of the graph or of the agent.
+
+    Caches and indexes hold what a user is allowed to see, so they are never
+    shared: `user_options(tenant_id, user_id)` builds those of each user.
+
+    Args:
+        model (BaseChatModel): The chat model of every agent.
+        client_factory (ClientFactory): Builds the Box client of a user.
+        max_users (int): Users whose client and agent are kept.
+        max_tenants (int): Tenants whose graph is kept.
+        token_ttl (float | None): Seconds after which the token of a user is
+            refreshed, None to refresh only on a 401.
+        use_internal_memory (bool): Keeps the conversations in process memory.
+        checkpointer (BaseCheckpointSaver | None): Keeps the conversations,
+            instead of `use_internal_memory`.
+        user_options (UserOptions | None): Builds the options of the agent of
+            a user, e.g. its `tool_caches`, `folder_index` or `retrieval_index`.
+        **agent_options: Options of the `LangChainBoxAgent` of every user.
+    """
+
+    def __init__(
+        self,
+        model: BaseChatModel,
+        client_factory: ClientFactory,
+        max_users: int = 1000,
+        max_tenants: int = 100,
+        token_ttl: float | None = 3000.0,
+        use_internal_memory: bool = False,
+        checkpointer: BaseCheckpointSaver | None = None,
+        user_options: UserOptions | None = None,
+        **agent_options: Any,
+    ):
+        if use_internal_memory and checkpointer is not None:
+            raise ValueError("use_internal_memory and checkpointer are exclusive")
+        for option in USER_STATE_OPTIONS:
+            if option in agent_options:
+                raise ValueError(
+                    f"{option} would be shared by every user, build it per user "
+                    "with user_options"
+                )
+        if use_internal_memory:
+            from .checkpoint import BoundedMemorySaver
+
+            checkpointer = BoundedMemorySaver()
+        self.model = model
+        self.client_factory = client_factory
+        self.max_users = max_users
+        self.max_tenants = max_tenants
+        self.token_ttl = token_ttl
+        self.checkpointer = checkpointer
+        self.user_options = user_options
+        self.agent_options = agent_options
+        self._agents: OrderedDict[Tuple[str, str], _PooledAgent] = OrderedDict()
+        self._graphs: OrderedDict[str, CompiledGraph | RunnableBinding] = OrderedDict()
+        self._stats = PoolStats()
+        self._lock = threading.Lock()
+
+    def stats(self) -> PoolStats:
+        with self._lock:
+            return PoolStats(
+                **{
+                    **asdict(self._stats),
+                    "users": len(self._agents),
+                    "graphs": len(self._graphs),
+                }
+            )
+
+    def _entry(self, tenant_id: str, user_id: str) -> _PooledAgent:
+        key = (tenant_id, user_id)
+        with self._lock:
+            entry = self._agents.get(key)
+            if entry is not None:
+                self._agents.move_to_end(key)
+                self._stats.hits += 1
+                return entry
+
+        # building the client and agent makes no request, outside of the lock
+        options = dict(self.agent_options)
+        if self.user_options is not None:
+            options.update(self.user_options(tenant_id, user_id))
+        agent = LangChainBoxAgent(
+            self.client_factory(tenant_id, user_id),
+            self.model,
+            checkpointer=self.checkpointer,
+            **options,
+        )
+        built = _PooledAgent(
+            agent, {tool.name: tool for tool in agent.tools}, time.monotonic()
+        )
+        with self._lock:
+            # a concurrent first request of the same user may have won the race
+            entry = self._agents.setdefault(key, built)
+            self._agents.move_to_end(key)
+            if entry is not built:
+                self._stats.hits += 1
+                return entry
+            self._stats.misses += 1
+            # evicted agents may still be running, their connections close with them
+            while len(self._agents) > self.max_users:
+                self._agents.popitem(last=False)
+                self._stats.evictions += 1
+            return entry
+
+    def graph(
+        self, tenant_id: str, agent: LangChainBoxAgent
+    ) -> CompiledGraph | RunnableBinding:
+        """The graph of a tenant, compiled with the options of `agent` if needed.
+
+        The options of the graph, the checkpointer of the pool included, are the
+        same for every agent of the pool.
+        """
+        with self._lock:
+            graph = self._graphs.get(tenant_id)
+            if graph is not None:
+                self._graphs.move_to_end(tenant_id)
+                return graph
+        graph = agent.build_react_agent([_routed_tool(tool) for tool in agent.tools])
+        with self._lock:
+            graph = self._graphs.setdefault(tenant_id, graph)
+            self._graphs.move_to_end(tenant_id)
+            while len(self._graphs) > self.max_tenants:
+                self._graphs.popitem(last=False)
+            return graph
+
+    async def aget(self, tenant_id: str, user_id: str) -> LangChainBoxAgent:
+        """Returns the agent of a user, with a fresh token."""
+        entry = self._entry(tenant_id, user_id)
+        if (
+            self.token_ttl is not None
+            and time.monotonic() - entry.refreshed_at > self.token_ttl
+        ):
+            # concurrent runs of the user refresh the token once
+            entry.refreshed_at = time.monotonic()
+            client = entry.agent.client
+            await asyncio.to_thread(
+                client.auth.refresh_token, network_session=client.network_session
+            )
+            with self._lock:
+                self._stats.refreshes += 1
+
+        # the tools of the shared graph run in copies of this context
+        _run_tools.set(entry.tools)
+        return entry.agent
+
+    async def astream(
+        self,
+        tenant_id: str,
+        user_id: str,
+        message: str,
+        thread_id: str,
+        control: RunControl | None = None,
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """Runs the agent of a user on a message, yielding (stream mode, chunk) pairs.
+
+        Must be iterated in a task of its own, since the tool context is set in
+        it. The updates of the graph steps come as "updates" chunks, and the
+        folder items listed by the tools as "custom" chunks. With a `control`,
+        active in the task, the run raises `RunCancelled` once it is stopped.
+        """
+        agent = await self.aget(tenant_id, user_id)
+        graph = self.graph(tenant_id, agent)
+        # conversations are kept per user, a thread id can not reach another user
+        config = {"configurable": {"thread_id": f"{tenant_id}/{user_id}/{thread_id}"}}
+        if control is not None:
+            config = control.config(config)
+        inputs = {"messages": [("user", message)]}
+        async for mode, chunk in graph.astream(
+            inputs, config, stream_mode=["updates", "custom"]
+        ):
+            yield mode, chunk
+
+    async def aclose(self):
+        """Closes the connection pools of every agent."""
+        with self._lock:
+            entries = list(self._agents.values())
+            self._agents.clear()
+            self._graphs.clear()
+        for entry in entries:
+            await entry.agent.async_client.aclose()
+
+
+def header_identity(headers: Dict[str, str]) -> Tuple[str, str]:
+    """Reads the caller from the X-Box-Tenant-Id and X-Box-User-Id headers.
+
+    The headers are trusted as they are, the server must sit behind a gateway
+    authenticating the callers and setting them.
+    """
+    tenant_id = headers.get("x-box-tenant-id")
+    user_id = headers.get("x-box-user-id")
+    if not tenant_id or not user_id:
+        raise PermissionError("X-Box-Tenant-Id and X-Box-User-Id are required")
+    return tenant_id, user_id
+
+
+def message_dict(message: BaseMessage) -> Dict[str, Any]:
+    """The fields of a message sent to the clients of the server."""
+    fields: Dict[str, Any] = {"type": message.type, "content": message.text()}
+    if isinstance(message, AIMessage) and message.tool_calls:
+        fields["tool_calls"] = [
+            {"name": call["name"], "args": call["args"]} for call in message.tool_calls
+        ]
+    if isinstance(message, ToolMessage):
+        fields["name"] = message.name
+    return fields
+
+
+def _sse(event: str, data: Any) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf-8")
+
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    401: "Unauthorized",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Content Too Large",
+}
+
+
+class AgentServer:
+    """Serves the agents of an `AgentPool` over HTTP, streaming runs as server-sent events.
+
+    `POST /v1/runs` with a JSON body `{"message": ..., "thread_id": ...}` runs
+    the agent of the caller and streams its steps: a "step" event per graph
+    step with the new messages, "tool_start" and "tool_end" events per tool
+    call, an "item" event per listed folder item, then "done" with the thread
+    id, or "error". Without a thread id, a new
+    conversation is started. `GET /healthz` returns the pool statistics.
+
+    Requests are served on one event loop, with the async tools, one request
+    per connection. Runs stop, with their Box requests in flight, when their
+    client disconnects. A run that uses up its `turn_budget` ends with a "done"
+    event giving why it `stopped`.
+
+    Args:
+        pool (AgentPool): The agents of the users.
+        host (str): The interface to listen on.
+        port (int): The port to listen on, 0 for any free port.
+        authenticate (Authenticator): Identifies the caller of a request from its
+            headers, raising PermissionError when it can not.
+        turn_budget (TurnBudget | None): Limits of every run, None for none.
+    """
+
+    def __init__(
+        self,
+        pool: AgentPool,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        authenticate: Authenticator = header_identity,
+        turn_budget: TurnBudget | None = None,
+    ):
+        self.pool = pool
+        self.host = host
+        self.port = port
+        self.authenticate = authenticate
+        self.turn_budget = turn_budget
+        self._server: asyncio.Server | None = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> "AgentServer":
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        await self.pool.aclose()
+
+    def run(self):
+        """Serves until interrupted."""
+        try:
+            asyncio.run(self.serve_forever())
+        except KeyboardInterrupt:
+            pass
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            await self._serve(reader, writer)
+        except (
+            ConnectionError,
+            asyncio.IncompleteReadError,
+            asyncio.LimitOverrunError,
+        ):
+            # the client went away, its run is dropped with the task
+            pass
+        finally:
+            writer.close()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        head = await reader.readuntil(b"\r\n\r\n")
+        request_line, *header_lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, _ = request_line.split(" ", 2)
+        except ValueError:
+            return await self._respond(writer, 400, {"error": "Bad request line"})
+        headers = {}
+        for line in header_lines:
+            name, _, value = line.partition(":")
+            if name:
+                headers[name.strip().lower()] = value.strip()
+        path = target.split("?", 1)[0]
+
+        if path == "/healthz":
+            return await self._respond(writer, 200, asdict(self.pool.stats()))
+        if path != "/v1/runs":
+            return await self._respond(writer, 404, {"error": "Not found"})
+        if method != "POST":
+            return await self._respond(writer, 405, {"error": "Use POST"})
+        try:
+            tenant_id, user_id = self.authenticate(headers)
+        except PermissionError as error:
+            return await self._respond(writer, 401, {"error": str(error)})
+
+        try:
+            length = int(headers.get("content-length", "0"))
+            if length < 0:
+                raise ValueError("negative Content-Length")
+            if length > MAX_BODY_BYTES:
+                return await self._respond(writer, 413, {"error": "Body too large"})
+            body = json.loads(await reader.readexactly(length))
+            message = body["message"]
+        except (ValueError, KeyError, TypeError):
+            return await self._respond(
+                writer, 400, {"error": 'The body must be {"message": ...}'}
+            )
+        thread_id = body.get("thread_id") or uuid.uuid4().hex
+
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+            b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n"
+        )
+        control = RunControl(self.turn_budget)
+
+        def on_read(read: asyncio.Future):
+            # the client sends nothing more, the end of its stream is a disconnect
+            if not read.cancelled() and (
+                read.exception() is not None or read.result() == b""
+            ):
+                control.cancel("the client disconnected")
+
+        read = asyncio.ensure_future(reader.read(1))
+        read.add_done_callback(on_read)
+        try:
+            with control.active():
+                await self._stream_run(
+                    writer, tenant_id, user_id, message, thread_id, control
+                )
+        finally:
+            read.cancel()
+
+    async def _stream_run(
+        self,
+        writer: asyncio.StreamWriter,
+        tenant_id: str,
+        user_id: str,
+        message: str,
+        thread_id: str,
+        control: RunControl,
+    ):
+        try:
+            async for mode, chunk in self.pool.astream(
+                tenant_id, user_id, message, thread_id, control
+            ):
+                if mode == "custom" and "folder_item" in chunk:
+                    writer.write(_sse("item", chunk))
+                elif mode == "custom":
+                    # the start or the end of a tool call
+                    ((event, data),) = chunk.items()
+                    writer.write(_sse(event, data))
+                else:
+                    for node, update in chunk.items():
+                        messages = (update or {}).get("messages", [])
+                        writer.write(
+                            _sse(
+                                "step",
+                                {
+                                    "node": node,
+                                    "messages": [message_dict(m) for m in messages],
+                                },
+                            )
+                        )
+                # a slow client slows down its run instead of filling the memory
+                await writer.drain()
+        except ConnectionError:
+            raise
+        except RunCancelled as error:
+            writer.write(
+                _sse("done", {"thread_id": thread_id, "stopped": error.reason})
+            )
+        except Exception as error:
+            writer.write(_sse("error", {"message": f"{type(error).__name__}: {error}"}))
+        else:
+            writer.write(_sse("done", {"thread_id": thread_id}))
+        await writer.drain()
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, body: Dict):
+        payload = json.dumps(body).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n"
+            "Connection: close\r\n\r\n".encode("latin-1")
+            + payload
+        )
+        await writer.drain()
@@ -0,0 +1,151 @@
+import contextlib
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, ContextManager, Dict, Iterator, Tuple, Union
+
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.runnables import Runnable, RunnableConfig
+
+from .cancellation import RunCancelled, RunControl
+
+
+@dataclass
+class TokenEvent:
+    """Text of the answer of the model, as it is generated."""
+
+    text: str
+
+
+@dataclass
+class ToolStartEvent:
+    """A tool call starts."""
+
+    id: str
+    name: str
+    args: Dict[str, Any]
+
+
+@dataclass
+class ToolEndEvent:
+    """A tool call ended, "success" or "error", after `seconds`."""
+
+    id: str
+    name: str
+    seconds: float
+    status: str
+
+
+@dataclass
+class FinalEvent:
+    """The run ended, with the text of the last answer of the model.
+
+    `stopped` is why the run was stopped before its end, None when it was not.
+    """
+
+    text: str
+    stopped: str | None = None
+
+
+AgentEvent = Union[TokenEvent, ToolStartEvent, ToolEndEvent, FinalEvent]
+
+STREAM_MODES = ["messages", "custom"]
+
+
+class _EventReader:
+    """Turns the "messages" and "custom" chunks of a graph run into agent events.
+
+    Only message deltas go through the stream, the state of the graph is never
+    copied. Models that do not stream send each answer as one token.
+    """
+
+    def __init__(self):
+        self.answer_id: str | None = None
+        self.answer = ""
+
+    def events(self, mode: str, chunk: Any) -> Iterator[AgentEvent]:
+        if mode == "custom":
+            if "tool_start" in chunk:
+                yield ToolStartEvent(**chunk["tool_start"])
+            elif "tool_end" in chunk:
+                yield ToolEndEvent(**chunk["tool_end"])
+            return
+
+        message: BaseMessage = chunk[0]
+        if not isinstance(message, (AIMessage, AIMessageChunk)):
+            return
+        text = message.text()
+        # a new answer of the model, the previous one led to tool calls
+        if message.id != self.answer_id or not isinstance(message, AIMessageChunk):
+            self.answer_id = message.id
+            self.answer = ""
+        if text:
+            self.answer += text
+            yield TokenEvent(text)
+
+    def final(self, stopped: str | None = None) -> FinalEvent:
+        return FinalEvent(self.answer, stopped)
+
+
+def _active(control: RunControl | None) -> ContextManager[Any]:
+    return control.active() if control is not None else contextlib.nullcontext()
+
+
+def stream_events(
+    graph: Runnable,
+    inputs: Any,
+    config: RunnableConfig | None = None,
+    control: RunControl | None = None,
+) -> Iterator[AgentEvent]:
+    """Runs a ReAct graph, yielding tokens, tool starts and ends, then the final answer.
+
+    With a `control`, the run can be cancelled and ends with its turn budget;
+    a stopped run ends with a final event giving why.
+    """
+    reader = _EventReader()
+    if control is not None:
+        config = control.config(config)
+    chunks: Iterator[Tuple[str, Any]] = graph.stream(
+        inputs, config, stream_mode=STREAM_MODES
+    )
+    # the control is active while the graph runs, not while the events are used
+    try:
+        while True:
+            with _active(control):
+                chunk = next(chunks, None)
+            if chunk is None:
+                break
+            yield from reader.events(*chunk)
+    except RunCancelled as error:
+        yield reader.final(error.reason)
+        return
+    finally:
+        with _active(control):
+            chunks.close()
+    yield reader.final()
+
+
+async def astream_events(
+    graph: Runnable,
+    inputs: Any,
+    config: RunnableConfig | None = None,
+    control: RunControl | None = None,
+) -> AsyncIterator[AgentEvent]:
+    """Async version of `stream_events`."""
+    reader = _EventReader()
+    if control is not None:
+        config = control.config(config)
+    chunks = aiter(graph.astream(inputs, config, stream_mode=STREAM_MODES))
+    try:
+        while True:
+            with _active(control):
+                chunk = await anext(chunks, None)
+            if chunk is None:
+                break
+            for event in reader.events(*chunk):
+                yield event
+    except RunCancelled as error:
+        yield reader.final(error.reason)
+        return
+    finally:
+        with _active(control):
+            await chunks.aclose()
+    yield reader.final()
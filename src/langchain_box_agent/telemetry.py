@@ -0,0 +1,649 @@
+import contextvars
+import logging
+import os
+import queue
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterator, List, Optional, Protocol, Tuple
+from urllib.parse import urlparse
+from uuid import UUID
+
+import requests
+from box_ai_agents_toolkit import BoxClient
+from box_sdk_gen import NetworkSession
+from box_sdk_gen.networking.fetch_options import FetchOptions
+from box_sdk_gen.networking.fetch_response import FetchResponse
+from box_sdk_gen.networking.network_client import NetworkClient
+from box_sdk_gen.networking.retries import RetryStrategy
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+logger = logging.getLogger(__name__)
+
+# span of the code running in the current context, if any
+_current_span: contextvars.ContextVar["Span | None"] = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+# upper bounds of the histogram buckets, Prometheus style
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# guards the counts of the spans: the children of a span, e.g. parallel tool
+# calls, may add to them from several threads
+_counts_lock = threading.Lock()
+
+
+@dataclass
+class Span:
+    """A timed operation, e.g. a tool call, a Box request or a ReAct step.
+
+    `counts` holds the events counted while the span was current, such as
+    cache hits and retries, with `count_in_span`.
+    """
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None = None
+    start_time: int = 0
+    end_time: int = 0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    counts: Dict[str, int] = field(default_factory=dict)
+    error: str | None = None
+
+    @property
+    def seconds(self) -> float:
+        return (self.end_time - self.start_time) / 1e9
+
+
+def count_in_span(name: str, value: int = 1):
+    """Counts an event, e.g. a cache hit, in the current span.
+
+    The counts of a span are added to those of its parent when it ends.
+    """
+    span = _current_span.get()
+    if span is not None:
+        _add_count(span, name, value)
+
+
+def _add_count(span: Span, name: str, value: int):
+    with _counts_lock:
+        span.counts[name] = span.counts.get(name, 0) + value
+
+
+class Exporter(Protocol):
+    """Receives the spans of a `Telemetry` as they end.
+
+    `export` is called in the code ending the span, e.g. a tool call: it must
+    return quickly, sending spans over the network in the background.
+    """
+
+    def export(self, spans: List[Span]): ...
+
+
+class Histogram:
+    """Counts of observed values per bucket, with their sum, per label set."""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.series: Dict[Labels, Tuple[List[int], float]] = {}
+
+    def observe(self, value: float, labels: Labels):
+        counts, total = self.series.get(labels, ([0] * (len(self.buckets) + 1), 0.0))
+        counts[bisect_left(self.buckets, value)] += 1
+        self.series[labels] = (counts, total + value)
+
+    def count(self, **labels: str) -> int:
+        counts, _ = self.series.get(_labels(labels), ([], 0.0))
+        return sum(counts)
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+class Telemetry:
+    """Spans and metrics of the tool calls, Box requests and ReAct steps of an agent.
+
+    Spans nest through the context, so the Box requests of a tool call are
+    its children, even when the call runs requests in worker threads. Every
+    span ends in a duration histogram, and each exporter receives it: see
+    `InMemoryExporter` and `OtlpExporter`. Metrics are read with `histogram`,
+    `counter` or `prometheus_text`.
+
+    Args:
+        exporters (List[Exporter] | None): Exporters receiving every span.
+    """
+
+    def __init__(self, exporters: List[Exporter] | None = None):
+        self.exporters = list(exporters or [])
+        self.histograms: Dict[str, Histogram] = {}
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        # spans of callback runs, the ReAct steps and LLM calls, by run id
+        self._runs: Dict[UUID, Span | None] = {}
+        self._lock = threading.Lock()
+
+    def observe(
+        self,
+        name: str,
+        value: float,
+        buckets: Tuple[float, ...] = SECONDS_BUCKETS,
+        **labels: Any,
+    ):
+        with self._lock:
+            histogram = self.histograms.setdefault(name, Histogram(buckets))
+            histogram.observe(value, _labels(labels))
+
+    def increment(self, name: str, value: float = 1, **labels: Any):
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            key = _labels(labels)
+            series[key] = series.get(key, 0) + value
+
+    def histogram(self, name: str) -> Histogram | None:
+        return self.histograms.get(name)
+
+    def counter(self, name: str, **labels: Any) -> float:
+        with self._lock:
+            return self.counters.get(name, {}).get(_labels(labels), 0)
+
+    def start_span(
+        self, name: str, parent: Span | None = None, **attributes: Any
+    ) -> Span:
+        """Starts a span, child of `parent` or of the current span."""
+        parent = parent if parent is not None else _current_span.get()
+        return Span(
+            name=name,
+            trace_id=parent.trace_id if parent is not None else os.urandom(16).hex(),
+            span_id=os.urandom(8).hex(),
+            parent_id=parent.span_id if parent is not None else None,
+            start_time=time.time_ns(),
+            attributes=attributes,
+        )
+
+    def end_span(self, span: Span, metric: str | None = None, **labels: Any):
+        """Ends a span, observing its duration in the `metric` histogram."""
+        span.end_time = time.time_ns()
+        if metric is not None:
+            self.observe(metric, span.seconds, **labels)
+        for exporter in self.exporters:
+            # a failing exporter loses its spans, never the operation traced
+            try:
+                exporter.export([span])
+            except Exception:
+                logger.warning("%r failed to export a span", exporter, exc_info=True)
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        metric: str | None = None,
+        labels: Dict[str, Any] | None = None,
+        run_id: UUID | None = None,
+        counters: bool = False,
+        **attributes: Any,
+    ) -> Iterator[Span]:
+        """Runs the body in a span, the current span of its context.
+
+        Args:
+            name (str): Name of the span.
+            metric (str | None): Histogram observing the duration of the span.
+            labels (Dict[str, Any] | None): Labels of the metrics.
+            run_id (UUID | None): Callback run the span belongs to, when it is
+                not run from the context of its parent.
+            counters (bool): Whether the counts of the span, those of its
+                children included, are added to the `box_agent_<count>_total`
+                counters with the labels of the span.
+            **attributes: Attributes of the span.
+        """
+        parent = _current_span.get()
+        if parent is None and run_id is not None:
+            parent = self._runs.get(run_id)
+        span = self.start_span(name, parent, **attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as error:
+            span.error = repr(error)
+            raise
+        finally:
+            _current_span.reset(token)
+            labels = labels or {}
+            with _counts_lock:
+                counts = dict(span.counts)
+                if parent is not None:
+                    for count, value in counts.items():
+                        parent.counts[count] = parent.counts.get(count, 0) + value
+            if counters:
+                for count, value in counts.items():
+                    self.increment(f"box_agent_{count}_total", value, **labels)
+            if span.error is not None:
+                self.increment(f"{metric or name}_errors_total", **labels)
+            self.end_span(span, metric, **labels)
+
+    def callback_handler(self) -> "TelemetryCallbackHandler":
+        """A LangChain callback handler tracing ReAct runs, steps and LLM calls."""
+        return TelemetryCallbackHandler(self)
+
+    def instrument(self, client: BoxClient) -> BoxClient:
+        """Returns a client of the same user tracing its Box requests."""
+        session = client.network_session
+        return BoxClient(
+            auth=client.auth,
+            network_session=NetworkSession(
+                network_client=TracingNetworkClient(session.network_client, self),
+                retry_strategy=TracingRetryStrategy(session.retry_strategy),
+                additional_headers=session.additional_headers,
+                base_urls=session.base_urls,
+                proxy_url=session.proxy_url,
+            ),
+        )
+
+    def prometheus_text(self) -> str:
+        """Renders the metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self.counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{name}{_format_labels(labels)} {value:g}")
+            for name, histogram in sorted(self.histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for labels, (counts, total) in sorted(histogram.series.items()):
+                    cumulative = 0
+                    bounds = [*map(str, histogram.buckets), "+Inf"]
+                    for bound, count in zip(bounds, counts):
+                        cumulative += count
+                        bucket_labels = _format_labels(labels + (("le", bound),))
+                        lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {total:g}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (key, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in labels
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+def request_route(url: str) -> str:
+    """Path of a Box URL with its IDs replaced, e.g. /2.0/files/{id}/content."""
+    parts = urlparse(url).path.split("/")
+    return "/".join("{id}" if part.isdigit() else part for part in parts)
+
+
+class TracingNetworkClient(NetworkClient):
+    """Box SDK network client tracing the requests of another one."""
+
+    def __init__(self, network_client: NetworkClient, telemetry: Telemetry):
+        super().__init__()
+        self.network_client = network_client
+        self.telemetry = telemetry
+
+    def __getattr__(self, name: str) -> Any:
+        # e.g. the requests session and HTTP policy of the traced client
+        return getattr(self.__dict__["network_client"], name)
+
+    def fetch(self, options: FetchOptions) -> FetchResponse:
+        route = request_route(options.url)
+        with self.telemetry.span(
+            f"{options.method} {route}",
+            metric="box_agent_box_request_seconds",
+            labels={"method": options.method, "route": route},
+            kind="client",
+        ) as span:
+            response = self.network_client.fetch(options)
+            span.attributes["http.status_code"] = response.status
+            return response
+
+
+class TracingRetryStrategy(RetryStrategy):
+    """Box SDK retry strategy counting the retries of another one."""
+
+    def __init__(self, retry_strategy: RetryStrategy):
+        super().__init__()
+        self.retry_strategy = retry_strategy
+
+    def should_retry(
+        self,
+        fetch_options: FetchOptions,
+        fetch_response: FetchResponse,
+        attempt_number: int,
+    ) -> bool:
+        retry = self.retry_strategy.should_retry(
+            fetch_options, fetch_response, attempt_number
+        )
+        if retry:
+            count_in_span("retries")
+        return retry
+
+    def retry_after(
+        self,
+        fetch_options: FetchOptions,
+        fetch_response: FetchResponse,
+        attempt_number: int,
+    ) -> float:
+        return self.retry_strategy.retry_after(
+            fetch_options, fetch_response, attempt_number
+        )
+
+
+class TelemetryCallbackHandler(BaseCallbackHandler):
+    """Traces ReAct runs, their steps (graph nodes) and LLM calls.
+
+    Tool calls are traced by the agent itself; tool runs are only recorded so
+    that the spans of the tools nest under the step running them.
+    """
+
+    # the handler only updates dicts, running it in an executor costs more
+    run_inline = True
+
+    def __init__(self, telemetry: Telemetry):
+        self.telemetry = telemetry
+        # runs that started a span, with the metric and labels of the span
+        self._owned: Dict[UUID, Tuple[str, Dict[str, Any]]] = {}
+
+    def _start(
+        self,
+        run_id: UUID,
+        parent_run_id: UUID | None,
+        name: str,
+        metric: str,
+        labels: Dict[str, Any],
+        **attributes: Any,
+    ):
+        parent = self.telemetry._runs.get(parent_run_id) if parent_run_id else None
+        self.telemetry._runs[run_id] = self.telemetry.start_span(
+            name, parent, **labels, **attributes
+        )
+        self._owned[run_id] = (metric, labels)
+
+    def _end(self, run_id: UUID, error: BaseException | None = None) -> Span | None:
+        span = self.telemetry._runs.pop(run_id, None)
+        owned = self._owned.pop(run_id, None)
+        if span is None or owned is None:
+            return None
+        metric, labels = owned
+        if error is not None:
+            span.error = repr(error)
+            self.telemetry.increment(f"{metric}_errors_total", **labels)
+        self.telemetry.end_span(span, metric, **labels)
+        return span
+
+    def _inherit(self, run_id: UUID, parent_run_id: UUID | None):
+        # nested runnables, e.g. the tools of a step, belong to the parent span
+        self.telemetry._runs[run_id] = self.telemetry._runs.get(parent_run_id)
+
+    def on_chain_start(
+        self,
+        serialized: Dict[str, Any],
+        inputs: Dict[str, Any],
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        metadata: Dict[str, Any] | None = None,
+        **kwargs: Any,
+    ):
+        metadata = metadata or {}
+        node = metadata.get("langgraph_node")
+        parent = self._owned.get(parent_run_id) if parent_run_id else None
+        if parent_run_id is None:
+            self._start(run_id, None, "react run", "box_agent_react_run_seconds", {})
+        elif node is not None and parent == ("box_agent_react_run_seconds", {}):
+            self._start(
+                run_id,
+                parent_run_id,
+                f"react step {node}",
+                "box_agent_react_step_seconds",
+                {"node": node},
+                step=metadata.get("langgraph_step"),
+            )
+        else:
+            self._inherit(run_id, parent_run_id)
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any):
+        if self._end(run_id) is None:
+            self.telemetry._runs.pop(run_id, None)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        if self._end(run_id, error) is None:
+            self.telemetry._runs.pop(run_id, None)
+
+    def on_chat_model_start(
+        self,
+        serialized: Dict[str, Any],
+        messages: List[Any],
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        **kwargs: Any,
+    ):
+        model = (serialized or {}).get("name") or "model"
+        self._start(
+            run_id,
+            parent_run_id,
+            f"llm {model}",
+            "box_agent_llm_seconds",
+            {"model": model},
+        )
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any):
+        span = self.telemetry._runs.get(run_id)
+        if span is not None:
+            for generations in response.generations:
+                for generation in generations:
+                    message = getattr(generation, "message", None)
+                    usage = getattr(message, "usage_metadata", None) or {}
+                    for kind in ("input_tokens", "output_tokens"):
+                        if usage.get(kind):
+                            _add_count(span, kind, usage[kind])
+                            self.telemetry.increment(
+                                "box_agent_llm_tokens_total",
+                                usage[kind],
+                                model=span.attributes["model"],
+                                kind=kind,
+                            )
+        self._end(run_id)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._end(run_id, error)
+
+    def on_tool_start(
+        self,
+        serialized: Dict[str, Any],
+        input_str: str,
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        **kwargs: Any,
+    ):
+        self._inherit(run_id, parent_run_id)
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any):
+        self.telemetry._runs.pop(run_id, None)
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self.telemetry._runs.pop(run_id, None)
+
+
+class InMemoryExporter:
+    """Keeps the latest `max_spans` spans, e.g. for tests or a debug endpoint."""
+
+    def __init__(self, max_spans: int = 10_000):
+        self._spans: Deque[Span] = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]):
+        with self._lock:
+            self._spans.extend(spans)
+
+    @property
+    def spans(self) -> List[Span]:
+        with self._lock:
+            return list(self._spans)
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OtlpExporter:
+    """Sends spans to an OpenTelemetry collector with OTLP over HTTP (JSON).
+
+    Spans are sent in batches of `batch_size` by a background thread, so a slow
+    or unreachable collector never slows down the traced code: failed batches
+    are logged and dropped, and so are batches beyond `max_queued` waiting to
+    be sent. Call `flush` to send the rest, e.g. on shutdown.
+
+    Args:
+        endpoint (str): URL of the collector traces endpoint, e.g.
+            "http://localhost:4318/v1/traces".
+        headers (Dict[str, str] | None): Headers of the requests, e.g. an API key.
+        batch_size (int): Number of spans sent per request.
+        service_name (str): Service name of the spans.
+        timeout (float): Seconds to wait for the collector.
+        max_queued (int): Batches waiting to be sent, newer ones are dropped.
+    """
+
+    def __init__(
+        self,
+        endpoint: str = "http://localhost:4318/v1/traces",
+        headers: Dict[str, str] | None = None,
+        batch_size: int = 100,
+        service_name: str = "langchain-box-agent",
+        timeout: float = 10.0,
+        max_queued: int = 100,
+    ):
+        self.endpoint = endpoint
+        self.headers = {"Content-Type": "application/json", **(headers or {})}
+        self.batch_size = batch_size
+        self.service_name = service_name
+        self.timeout = timeout
+        # spans lost to a full queue or a failed request
+        self.dropped = 0
+        self._pending: List[Span] = []
+        self._queue: queue.Queue[List[Span]] = queue.Queue(maxsize=max_queued)
+        self._sender: threading.Thread | None = None
+        self._session = requests.Session()
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]):
+        with self._lock:
+            self._pending.extend(spans)
+            if len(self._pending) < self.batch_size:
+                return
+            batch, self._pending = self._pending, []
+        self._enqueue(batch)
+
+    def flush(self):
+        """Sends the pending spans, and waits for every batch to be sent."""
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if batch:
+            self._enqueue(batch)
+        self._queue.join()
+
+    def _enqueue(self, batch: List[Span]):
+        with self._lock:
+            if self._sender is None:
+                self._sender = threading.Thread(
+                    target=self._send_batches, name="otlp-exporter", daemon=True
+                )
+                self._sender.start()
+        try:
+            self._queue.put_nowait(batch)
+        except queue.Full:
+            self._drop(batch, "the export queue is full")
+
+    def _send_batches(self):
+        while True:
+            batch = self._queue.get()
+            try:
+                self._send(batch)
+            except Exception as error:
+                self._drop(batch, repr(error))
+            finally:
+                self._queue.task_done()
+
+    def _drop(self, batch: List[Span], reason: str):
+        with self._lock:
+            self.dropped += len(batch)
+        logger.warning("Dropped %d spans for %s: %s", len(batch), self.endpoint, reason)
+
+    def payload(self, spans: List[Span]) -> Dict[str, Any]:
+        """The OTLP JSON request body of `spans`."""
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {
+                                "key": "service.name",
+                                "value": _otlp_value(self.service_name),
+                            }
+                        ]
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "langchain_box_agent"},
+                            "spans": [self._span(span) for span in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+
+    @staticmethod
+    def _span(span: Span) -> Dict[str, Any]:
+        attributes = {**span.attributes, **span.counts}
+        body: Dict[str, Any] = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            # 3 is a client span, 1 an internal one
+            "kind": 3 if attributes.pop("kind", None) == "client" else 1,
+            "startTimeUnixNano": str(span.start_time),
+            "endTimeUnixNano": str(span.end_time),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)}
+                for key, value in attributes.items()
+                if value is not None
+            ],
+            "status": (
+                {"code": 2, "message": span.error} if span.error else {"code": 1}
+            ),
+        }
+        if span.parent_id is not None:
+            body["parentSpanId"] = span.parent_id
+        return body
+
+    def _send(self, spans: List[Span]):
+        response: Optional[requests.Response] = self._session.post(
+            self.endpoint,
+            json=self.payload(spans),
+            headers=self.headers,
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
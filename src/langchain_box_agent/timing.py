@@ -0,0 +1,112 @@
+import contextvars
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Iterator, List
+
+# timing of the tool call running in the current context, if any
+_current_call: contextvars.ContextVar["CallTiming | None"] = contextvars.ContextVar(
+    "current_tool_call", default=None
+)
+
+
+@dataclass
+class CallTiming:
+    """Timing of one tool call.
+
+    `box_ai_seconds` is the time during which at least one Box AI request of
+    the call was in flight, so requests run in parallel are counted once.
+    """
+
+    tool_name: str
+    seconds: float = 0.0
+    box_ai_seconds: float = 0.0
+    box_ai_requests: int = 0
+    _in_flight: int = field(default=0, repr=False, compare=False)
+    _in_flight_since: float = field(default=0.0, repr=False, compare=False)
+
+    @property
+    def local_seconds(self) -> float:
+        return max(0.0, self.seconds - self.box_ai_seconds)
+
+
+@dataclass
+class TimingStats:
+    calls: int = 0
+    seconds: float = 0.0
+    box_ai_seconds: float = 0.0
+    box_ai_requests: int = 0
+
+    @property
+    def local_seconds(self) -> float:
+        return max(0.0, self.seconds - self.box_ai_seconds)
+
+
+class ToolTimings:
+    """Times the tool calls of an agent, and the Box AI round trips within them.
+
+    Args:
+        max_recent (int): Number of recent calls kept in `recent`.
+    """
+
+    def __init__(self, max_recent: int = 1000):
+        self._recent: Deque[CallTiming] = deque(maxlen=max_recent)
+        self._stats: Dict[str, TimingStats] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def call(self, tool_name: str) -> Iterator[CallTiming]:
+        """Times a tool call; Box AI requests made within it are attributed to it."""
+        timing = CallTiming(tool_name)
+        token = _current_call.set(timing)
+        start = time.perf_counter()
+        try:
+            yield timing
+        finally:
+            timing.seconds = time.perf_counter() - start
+            _current_call.reset(token)
+            with self._lock:
+                self._recent.append(timing)
+                stats = self._stats.setdefault(tool_name, TimingStats())
+                stats.calls += 1
+                stats.seconds += timing.seconds
+                stats.box_ai_seconds += timing.box_ai_seconds
+                stats.box_ai_requests += timing.box_ai_requests
+
+    @contextmanager
+    def box_ai_request(self) -> Iterator[None]:
+        """Times a Box AI request of the current tool call."""
+        timing = _current_call.get()
+        if timing is None:
+            yield
+            return
+        with self._lock:
+            if timing._in_flight == 0:
+                timing._in_flight_since = time.perf_counter()
+            timing._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                timing._in_flight -= 1
+                timing.box_ai_requests += 1
+                if timing._in_flight == 0:
+                    timing.box_ai_seconds += (
+                        time.perf_counter() - timing._in_flight_since
+                    )
+
+    @property
+    def recent(self) -> List[CallTiming]:
+        """The most recent tool calls, oldest first."""
+        with self._lock:
+            return list(self._recent)
+
+    def stats(self) -> Dict[str, TimingStats]:
+        """Totals per tool name since the agent was created."""
+        with self._lock:
+            return {
+                tool_name: TimingStats(**vars(stats))
+                for tool_name, stats in self._stats.items()
+            }
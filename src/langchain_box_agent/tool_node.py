@@ -0,0 +1,190 @@
+import asyncio
+import contextlib
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, List, Literal, Optional, Sequence, Union
+
+from langchain_core.messages import AnyMessage, ToolCall, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables.config import ContextThreadPoolExecutor, get_config_list
+from langchain_core.tools import BaseTool
+from langgraph.config import get_stream_writer
+from langgraph.prebuilt import ToolNode
+from langgraph.store.base import BaseStore
+from pydantic import BaseModel
+
+# Box AI endpoints are rate limited per enterprise, keep their fan out modest
+DEFAULT_TOOL_CONCURRENCY: Dict[str, int] = {
+    "box_ask_ai_tool": 4,
+    "box_ai_extract_data": 4,
+    # these fan out to several Box AI requests on their own
+    "box_ai_extract_data_batch": 1,
+    "box_ask_ai_multi_file_tool": 1,
+}
+
+
+class BoxToolNode(ToolNode):
+    """Tool node that runs the tool calls of a turn in parallel, with bounds.
+
+    All tool calls emitted in one model turn are fanned out at once, up to
+    `max_concurrency` calls in flight. `tool_concurrency` additionally caps the
+    calls in flight per tool name, so rate limited tools (e.g. Box AI) can be
+    throttled without slowing down the others: a call waits for its tool first,
+    and only then takes one of the `max_concurrency` slots. It is merged into
+    `DEFAULT_TOOL_CONCURRENCY`, with None for a tool that is not capped. Results
+    are returned in the order of the tool calls.
+
+    With `stream_mode="custom"`, every call is streamed as a `{"tool_start": ...}`
+    chunk with its id, name and args when it starts, and a `{"tool_end": ...}`
+    chunk with its id, name, seconds and status when it ends.
+    """
+
+    def __init__(
+        self,
+        tools: Sequence[BaseTool],
+        *,
+        max_concurrency: int = 10,
+        tool_concurrency: Optional[Dict[str, Optional[int]]] = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(tools, **kwargs)
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.max_concurrency = max_concurrency
+        self.tool_concurrency: Dict[str, int] = {
+            name: limit
+            for name, limit in {
+                **DEFAULT_TOOL_CONCURRENCY,
+                **(tool_concurrency or {}),
+            }.items()
+            if limit is not None
+        }
+        self._tool_locks = {
+            name: threading.BoundedSemaphore(limit)
+            for name, limit in self.tool_concurrency.items()
+        }
+        # asyncio semaphores are bound to the loop that first waits on them
+        self._async_tool_locks: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]
+        ] = weakref.WeakKeyDictionary()
+
+    def _func(
+        self,
+        input: Union[List[AnyMessage], Dict[str, Any], BaseModel],
+        config: RunnableConfig,
+        *,
+        store: Optional[BaseStore],
+    ) -> Any:
+        tool_calls, input_type = self._parse_input(input, store)
+        config_list = get_config_list(config, len(tool_calls))
+        input_types = [input_type] * len(tool_calls)
+        # the same slots for every call, one thread per call: the calls waiting
+        # for their tool hold no slot
+        slots = [threading.BoundedSemaphore(self.max_concurrency)] * len(tool_calls)
+        max_workers = max(1, len(tool_calls))
+        with ContextThreadPoolExecutor(max_workers=max_workers) as executor:
+            outputs = [
+                *executor.map(
+                    self._run_one, tool_calls, input_types, config_list, slots
+                )
+            ]
+
+        return self._combine_tool_outputs(outputs, input_type)
+
+    async def _afunc(
+        self,
+        input: Union[List[AnyMessage], Dict[str, Any], BaseModel],
+        config: RunnableConfig,
+        *,
+        store: Optional[BaseStore],
+    ) -> Any:
+        tool_calls, input_type = self._parse_input(input, store)
+        slots = asyncio.Semaphore(self.max_concurrency)
+        outputs = await asyncio.gather(
+            *(self._arun_one(call, input_type, config, slots) for call in tool_calls)
+        )
+
+        return self._combine_tool_outputs(outputs, input_type)
+
+    def _run_one(
+        self,
+        call: ToolCall,
+        input_type: Literal["list", "dict", "tool_calls"],
+        config: RunnableConfig,
+        slots: threading.BoundedSemaphore,
+    ) -> ToolMessage:
+        lock = self._tool_locks.get(call["name"])
+        with lock or contextlib.nullcontext(), slots:
+            return self._run_streamed(call, input_type, config)
+
+    def _run_streamed(
+        self,
+        call: ToolCall,
+        input_type: Literal["list", "dict", "tool_calls"],
+        config: RunnableConfig,
+    ) -> ToolMessage:
+        writer = _stream_writer()
+        writer(_tool_start(call))
+        start = time.perf_counter()
+        output = super()._run_one(call, input_type, config)
+        writer(_tool_end(call, output, time.perf_counter() - start))
+        return output
+
+    async def _arun_one(
+        self,
+        call: ToolCall,
+        input_type: Literal["list", "dict", "tool_calls"],
+        config: RunnableConfig,
+        slots: asyncio.Semaphore,
+    ) -> ToolMessage:
+        loop = asyncio.get_running_loop()
+        locks = self._async_tool_locks.get(loop)
+        if locks is None:
+            locks = {
+                name: asyncio.Semaphore(limit)
+                for name, limit in self.tool_concurrency.items()
+            }
+            self._async_tool_locks[loop] = locks
+
+        lock = locks.get(call["name"])
+        async with lock or contextlib.nullcontext(), slots:
+            return await self._arun_streamed(call, input_type, config)
+
+    async def _arun_streamed(
+        self,
+        call: ToolCall,
+        input_type: Literal["list", "dict", "tool_calls"],
+        config: RunnableConfig,
+    ) -> ToolMessage:
+        writer = _stream_writer()
+        writer(_tool_start(call))
+        start = time.perf_counter()
+        output = await super()._arun_one(call, input_type, config)
+        writer(_tool_end(call, output, time.perf_counter() - start))
+        return output
+
+
+def _stream_writer() -> Callable[[Any], None]:
+    # the node may run outside of a graph, e.g. in tests
+    try:
+        return get_stream_writer()
+    except RuntimeError:
+        return lambda chunk: None
+
+
+def _tool_start(call: ToolCall) -> Dict[str, Any]:
+    return {
+        "tool_start": {"id": call["id"], "name": call["name"], "args": call["args"]}
+    }
+
+
+def _tool_end(call: ToolCall, output: Any, seconds: float) -> Dict[str, Any]:
+    return {
+        "tool_end": {
+            "id": call["id"],
+            "name": call["name"],
+            "seconds": seconds,
+            "status": getattr(output, "status", "success"),
+        }
+    }
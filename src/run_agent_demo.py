@@ -11,6 +11,7 @@ from langchain.chat_models import init_chat_model
 from demo.agent_implementations import RealBoxAgent
 from demo.langchain_box_agent_ui import LangChainBoxAgentUI
 from langchain_box_agent.box_agent import LangChainBoxAgent
+from langchain_box_agent.cancellation import TurnBudget
 
 if __name__ == "__main__":
     # Initialize Box client
@@ -26,8 +27,10 @@ if __name__ == "__main__":
     # Create the Box agent
     langchain_agent = LangChainBoxAgent(client, model, use_internal_memory=True)
 
-    # Wrap in our agent interface
-    agent_ui = RealBoxAgent(langchain_agent)
+    # Wrap in our agent interface, every query ending within 5 minutes and 50 tool calls
+    agent_ui = RealBoxAgent(
+        langchain_agent, turn_budget=TurnBudget(seconds=300, tool_calls=50)
+    )
 
     # Start the UI with the simulated agent
     app = LangChainBoxAgentUI(agent_ui, status_message="Ready for queries")
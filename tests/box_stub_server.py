@@ -0,0 +1,440 @@
+"""A local, in-process stand-in for the subset of the Box API used by the agent.
+
+The stub speaks plain HTTP on 127.0.0.1 so both the Box SDK (through
+``BoxClient.with_custom_base_urls``) and the async HTTP layer can be pointed at
+it without credentials or network access.
+"""
+
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from box_ai_agents_toolkit import BoxClient
+from box_sdk_gen import BaseUrls, BoxDeveloperTokenAuth
+
+
+class BoxStubServer:
+    """Serves a small, mutable Box content tree over HTTP.
+
+    Args:
+        latency (float): Seconds added to every request.
+        jitter (float): Up to this many extra seconds, drawn per request.
+        failure_rate (float): Share of requests answered with `failure_status`.
+        failure_status (int): Status of the random failures.
+        retry_after (float | None): Retry-After header sent with failures.
+        seed (int): Seed of the jitter and random failures, for repeatable runs.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        failure_rate: float = 0.0,
+        failure_status: int = 503,
+        retry_after: float | None = 0,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.retry_after = retry_after
+        self.request_count = 0
+        self.failure_count = 0
+        # bodies of the Box AI requests, oldest first
+        self.ai_requests: List[dict] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.folders: Dict[str, dict] = {"0": {"name": "All Files", "parent": None}}
+        self.files: Dict[str, dict] = {}
+        # the events stream, a stream position is an index in this list
+        self.events: List[dict] = []
+        self._scripted_failures: List[list] = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def add_folder(self, folder_id: str, name: str, parent_id: str = "0"):
+        self.folders[folder_id] = {"name": name, "parent": parent_id}
+
+    def add_file(
+        self,
+        file_id: str,
+        name: str,
+        text: str = "",
+        parent_id: str = "0",
+        description: str = "",
+    ):
+        self.files[file_id] = {
+            "name": name,
+            "parent": parent_id,
+            "text": text,
+            "description": description,
+            "version": 1,
+        }
+
+    def update_file(self, file_id: str, text: str):
+        self.files[file_id]["text"] = text
+        self.files[file_id]["version"] += 1
+
+    def add_event(
+        self,
+        event_type: str,
+        item_type: str,
+        item_id: str,
+        name: str = "",
+        parent_id: str | None = None,
+        event_id: str | None = None,
+    ):
+        source = {"type": item_type, "id": item_id, "name": name}
+        if parent_id is not None:
+            source["parent"] = {"type": "folder", "id": parent_id}
+        self.events.append(
+            {
+                "type": "event",
+                "event_id": event_id or f"event-{len(self.events)}",
+                "event_type": event_type,
+                "source": source,
+            }
+        )
+
+    def fail_next(
+        self,
+        path: str,
+        status: int = 503,
+        count: int = 1,
+        retry_after: float | None = 0,
+    ):
+        """Answers the next `count` requests whose path starts with `path` with
+        an error, on top of the random failures."""
+        self._scripted_failures.append([path, status, count, retry_after])
+
+    def _next_failure(self, path: str) -> Optional[tuple]:
+        with self._lock:
+            for failure in self._scripted_failures:
+                if path.startswith(failure[0]):
+                    failure[2] -= 1
+                    if failure[2] == 0:
+                        self._scripted_failures.remove(failure)
+                    self.failure_count += 1
+                    return failure[1], failure[3]
+            if self.failure_rate and self._random.random() < self.failure_rate:
+                self.failure_count += 1
+                return self.failure_status, self.retry_after
+        return None
+
+    def _delay(self) -> float:
+        if not self.jitter:
+            return self.latency
+        with self._lock:
+            return self.latency + self._random.uniform(0, self.jitter)
+
+    def client(self) -> BoxClient:
+        """Returns a Box SDK client that talks to this stub."""
+        return stub_client(self.base_url)
+
+    def start(self) -> "BoxStubServer":
+        stub = self
+
+        class Handler(_StubHandler):
+            server_stub = stub
+
+        self._httpd = _StubHTTPServer(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self) -> "BoxStubServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    # Box JSON representations
+
+    def file_json(self, file_id: str) -> dict:
+        file = self.files[file_id]
+        version = str(file["version"])
+        return {
+            "type": "file",
+            "id": file_id,
+            "name": file["name"],
+            "description": file["description"],
+            "size": len(file["text"].encode("utf-8")),
+            "etag": version,
+            "sha1": f"{file_id}-{version}",
+            "file_version": {"type": "file_version", "id": f"{file_id}v{version}"},
+            "parent": self.folder_mini(file["parent"]),
+            "modified_at": "2025-01-01T00:00:00Z",
+        }
+
+    def folder_mini(self, folder_id: str) -> dict:
+        return {
+            "type": "folder",
+            "id": folder_id,
+            "name": self.folders[folder_id]["name"],
+            "etag": "0",
+        }
+
+    def folder_json(self, folder_id: str) -> dict:
+        folder = self.folders[folder_id]
+        result = self.folder_mini(folder_id)
+        result["description"] = ""
+        if folder["parent"] is not None:
+            result["parent"] = self.folder_mini(folder["parent"])
+        return result
+
+    def children(self, folder_id: str) -> list:
+        folders = [
+            self.folder_json(fid)
+            for fid, folder in self.folders.items()
+            if folder["parent"] == folder_id
+        ]
+        files = [
+            self.file_json(fid)
+            for fid, file in self.files.items()
+            if file["parent"] == folder_id
+        ]
+        return folders + files
+
+
+def stub_client(base_url: str) -> BoxClient:
+    """Returns a Box SDK client for a stub server listening on `base_url`."""
+    auth = BoxDeveloperTokenAuth(token="stub-token")
+    return BoxClient(auth).with_custom_base_urls(
+        BaseUrls(base_url=base_url, upload_url=base_url, oauth_2_url=base_url)
+    )
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # allow a backlog deep enough for the concurrency benchmarks
+    request_queue_size = 512
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    server_stub: BoxStubServer
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: dict):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_text(self, text: str):
+        payload = text.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_error(self, status: int, retry_after: float | None = None):
+        payload = json.dumps(
+            {"type": "error", "status": status, "code": "stub_failure", "message": ""}
+        ).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        if retry_after is not None:
+            self.send_header("Retry-After", str(retry_after))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _not_found(self):
+        self._send_json(
+            404, {"type": "error", "status": 404, "code": "not_found", "message": ""}
+        )
+
+    def _dispatch(self, handler):
+        stub = self.server_stub
+        with stub._lock:
+            stub.request_count += 1
+            stub.in_flight += 1
+            stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+        try:
+            delay = stub._delay()
+            if delay:
+                time.sleep(delay)
+            failure = stub._next_failure(urlparse(self.path).path)
+            if failure is not None:
+                if self.command == "POST":
+                    # drain the body so the connection can be reused
+                    self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                return self._send_error(*failure)
+            handler()
+        finally:
+            with stub._lock:
+                stub.in_flight -= 1
+
+    def do_GET(self):
+        self._dispatch(self._get)
+
+    def do_POST(self):
+        self._dispatch(self._post)
+
+    def _get(self):
+        stub = self.server_stub
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        parts = [part for part in url.path.split("/") if part]
+
+        if parts == ["2.0", "users", "me"]:
+            return self._send_json(
+                200,
+                {
+                    "type": "user",
+                    "id": "1",
+                    "name": "Stub User",
+                    "login": "stub.user@example.com",
+                },
+            )
+
+        if parts == ["2.0", "events"]:
+            position = query.get("stream_position", "0")
+            start = len(stub.events) if position == "now" else int(position)
+            entries = stub.events[start : start + int(query.get("limit", 100))]
+            return self._send_json(
+                200,
+                {
+                    "chunk_size": len(entries),
+                    "next_stream_position": str(start + len(entries)),
+                    "entries": entries,
+                },
+            )
+
+        if parts == ["2.0", "search"]:
+            return self._send_json(200, self._search(query))
+
+        if parts[:2] == ["2.0", "folders"] and len(parts) == 4 and parts[3] == "items":
+            folder_id = parts[2]
+            if folder_id not in stub.folders:
+                return self._not_found()
+            entries = stub.children(folder_id)
+            offset = int(query.get("offset", 0))
+            limit = int(query.get("limit", 100))
+            return self._send_json(
+                200,
+                {
+                    "total_count": len(entries),
+                    "offset": offset,
+                    "limit": limit,
+                    "entries": entries[offset : offset + limit],
+                },
+            )
+
+        if parts[:2] == ["2.0", "files"] and len(parts) == 3:
+            file_id = parts[2]
+            if file_id not in stub.files:
+                return self._not_found()
+            body = stub.file_json(file_id)
+            if self.headers.get("x-rep-hints"):
+                template = f"{stub.base_url}/stub/text/{file_id}/{{+asset_path}}"
+                body["representations"] = {
+                    "entries": [
+                        {
+                            "representation": "extracted_text",
+                            "properties": {},
+                            "info": {"url": f"{stub.base_url}/2.0/stub/{file_id}"},
+                            "status": {"state": "success"},
+                            "content": {"url_template": template},
+                        }
+                    ]
+                }
+            return self._send_json(200, body)
+
+        if parts[:2] == ["stub", "text"] and len(parts) >= 3:
+            file_id = parts[2]
+            if file_id not in stub.files:
+                return self._not_found()
+            return self._send_text(stub.files[file_id]["text"])
+
+        return self._not_found()
+
+    def _post(self):
+        stub = self.server_stub
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        parts = [part for part in urlparse(self.path).path.split("/") if part]
+
+        if parts in (["2.0", "ai", "ask"], ["2.0", "ai", "extract"]):
+            with stub._lock:
+                stub.ai_requests.append(body)
+            items = body.get("items", [])
+            if len(items) > 20:
+                return self._send_json(
+                    400,
+                    {"type": "error", "status": 400, "code": "bad_request"},
+                )
+            if any(item["id"] not in stub.files for item in items):
+                return self._not_found()
+            names = ", ".join(stub.files[item["id"]]["name"] for item in items)
+            prompt = body.get("prompt", "")
+            answer = f"{prompt} -> {names}"
+            if parts[2] == "extract":
+                answer = json.dumps(
+                    {
+                        field.strip(): f"{field.strip()} of {names}"
+                        for field in prompt.split(",")
+                    }
+                )
+            return self._send_json(
+                200,
+                {
+                    "answer": answer,
+                    "created_at": "2025-01-01T00:00:00Z",
+                    "completion_reason": "done",
+                },
+            )
+
+        return self._not_found()
+
+    def _search(self, query: dict) -> dict:
+        stub = self.server_stub
+        term = query.get("query", "").lower()
+        types = query.get("type", "file")
+        entries = []
+        if types == "folder":
+            entries = [
+                stub.folder_json(fid)
+                for fid, folder in stub.folders.items()
+                if fid != "0" and term in folder["name"].lower()
+            ]
+        else:
+            entries = [
+                stub.file_json(fid)
+                for fid, file in stub.files.items()
+                if term in file["name"].lower() or term in file["text"].lower()
+            ]
+        offset = int(query.get("offset", 0))
+        limit = int(query.get("limit", 30))
+        return {
+            "type": "search_results_items",
+            "total_count": len(entries),
+            "offset": offset,
+            "limit": limit,
+            "entries": entries[offset : offset + limit],
+        }
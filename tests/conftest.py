@@ -1,16 +1,82 @@
+import sys
 import uuid
+from typing import Iterator, List, Sequence, Tuple
 
 import pytest
 from box_ai_agents_toolkit import (
     BoxClient,
     get_ccg_client,
 )
+from langchain_core.language_models.fake_chat_models import FakeMessagesListChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from tests.box_stub_server import BoxStubServer
 
 # @pytest.fixture
 # def box_client_auth() -> BoxClient:
 #     return get_oauth_client()
 
 
+class ToolCallingFakeChatModel(FakeMessagesListChatModel):
+    """Fake chat model that accepts tool bindings, so it can drive a ReAct agent."""
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, *args, **kwargs) -> ChatResult:
+        # a copy gets a new message id per run, so replies are not merged in state
+        result = super()._generate(*args, **kwargs)
+        message = result.generations[0].message.model_copy()
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    @classmethod
+    def from_script(
+        cls, *turns: str | Sequence[Tuple[str, dict]]
+    ) -> "ToolCallingFakeChatModel":
+        """Returns a model that replies with the given turns, in order.
+
+        A turn is either the text of a final answer or a list of
+        (tool name, args) calls, e.g.
+        `from_script([("box_read_tool", {"file_id": "100"})], "done")`.
+        The script starts over once every turn has been used.
+        """
+        responses: List[AIMessage] = []
+        for turn, reply in enumerate(turns):
+            if isinstance(reply, str):
+                responses.append(AIMessage(content=reply))
+                continue
+            tool_calls = [
+                {"name": name, "args": args, "id": f"call_{turn}_{i}"}
+                for i, (name, args) in enumerate(reply)
+            ]
+            responses.append(AIMessage(content="", tool_calls=tool_calls))
+        return cls(responses=responses)
+
+
+class ConversationFakeChatModel(ToolCallingFakeChatModel):
+    """Fake chat model following its script in every conversation on its own.
+
+    The reply is chosen by the number of model replies in the conversation so
+    far, so concurrent conversations sharing the model do not steal each
+    other's turns.
+    """
+
+    def _generate(self, messages, *args, **kwargs) -> ChatResult:
+        turn = sum(isinstance(message, AIMessage) for message in messages)
+        message = self.responses[turn % len(self.responses)].model_copy()
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+@pytest.fixture
+def frequent_thread_switches():
+    """Switches threads as often as possible, to interleave racing code."""
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
 @pytest.fixture
 def chat_config() -> str:
     chat_id = uuid.uuid4()
@@ -20,3 +86,40 @@ def chat_config() -> str:
 @pytest.fixture
 def box_client_ccg() -> BoxClient:
     return get_ccg_client()
+
+
+@pytest.fixture
+def box_stub() -> Iterator[BoxStubServer]:
+    with BoxStubServer() as stub:
+        stub.add_folder("10", "Procurement")
+        stub.add_folder("11", "Invoices", parent_id="10")
+        stub.add_file(
+            "100",
+            "invoice-001.pdf",
+            text="Invoice 001 for Moon Habitat, references PO-001.",
+            parent_id="11",
+            description="First invoice",
+        )
+        stub.add_file(
+            "101",
+            "invoice-002.pdf",
+            text="Invoice 002 for Moon Habitat, no purchase order.",
+            parent_id="11",
+        )
+        stub.add_file(
+            "200",
+            "po-001.pdf",
+            text="Purchase order PO-001 for Moon Habitat.",
+            parent_id="10",
+        )
+        yield stub
+
+
+@pytest.fixture
+def box_client_stub(box_stub: BoxStubServer) -> BoxClient:
+    return box_stub.client()
+
+
+@pytest.fixture
+def fake_model() -> ToolCallingFakeChatModel:
+    return ToolCallingFakeChatModel(responses=[AIMessage(content="done")])
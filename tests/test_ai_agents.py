@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+from box_ai_agents_toolkit import BoxClient
+from box_sdk_gen import AiAgentAsk, AiAgentBasicTextTool, AiAgentExtract
+from langchain_core.messages import HumanMessage
+
+from src.langchain_box_agent.ai_agents import AiAgentRegistry
+from src.langchain_box_agent.box_agent import LangChainBoxAgent
+from tests.box_stub_server import BoxStubServer
+from tests.conftest import ToolCallingFakeChatModel
+
+
+def ask_agent(model: str) -> AiAgentAsk:
+    return AiAgentAsk(basic_text=AiAgentBasicTextTool(model=model))
+
+
+def test_registry_picks_the_agent_of_each_tool():
+    per_tool = AiAgentExtract(basic_text=AiAgentBasicTextTool(model="small"))
+    registry = AiAgentRegistry(
+        ask=ask_agent("large"), tools={"box_ai_extract_data_batch": per_tool}
+    )
+
+    assert registry.get("box_ask_ai_tool").basic_text.model == "large"
+    assert registry.get("box_ai_extract_data").long_text is not None
+    assert registry.get("box_ai_extract_data_batch") is per_tool
+    # configurations are built once
+    assert registry.get("box_ai_extract_data") is registry.get("box_ai_extract_data")
+    with pytest.raises(ValueError):
+        AiAgentRegistry(tools={"box_read_tool": per_tool})
+
+
+def test_registry_from_dict():
+    registry = AiAgentRegistry.from_dict(
+        {
+            "ask": {
+                "type": "ai_agent_ask",
+                "basic_text": {"model": "large", "num_tokens_for_completion": 500},
+            },
+            "tools": {
+                "box_ai_extract_data_batch": {
+                    "type": "ai_agent_extract",
+                    "basic_text": {"model": "small"},
+                }
+            },
+        }
+    )
+
+    assert registry.get("box_ask_ai_tool").basic_text.num_tokens_for_completion == 500
+    assert isinstance(registry.get("box_ai_extract_data_batch"), AiAgentExtract)
+    assert registry.get("box_ai_extract_data_batch").basic_text.model == "small"
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_agent_sends_the_configured_ai_agent(
+    box_stub: BoxStubServer, box_client_stub: BoxClient, fake_model, use_async: bool
+):
+    box_agent = LangChainBoxAgent(
+        box_client_stub,
+        fake_model,
+        ai_agents=AiAgentRegistry(ask=ask_agent("deployment-model")),
+    )
+
+    for _ in range(2):
+        if use_async:
+            asyncio.run(box_agent.abox_ask_ai_tool("100", "summarize"))
+        else:
+            box_agent.box_ask_ai_tool("100", "summarize")
+
+    assert [
+        body["ai_agent"]["basic_text"]["model"] for body in box_stub.ai_requests
+    ] == ["deployment-model"] * 2
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_tool_calls_are_timed(
+    box_stub: BoxStubServer, box_client_stub: BoxClient, use_async: bool
+):
+    box_stub.latency = 0.05
+    model = ToolCallingFakeChatModel.from_script(
+        [
+            ("box_ask_ai_tool", {"file_id": "100", "prompt": "summarize"}),
+            ("box_ai_extract_data_batch", {"fields": "total", "folder_id": "11"}),
+        ],
+        "done",
+    )
+    box_agent = LangChainBoxAgent(box_client_stub, model)
+    inputs = {"messages": [HumanMessage(content="summarize the invoices")]}
+
+    if use_async:
+        result = asyncio.run(box_agent.react_agent.ainvoke(inputs))
+    else:
+        result = box_agent.react_agent.invoke(inputs)
+
+    assert result["messages"][-1].content == "done"
+    calls = {call.tool_name: call for call in box_agent.timings.recent}
+    ask, batch = calls["box_ask_ai_tool"], calls["box_ai_extract_data_batch"]
+    assert ask.box_ai_requests == 1
+    assert 0.05 <= ask.box_ai_seconds <= ask.seconds
+    assert batch.box_ai_requests == 2
+    # parallel extractions are counted once, the folder listing is local work
+    assert 0.05 <= batch.box_ai_seconds < 0.1
+    assert batch.local_seconds >= 0.05
+    stats = box_agent.timings.stats()
+    assert stats["box_ai_extract_data_batch"].calls == 1
+    assert stats["box_ask_ai_tool"].box_ai_seconds == ask.box_ai_seconds
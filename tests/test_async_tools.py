@@ -0,0 +1,98 @@
+import asyncio
+import threading
+import json
+
+import pytest
+from box_ai_agents_toolkit import BoxClient
+
+from src.langchain_box_agent.box_agent import LangChainBoxAgent
+from tests.box_stub_server import BoxStubServer
+
+TOOL_CALLS = [
+    ("box_who_am_i", {}),
+    ("box_search_tool", {"query": "invoice"}),
+    ("box_read_tool", {"file_id": "100"}),
+    ("box_ask_ai_tool", {"file_id": "100", "prompt": "summarize"}),
+    (
+        "box_ask_ai_multi_file_tool",
+        {"file_ids": ["100", "101", "100"], "prompt": "any missing po?"},
+    ),
+    ("box_search_folder_by_name", {"folder_name": "invoices"}),
+    ("box_ai_extract_data", {"file_id": "100", "fields": "po number"}),
+    (
+        "box_ai_extract_data_batch",
+        {"fields": "po number", "file_ids": ["200"], "folder_id": "11"},
+    ),
+    (
+        "box_list_folder_content_by_folder_id",
+        {"folder_id": "10", "is_recursive": True},
+    ),
+]
+
+
+@pytest.mark.parametrize("tool_name, tool_args", TOOL_CALLS)
+def test_async_tool_matches_sync_tool(
+    box_client_stub: BoxClient, fake_model, tool_name: str, tool_args: dict
+):
+    box_agent = LangChainBoxAgent(box_client_stub, fake_model)
+    sync_tool = getattr(box_agent, tool_name)
+    async_tool = getattr(box_agent, f"a{tool_name}")
+
+    assert asyncio.run(async_tool(**tool_args)) == sync_tool(**tool_args)
+
+
+def test_tools_register_coroutines(box_client_stub: BoxClient, fake_model):
+    box_agent = LangChainBoxAgent(box_client_stub, fake_model)
+
+    assert all(tool.coroutine is not None for tool in box_agent.tools)
+
+
+def test_async_recursive_listing_is_breadth_first(
+    box_client_stub: BoxClient, fake_model
+):
+    box_agent = LangChainBoxAgent(box_client_stub, fake_model)
+    response = json.loads(
+        asyncio.run(box_agent.abox_list_folder_content_by_folder_id("0", True))
+    )
+
+    assert [item["id"] for item in response] == ["10", "11", "200", "100", "101"]
+
+
+def test_async_client_bounds_requests_in_flight(
+    box_stub: BoxStubServer, box_client_stub: BoxClient, fake_model
+):
+    box_stub.latency = 0.05
+    box_agent = LangChainBoxAgent(box_client_stub, fake_model, max_async_connections=4)
+
+    async def read_many():
+        return await asyncio.gather(
+            *(box_agent.abox_read_tool("200") for _ in range(20))
+        )
+
+    results = asyncio.run(read_many())
+
+    assert all("PO-001" in result for result in results)
+    assert box_stub.max_in_flight <= 4
+
+
+def test_async_client_keeps_one_connection_pool_per_loop(
+    box_stub: BoxStubServer, box_client_stub: BoxClient, fake_model
+):
+    box_agent = LangChainBoxAgent(box_client_stub, fake_model)
+    results = []
+
+    def run_loop():
+        results.append(asyncio.run(box_agent.abox_read_tool("100")))
+
+    # loops of other threads get pools of their own
+    threads = [threading.Thread(target=run_loop) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    run_loop()
+
+    assert len(results) == 5
+    assert all(result.startswith("Invoice 001") for result in results)
+    # the pools of the closed loops are dropped
+    assert len(box_agent.async_client._sessions) == 1
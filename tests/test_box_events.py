@@ -0,0 +1,199 @@
+import time
+
+import pytest
+from box_ai_agents_toolkit import BoxClient
+
+from src.langchain_box_agent.box_agent import LangChainBoxAgent
+from src.langchain_box_agent.box_events import EventSync, item_change
+from src.langchain_box_agent.cache import ToolCache
+from src.langchain_box_agent.folder_index import FolderIndex
+from tests.box_stub_server import BoxStubServer
+
+
+def test_sync_starts_now_and_resumes_from_the_stored_cursor(
+    box_stub: BoxStubServer, box_client_stub: BoxClient, tmp_path
+):
+    cursor_path = str(tmp_path / "cursor")
+    box_stub.add_event("ITEM_RENAME", "folder", "11", "Old", parent_id="10")
+    folder_index = FolderIndex()
+    sync = EventSync(
+        box_client_stub, folder_index=folder_index, cursor_path=cursor_path
+    )
+
+    assert sync.poll() == 0
+    box_stub.add_event("ITEM_RENAME", "folder", "11", "Bills", parent_id="10")
+    assert sync.poll() == 1
+    box_stub.add_event("ITEM_CREATE", "folder", "12", "2025", parent_id="11")
+    resumed = EventSync(
+        box_client_stub, folder_index=folder_index, cursor_path=cursor_path
+    )
+
+    assert resumed.cursor == "2"
+    assert resumed.poll() == 1
+    assert folder_index.find("Old") == []
+    assert folder_index.child("10", "Bills") == "11"
+    assert folder_index.child("11", "2025") == "12"
+
+
+def test_events_are_read_in_pages_and_applied_once(
+    box_stub: BoxStubServer, box_client_stub: BoxClient
+):
+    folder_index = FolderIndex()
+    sync = EventSync(box_client_stub, folder_index=folder_index, page_size=2)
+    sync.poll()
+    for i in range(5):
+        box_stub.add_event("ITEM_CREATE", "folder", str(30 + i), f"Folder {i}")
+    # Box may send an event again
+    box_stub.events.append(box_stub.events[0])
+    box_stub.add_event("ITEM_PREVIEW", "file", "100")
+    requests_before = box_stub.request_count
+
+    assert sync.poll() == 5
+    # three full pages, then a partial and an empty one
+    assert box_stub.request_count - requests_before == 5
+    assert sync.stats.duplicates == 1
+    assert sync.stats.events == 7
+    assert folder_index.find("folder 4") == ["34"]
+
+
+def test_sync_refreshes_the_caches_of_an_agent(
+    box_stub: BoxStubServer, box_client_stub: BoxClient, fake_model
+):
+    listings = ToolCache()
+    box_agent = LangChainBoxAgent(
+        box_client_stub,
+        fake_model,
+        tool_caches={"box_list_folder_content_by_folder_id": listings},
+        folder_index=FolderIndex(),
+    )
+    sync = EventSync.from_agent(box_agent)
+    sync.poll()
+    box_agent.box_list_folder_content_by_folder_id("10", False)
+    assert box_agent.box_search_folder_by_name("Invoices") == "Invoices (id:11)"
+
+    box_stub.add_folder("11", "Bills", parent_id="10")
+    box_stub.add_event("ITEM_RENAME", "folder", "11", "Bills", parent_id="10")
+    box_stub.add_event("ITEM_PREVIEW", "file", "100")
+    assert "Bills" not in box_agent.box_list_folder_content_by_folder_id("10", False)
+    sync.poll()
+
+    assert "Bills" in box_agent.box_list_folder_content_by_folder_id("10", False)
+    assert box_agent.box_search_folder_by_name("Procurement/Bills") == (
+        "Procurement/Bills (id:11)"
+    )
+
+
+def test_only_the_listings_of_changed_folders_are_invalidated(
+    box_stub: BoxStubServer, box_client_stub: BoxClient, fake_model
+):
+    listings = ToolCache()
+    folder_index = FolderIndex()
+    box_agent = LangChainBoxAgent(
+        box_client_stub,
+        fake_model,
+        tool_caches={"box_list_folder_content_by_folder_id": listings},
+        folder_index=folder_index,
+    )
+    sync = EventSync.from_agent(box_agent)
+    sync.poll()
+
+    def cached(folder_id: str, is_recursive: bool = False) -> bool:
+        hits = listings.stats.hits
+        box_agent.box_list_folder_content_by_folder_id(folder_id, is_recursive)
+        return listings.stats.hits > hits
+
+    for folder_id in ("0", "10", "11"):
+        box_agent.box_list_folder_content_by_folder_id(folder_id, False)
+    box_agent.box_list_folder_content_by_folder_id("0", True)
+
+    box_stub.files["100"]["name"] = "bill-001.pdf"
+    box_stub.add_event("ITEM_RENAME", "file", "100", "bill-001.pdf", parent_id="11")
+    sync.poll()
+    assert (cached("0"), cached("10"), cached("11"), cached("0", True)) == (
+        True,
+        True,
+        False,
+        False,
+    )
+
+    # a folder moved from 10 to 0, with no name in its event
+    box_stub.folders["11"]["parent"] = "0"
+    box_stub.add_event("ITEM_MOVE", "folder", "11", parent_id="0")
+    sync.poll()
+    assert (cached("0"), cached("10"), cached("11")) == (False, False, False)
+    # the index kept the name it knew
+    assert folder_index.child("0", "Invoices") == "11"
+    assert folder_index.child("10", "Invoices") is None
+
+    # a folder the index does not know yet, with no name either
+    folder_index.mark_listed("11")
+    sync.apply(
+        [
+            {
+                "event_type": "ITEM_CREATE",
+                "source": {"type": "folder", "id": "12", "parent": {"id": "11"}},
+            }
+        ]
+    )
+    assert folder_index.parent_id("12") is None
+    assert not folder_index.is_listed("11")
+
+
+def test_trashed_files_leave_the_retrieval_index(box_client_stub: BoxClient, tmp_path):
+    pytest.importorskip("numpy")
+    from src.langchain_box_agent.retrieval import IndexedDocument, RetrievalIndex
+
+    index = RetrievalIndex(str(tmp_path))
+    index.update_files(
+        [
+            IndexedDocument("100", "v1", "invoice-001.pdf", "first invoice"),
+            IndexedDocument("101", "v1", "invoice-002.pdf", "second invoice"),
+        ]
+    )
+    sync = EventSync(box_client_stub, retrieval_index=index)
+
+    sync.apply(
+        [
+            {"event_type": "ITEM_TRASH", "source": {"type": "file", "id": "100"}},
+            {"event_type": "ITEM_TRASH", "source": {"type": "folder", "id": "101"}},
+        ]
+    )
+
+    assert index.indexed_version("100") is None
+    assert index.indexed_version("101") == "v1"
+
+
+def test_enterprise_events_are_understood():
+    change = item_change(
+        {
+            "event_type": "MOVE",
+            "source": {
+                "item_type": "folder",
+                "item_id": "11",
+                "item_name": "Invoices",
+                "parent": {"id": "20"},
+            },
+        }
+    )
+
+    assert (change.item_id, change.name, change.parent_id) == ("11", "Invoices", "20")
+    assert item_change({"event_type": "LOGIN", "source": {"type": "user"}}) is None
+
+
+def test_background_sync_polls_until_stopped(
+    box_stub: BoxStubServer, box_client_stub: BoxClient
+):
+    folder_index = FolderIndex()
+    box_stub.fail_next("/2.0/events", status=400)
+
+    with EventSync(box_client_stub, folder_index=folder_index, interval=0.01) as sync:
+        deadline = time.monotonic() + 5
+        while sync.cursor is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        box_stub.add_event("ITEM_CREATE", "folder", "40", "Reports")
+        while not folder_index.find("Reports") and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    assert folder_index.find("Reports") == ["40"]
+    assert sync.stats.errors == 1
+    assert sync.last_error is not None
@@ -0,0 +1,121 @@
+import asyncio
+import time
+
+import pytest
+from box_ai_agents_toolkit import BoxClient
+
+from src.langchain_box_agent.box_agent import LangChainBoxAgent
+from src.langchain_box_agent.cache import DiskCache, LRUCache, ToolCache
+from tests.box_stub_server import BoxStubServer
+
+
+def test_lru_cache_evicts_least_recently_used_by_size():
+    cache = LRUCache(max_bytes=10, ttl=None)
+    cache.set("a", "aaaa")
+    cache.set("b", "bbbb")
+    assert cache.get("a") == "aaaa"
+
+    cache.set("c", "cccc")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "aaaa"
+    assert cache.get("c") == "cccc"
+    assert cache.size_bytes == 8
+    assert cache.evictions == 1
+
+
+def test_lru_cache_expires_entries():
+    cache = LRUCache(ttl=0.05)
+    cache.set("a", "aaaa")
+    assert cache.get("a") == "aaaa"
+
+    time.sleep(0.1)
+
+    assert cache.get("a") is None
+    assert cache.size_bytes == 0
+
+
+def test_disk_cache_persists_across_instances(tmp_path):
+    DiskCache(str(tmp_path)).set("text/1/v1", "hello")
+
+    cache = DiskCache(str(tmp_path))
+    assert cache.get("text/1/v1") == "hello"
+
+    cache.delete("text/1/v1")
+    assert cache.get("text/1/v1") is None
+
+
+def test_disk_cache_expires_entries(tmp_path):
+    cache = DiskCache(str(tmp_path), ttl=0.05)
+    cache.set("a", "aaaa")
+    time.sleep(0.1)
+
+    assert cache.get("a") is None
+
+
+def test_tool_cache_counts_hits_and_misses():
+    cache = ToolCache()
+    assert cache.get("a") is None
+    cache.set("a", "aaaa")
+    assert cache.get("a") == "aaaa"
+
+    assert cache.stats.hits == 1
+    assert cache.stats.misses == 1
+    assert cache.stats.hit_rate == 0.5
+
+
+@pytest.mark.parametrize("backend", ["lru", "disk"])
+def test_tool_cache_invalidates_groups(tmp_path, backend: str):
+    cache = ToolCache(LRUCache() if backend == "lru" else DiskCache(str(tmp_path)))
+    cache.set(cache.group_key("folder/10", 0), "ten")
+    cache.set(cache.group_key("folder/11", 0), "eleven")
+
+    cache.invalidate("folder/10")
+
+    assert cache.get(cache.group_key("folder/10", 0)) is None
+    assert cache.get(cache.group_key("folder/11", 0)) == "eleven"
+    # a lost generation never brings old entries back
+    cache.backend.delete(ToolCache.key("generation", "folder/11"))
+    assert cache.get(cache.group_key("folder/11", 0)) is None
+
+
+def test_read_tool_cache_is_invalidated_by_new_file_version(
+    box_stub: BoxStubServer, box_client_stub: BoxClient, fake_model
+):
+    cache = ToolCache()
+    box_agent = LangChainBoxAgent(
+        box_client_stub, fake_model, tool_caches={"box_read_tool": cache}
+    )
+
+    first = box_agent.box_read_tool("100")
+    assert box_agent.box_read_tool("100") == first
+    assert asyncio.run(box_agent.abox_read_tool("100")) == first
+    assert cache.stats.hits == 2
+
+    box_stub.update_file("100", "Invoice 001, amended.")
+
+    assert box_agent.box_read_tool("100") == "Invoice 001, amended."
+    assert cache.stats.misses == 2
+
+
+def test_folder_listing_cache_skips_box_calls(
+    box_stub: BoxStubServer, box_client_stub: BoxClient, fake_model
+):
+    box_agent = LangChainBoxAgent(
+        box_client_stub,
+        fake_model,
+        tool_caches={"box_list_folder_content_by_folder_id": ToolCache()},
+    )
+
+    first = box_agent.box_list_folder_content_by_folder_id("10", True)
+    request_count = box_stub.request_count
+
+    assert box_agent.box_list_folder_content_by_folder_id("10", True) == first
+    assert box_stub.request_count == request_count
+
+
+def test_uncacheable_tool_is_rejected(box_client_stub: BoxClient, fake_model):
+    with pytest.raises(ValueError):
+        LangChainBoxAgent(
+            box_client_stub, fake_model, tool_caches={"box_ask_ai_tool": ToolCache()}
+        )
@@ -0,0 +1,178 @@
+import asyncio
+import contextvars
+import threading
+import time
+
+import pytest
+from box_ai_agents_toolkit import BoxClient
+
+from src.langchain_box_agent.box_agent import LangChainBoxAgent
+from src.langchain_box_agent.cancellation import (
+    RunCancelled,
+    RunControl,
+    TurnBudget,
+    current_control,
+)
+from src.langchain_box_agent.streaming import (
+    FinalEvent,
+    ToolEndEvent,
+    astream_events,
+    stream_events,
+)
+from tests.box_stub_server import BoxStubServer
+from tests.conftest import ToolCallingFakeChatModel
+
+
+def read_three_times_model() -> ToolCallingFakeChatModel:
+    return ToolCallingFakeChatModel.from_script(
+        [("box_read_tool", {"file_id": "100"})],
+        [("box_read_tool", {"file_id": "101"})],
+        [("box_read_tool", {"file_id": "200"})],
+        "done",
+    )
+
+
+def test_turns_end_cleanly_after_their_tool_calls(box_client_stub: BoxClient):
+    box_agent = LangChainBoxAgent(
+        box_client_stub, read_three_times_model(), use_internal_memory=True
+    )
+    config = {"configurable": {"thread_id": "t"}}
+    control = RunControl(TurnBudget(tool_calls=2))
+
+    events = list(
+        stream_events(
+            box_agent.react_agent, {"messages": [("user", "read")]}, config, control
+        )
+    )
+
+    ends = [event for event in events if isinstance(event, ToolEndEvent)]
+    assert [end.status for end in ends] == ["success", "success", "error"]
+    assert events[-1] == FinalEvent("", stopped="the turn used its 2 tool calls")
+    assert box_agent.timings.stats()["box_read_tool"].calls == 2
+
+    # every tool call got its answer, the conversation goes on
+    state = box_agent.react_agent.get_state(config).values
+    assert state["messages"][-1].type == "tool"
+    result = box_agent.react_agent.invoke({"messages": [("user", "and?")]}, config)
+    assert result["messages"][-1].content == "done"
+
+
+def test_token_budget_stops_before_the_next_model_call(box_client_stub: BoxClient):
+    model = read_three_times_model()
+    box_agent = LangChainBoxAgent(box_client_stub, model)
+    control = RunControl(TurnBudget(tokens=1))
+
+    *_, final = stream_events(
+        box_agent.react_agent, {"messages": [("user", "read")]}, control=control
+    )
+
+    assert final.stopped == "the turn used its 1 tokens"
+    assert control.tokens > 0
+    # one model call, its tool call was refused
+    assert model.i == 1
+    assert "box_read_tool" not in box_agent.timings.stats()
+
+
+def test_a_cancelled_run_calls_neither_the_model_nor_box(box_stub: BoxStubServer):
+    model = read_three_times_model()
+    box_agent = LangChainBoxAgent(box_stub.client(), model)
+    control = RunControl()
+    control.cancel("stopped by the user")
+    requests = box_stub.request_count
+
+    events = list(
+        stream_events(
+            box_agent.react_agent, {"messages": [("user", "read")]}, control=control
+        )
+    )
+
+    assert events == [FinalEvent("", stopped="stopped by the user")]
+    assert model.i == 0
+    assert box_stub.request_count == requests
+
+
+def test_box_requests_of_a_stopped_run_are_not_sent(box_stub: BoxStubServer):
+    box_agent = LangChainBoxAgent(box_stub.client(), read_three_times_model())
+    control = RunControl()
+    control.cancel()
+    requests = box_stub.request_count
+
+    with control.active(), pytest.raises(RunCancelled):
+        box_agent.box_who_am_i()
+
+    assert box_stub.request_count == requests
+    # outside of the run, the client works as before
+    assert box_agent.box_who_am_i().startswith("Authenticated as")
+
+
+def test_cancel_stops_async_requests_in_flight(box_stub: BoxStubServer):
+    box_agent = LangChainBoxAgent(box_stub.client(), read_three_times_model())
+    box_stub.latency = 2.0
+    control = RunControl()
+
+    async def run():
+        asyncio.get_running_loop().call_later(0.2, control.cancel, "stop")
+        return [
+            event
+            async for event in astream_events(
+                box_agent.react_agent, {"messages": [("user", "read")]}, control=control
+            )
+        ]
+
+    start = time.perf_counter()
+    events = asyncio.run(run())
+
+    assert time.perf_counter() - start < 1.5
+    assert events[-1].stopped == "stop"
+    assert events[-2] == ToolEndEvent(
+        "call_0_0", "box_read_tool", events[-2].seconds, "error"
+    )
+
+
+def test_deadline_bounds_sync_runs(box_stub: BoxStubServer):
+    box_agent = LangChainBoxAgent(box_stub.client(), read_three_times_model())
+    box_stub.latency = 0.3
+    control = RunControl(TurnBudget(seconds=0.5))
+
+    start = time.perf_counter()
+    *_, final = stream_events(
+        box_agent.react_agent, {"messages": [("user", "read")]}, control=control
+    )
+
+    assert final.stopped == "the turn ran out of its 0.5 seconds"
+    assert time.perf_counter() - start < 1.5
+
+
+def test_the_control_is_not_active_between_events(box_client_stub: BoxClient):
+    box_agent = LangChainBoxAgent(box_client_stub, read_three_times_model())
+    control = RunControl()
+
+    events = stream_events(
+        box_agent.react_agent, {"messages": [("user", "read")]}, control=control
+    )
+    next(events)
+    assert current_control() is None
+
+    # a consumer may close the stream from another context, e.g. a new task
+    contextvars.copy_context().run(events.close)
+
+    async def run():
+        events = astream_events(
+            box_agent.react_agent, {"messages": [("user", "read")]}, control=control
+        )
+        await anext(events)
+        assert current_control() is None
+        await asyncio.create_task(events.aclose())
+
+    asyncio.run(run())
+
+
+def test_cancel_wakes_up_sleeps_from_another_thread():
+    control = RunControl()
+    threading.Timer(0.1, control.cancel).start()
+
+    start = time.perf_counter()
+    with pytest.raises(RunCancelled):
+        control.sleep(5)
+
+    assert time.perf_counter() - start < 1
@@ -0,0 +1,133 @@
+import asyncio
+import sqlite3
+
+import pytest
+from box_ai_agents_toolkit import BoxClient
+from langchain_core.messages import HumanMessage
+
+from src.langchain_box_agent.box_agent import LangChainBoxAgent
+from src.langchain_box_agent.checkpoint import BoundedMemorySaver, SQLiteSaver
+
+
+def chat(box_agent: LangChainBoxAgent, thread_id: str, text: str = "hi") -> list:
+    return box_agent.react_agent.invoke(
+        {"messages": [HumanMessage(content=text)]},
+        {"configurable": {"thread_id": thread_id}},
+    )["messages"]
+
+
+def thread_config(thread_id: str) -> dict:
+    return {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+
+
+def test_bounded_saver_evicts_least_recently_used_threads(
+    box_client_stub: BoxClient, fake_model
+):
+    saver = BoundedMemorySaver(max_threads=3, max_bytes=None)
+    box_agent = LangChainBoxAgent(box_client_stub, fake_model, checkpointer=saver)
+
+    for thread_id in ("a", "b", "c"):
+        chat(box_agent, thread_id)
+    assert saver.get_tuple(thread_config("a")) is not None
+    chat(box_agent, "d")
+
+    assert saver.thread_count == 3
+    assert saver.evictions == 1
+    assert saver.get_tuple(thread_config("b")) is None
+    assert len(chat(box_agent, "a")) == 4
+    # an evicted thread starts over
+    assert len(chat(box_agent, "b")) == 2
+    assert "b" in saver.storage and saver.thread_count == 3
+
+
+def test_bounded_saver_evicts_by_size(box_client_stub: BoxClient, fake_model):
+    saver = BoundedMemorySaver(max_threads=None, max_bytes=20_000)
+    box_agent = LangChainBoxAgent(box_client_stub, fake_model, checkpointer=saver)
+
+    for i in range(50):
+        chat(box_agent, f"thread-{i}", text="x" * 1_000)
+
+    assert 1 < saver.thread_count < 50
+    assert saver.size_bytes <= 20_000
+    assert set(saver.storage) == {
+        f"thread-{i}" for i in range(50 - saver.thread_count, 50)
+    }
+    assert {key[0] for key in saver.blobs} == set(saver.storage)
+
+    saver.get_tuple(thread_config("unknown"))
+    assert "unknown" not in saver.storage
+
+
+def test_sqlite_saver_persists_conversations(
+    box_client_stub: BoxClient, fake_model, tmp_path
+):
+    path = str(tmp_path / "checkpoints.db")
+    with SQLiteSaver(path) as saver:
+        box_agent = LangChainBoxAgent(box_client_stub, fake_model, checkpointer=saver)
+        chat(box_agent, "a", "first question")
+
+    with SQLiteSaver(path) as saver:
+        box_agent = LangChainBoxAgent(box_client_stub, fake_model, checkpointer=saver)
+        messages = chat(box_agent, "a", "second question")
+
+        assert [message.content for message in messages] == [
+            "first question",
+            "done",
+            "second question",
+            "done",
+        ]
+        history = list(saver.list(thread_config("a")))
+        assert history[0].checkpoint["id"] > history[-1].checkpoint["id"]
+        assert list(saver.list(thread_config("a"), limit=2)) == history[:2]
+        assert all(
+            item.metadata["source"] == "input"
+            for item in saver.list(None, filter={"source": "input"})
+        )
+
+
+def test_sqlite_saver_batches_writes(tmp_path):
+    path = str(tmp_path / "checkpoints.db")
+    saver = SQLiteSaver(path, batch_size=10_000, flush_interval=3600)
+    for i in range(3):
+        saver.put_writes(
+            {"configurable": {"thread_id": "x", "checkpoint_id": "1"}},
+            [("messages", i)],
+            task_id=str(i),
+        )
+
+    other_connection = sqlite3.connect(path)
+    count = "SELECT COUNT(*) FROM writes"
+    assert other_connection.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+    assert other_connection.execute(count).fetchone() == (0,)
+
+    saver.flush()
+    assert other_connection.execute(count).fetchone() == (3,)
+    saver.close()
+
+
+def test_sqlite_saver_async(box_client_stub: BoxClient, fake_model, tmp_path):
+    saver = SQLiteSaver(str(tmp_path / "checkpoints.db"))
+    box_agent = LangChainBoxAgent(box_client_stub, fake_model, checkpointer=saver)
+    config = {"configurable": {"thread_id": "a"}}
+
+    async def conversation():
+        for text in ("one", "two"):
+            result = await box_agent.react_agent.ainvoke(
+                {"messages": [HumanMessage(content=text)]}, config
+            )
+        return result["messages"]
+
+    assert len(asyncio.run(conversation())) == 4
+    saver.close()
+
+
+def test_checkpointer_and_internal_memory_are_exclusive(
+    box_client_stub: BoxClient, fake_model
+):
+    with pytest.raises(ValueError):
+        LangChainBoxAgent(
+            box_client_stub,
+            fake_model,
+            use_internal_memory=True,
+            checkpointer=BoundedMemorySaver(),
+        )
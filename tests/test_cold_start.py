@@ -0,0 +1,97 @@
+import os
+import pathlib
+import subprocess
+import sys
+from typing import Dict
+
+from box_ai_agents_toolkit import BoxClient
+
+from src.langchain_box_agent.box_agent import TOOL_NAMES, LangChainBoxAgent
+from tests.conftest import ToolCallingFakeChatModel
+
+ROOT = pathlib.Path(__file__).parent.parent
+
+# cumulative import time of the agent module, several times what it takes on a laptop
+IMPORT_BUDGET_SECONDS = 3.0
+
+# imported with the first graph or tools, or with the options needing them
+DEFERRED_MODULES = (
+    "langchain",
+    "langchain_core.language_models",
+    "langchain_core.tools",
+    "langgraph.prebuilt",
+    "src.langchain_box_agent.checkpoint",
+    "src.langchain_box_agent.compaction",
+    "src.langchain_box_agent.tool_node",
+)
+
+
+def import_times(code: str, **env: str) -> Dict[str, float]:
+    """Cumulative seconds of every module imported by `code`, from -X importtime."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        env={**os.environ, **env},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative) / 1_000_000
+    return times
+
+
+def test_agent_module_imports_within_its_budget():
+    times = import_times("import src.langchain_box_agent.box_agent")
+
+    assert times["src.langchain_box_agent.box_agent"] < IMPORT_BUDGET_SECONDS
+    assert [module for module in DEFERRED_MODULES if module in times] == []
+
+
+def test_langgraph_entry_point_makes_no_request_at_import():
+    # any connection fails, as it does without network or credentials
+    code = (
+        "import socket\n"
+        "def connect(*args, **kwargs): raise OSError('no network at import')\n"
+        "socket.socket.connect = connect\n"
+        "import box_agent_langgraph\n"
+    )
+
+    times = import_times(code, PYTHONPATH=str(ROOT / "src"))
+
+    assert "box_agent_langgraph" in times
+    assert "langchain_core.language_models" not in times
+
+
+def test_client_and_model_factories_are_called_on_first_use(
+    box_client_stub: BoxClient,
+):
+    calls = []
+
+    def client_factory() -> BoxClient:
+        calls.append("client")
+        return box_client_stub
+
+    def model_factory() -> ToolCallingFakeChatModel:
+        calls.append("model")
+        return ToolCallingFakeChatModel.from_script("done")
+
+    box_agent = LangChainBoxAgent(client_factory, model_factory)
+    assert calls == []
+
+    assert [tool.name for tool in box_agent.tools] == list(TOOL_NAMES)
+    assert calls == []
+
+    result = box_agent.react_agent.invoke({"messages": [("user", "hi")]})
+    assert result["messages"][-1].content == "done"
+    assert box_agent.box_who_am_i() == "Authenticated as: Stub User"
+    assert calls == ["model", "client"]
+
+    # both are built once, and shared by the async tools
+    box_agent.build_react_agent(box_agent.tools)
+    assert box_agent.async_client.client is box_agent.client
+    assert calls == ["model", "client"]
@@ -0,0 +1,164 @@
+import asyncio
+from typing import List
+
+import pytest
+from box_ai_agents_toolkit import BoxClient
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    HumanMessage,
+    ToolMessage,
+)
+
+from src.langchain_box_agent.box_agent import LangChainBoxAgent
+from src.langchain_box_agent.compaction import (
+    CompactionPolicy,
+    HistoryCompactor,
+    ReferenceOutput,
+    SummarizeOutput,
+    TruncateOutput,
+)
+from tests.box_stub_server import BoxStubServer
+from tests.conftest import ToolCallingFakeChatModel
+
+
+class RecordingChatModel(ToolCallingFakeChatModel):
+    """Fake chat model that records the messages it is called with."""
+
+    calls: List[List[BaseMessage]] = []
+
+    def _generate(self, messages, *args, **kwargs):
+        self.calls.append(list(messages))
+        return super()._generate(messages, *args, **kwargs)
+
+
+def tool_turn(call_id: str, tool_name: str, output: str, **args) -> List[BaseMessage]:
+    return [
+        AIMessage(
+            content="",
+            tool_calls=[{"name": tool_name, "args": args, "id": call_id}],
+        ),
+        ToolMessage(content=output, name=tool_name, tool_call_id=call_id),
+    ]
+
+
+def history(*outputs: str) -> List[BaseMessage]:
+    messages = [HumanMessage(content="question")]
+    for i, output in enumerate(outputs):
+        messages += tool_turn(f"call_{i}", "box_read_tool", output, file_id=str(i))
+    return messages
+
+
+def test_history_under_budget_is_unchanged():
+    messages = history("a" * 100, "b" * 100)
+
+    assert HistoryCompactor(max_tokens=1_000).compact({"messages": messages}) == (
+        messages
+    )
+
+
+def test_oldest_outputs_are_compacted_first():
+    messages = history("a" * 4_000, "b" * 4_000, "c" * 4_000, "d" * 4_000)
+    compactor = HistoryCompactor(
+        max_tokens=2_500, default_policy=TruncateOutput(max_chars=100)
+    )
+
+    compacted = compactor.compact({"messages": messages})
+
+    contents = [m.content for m in compacted if isinstance(m, ToolMessage)]
+    assert contents[0].startswith("a" * 100 + "\n\n[Output truncated from 4000")
+    assert 'Call box_read_tool with {"file_id": "0"} again' in contents[0]
+    assert contents[1].startswith("b" * 100 + "\n\n")
+    # the budget is met before the third output, the last turn is always kept
+    assert contents[2:] == ["c" * 4_000, "d" * 4_000]
+    assert compacted[2].tool_call_id == "call_0"
+    assert messages[2].content == "a" * 4_000
+
+
+def test_policies_are_chosen_per_tool():
+    messages = history("a" * 4_000)
+    messages += tool_turn(
+        "call_list", "box_list_folder_content_by_folder_id", "[]" * 2_000
+    )
+    messages += tool_turn("call_last", "box_search_tool", "x" * 4_000)
+    compactor = HistoryCompactor(
+        max_tokens=100,
+        policies={
+            "box_read_tool": None,
+            "box_list_folder_content_by_folder_id": ReferenceOutput(),
+        },
+    )
+
+    compacted = compactor.compact({"messages": messages})
+
+    assert compacted[2].content == "a" * 4_000
+    assert compacted[4].content == (
+        "[Output of 4000 characters omitted to save context. Call "
+        "box_list_folder_content_by_folder_id with {} again to see it.]"
+    )
+    assert compacted[6].content == "x" * 4_000
+
+
+def test_policies_must_implement_compact():
+    class NoPolicy(CompactionPolicy):
+        pass
+
+    with pytest.raises(TypeError):
+        NoPolicy()
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_summaries_are_computed_once(use_async: bool):
+    summarizer = RecordingChatModel(
+        responses=[AIMessage(content="Invoice 001, PO-001.")], calls=[]
+    )
+    compactor = HistoryCompactor(
+        max_tokens=1_000, default_policy=SummarizeOutput(summarizer)
+    )
+    messages = history("a" * 8_000, "b" * 100)
+
+    for _ in range(2):
+        state = {"messages": messages}
+        if use_async:
+            compacted = asyncio.run(compactor.acompact(state))
+        else:
+            compacted = compactor.compact(state)
+        assert compacted[2].content == (
+            "[Summary of an output of 8000 characters]\nInvoice 001, PO-001."
+        )
+
+    assert len(summarizer.calls) == 1
+    assert "a" * 8_000 in summarizer.calls[0][1].content
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_agent_sends_compacted_history_to_the_model(
+    box_stub: BoxStubServer, box_client_stub: BoxClient, use_async: bool
+):
+    box_stub.add_file("300", "contract.txt", text="clause " * 2_000)
+    model = RecordingChatModel(
+        responses=[
+            *tool_turn("call_0", "box_read_tool", "", file_id="300")[:1],
+            *tool_turn("call_1", "box_read_tool", "", file_id="100")[:1],
+            AIMessage(content="done"),
+        ],
+        calls=[],
+    )
+    box_agent = LangChainBoxAgent(
+        box_client_stub,
+        model,
+        history_compactor=HistoryCompactor(
+            max_tokens=1_000, default_policy=TruncateOutput(max_chars=50)
+        ),
+    )
+    inputs = {"messages": [HumanMessage(content="read the contract")]}
+
+    if use_async:
+        result = asyncio.run(box_agent.react_agent.ainvoke(inputs))
+    else:
+        result = box_agent.react_agent.invoke(inputs)
+
+    last_call = model.calls[-1]
+    assert last_call[2].content.startswith("clause " * 7 + "c\n\n[Output truncated")
+    assert last_call[4].content == box_stub.files["100"]["text"]
+    assert result["messages"][2].content == "clause " * 2_000
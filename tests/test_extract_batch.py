@@ -0,0 +1,98 @@
+import asyncio
+import csv
+import io
+
+import pytest
+from box_ai_agents_toolkit import BoxClient
+
+from src.langchain_box_agent.box_agent import LangChainBoxAgent
+from tests.box_stub_server import BoxStubServer
+
+
+def extract_batch(box_agent: LangChainBoxAgent, use_async: bool, **kwargs) -> str:
+    if use_async:
+        return asyncio.run(box_agent.abox_ai_extract_data_batch(**kwargs))
+    return box_agent.box_ai_extract_data_batch(**kwargs)
+
+
+def rows(table: str) -> list:
+    return list(csv.DictReader(io.StringIO(table)))
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_extract_batch_returns_one_row_per_file(
+    box_client_stub: BoxClient, fake_model, use_async: bool
+):
+    box_agent = LangChainBoxAgent(box_client_stub, fake_model)
+
+    table = extract_batch(
+        box_agent,
+        use_async,
+        fields="po number, total",
+        file_ids=["200", "100"],
+        folder_id="11",
+    )
+
+    assert table.splitlines()[0] == "file_id,name,po number,total"
+    assert rows(table) == [
+        {
+            "file_id": "200",
+            "name": "",
+            "po number": "po number of po-001.pdf",
+            "total": "total of po-001.pdf",
+        },
+        {
+            "file_id": "100",
+            "name": "",
+            "po number": "po number of invoice-001.pdf",
+            "total": "total of invoice-001.pdf",
+        },
+        {
+            "file_id": "101",
+            "name": "invoice-002.pdf",
+            "po number": "po number of invoice-002.pdf",
+            "total": "total of invoice-002.pdf",
+        },
+    ]
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_extract_batch_reports_failed_files(
+    box_client_stub: BoxClient, fake_model, use_async: bool
+):
+    box_agent = LangChainBoxAgent(box_client_stub, fake_model)
+
+    result = rows(
+        extract_batch(box_agent, use_async, fields="total", file_ids=["100", "999"])
+    )
+
+    assert result[0]["total"] == "total of invoice-001.pdf"
+    assert result[0]["error"] == ""
+    assert result[1]["total"] == ""
+    assert result[1]["error"]
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_extract_batch_bounds_concurrency_and_files(
+    box_stub: BoxStubServer, box_client_stub: BoxClient, fake_model, use_async: bool
+):
+    for i in range(12):
+        box_stub.add_file(str(500 + i), f"receipt-{i}.pdf", parent_id="10")
+    box_stub.latency = 0.02
+    box_agent = LangChainBoxAgent(
+        box_client_stub, fake_model, extract_concurrency=3, extract_max_files=10
+    )
+    requests_before = box_stub.request_count
+
+    table = extract_batch(
+        box_agent, use_async, fields="total", folder_id="10", is_recursive=True
+    )
+
+    assert len(rows(table.split("\n\n")[0])) == 10
+    assert table.endswith(
+        "[Extraction stopped after 10 files. Call box_ai_extract_data_batch with "
+        "the file_ids of the remaining files to extract them too.]"
+    )
+    assert box_stub.max_in_flight <= 3
+    # the folder listing plus one request per extracted file
+    assert box_stub.request_count - requests_before <= 10 + 3
@@ -0,0 +1,146 @@
+import asyncio
+import time
+
+import pytest
+from box_ai_agents_toolkit import BoxClient
+
+from src.langchain_box_agent.box_agent import LangChainBoxAgent
+from src.langchain_box_agent.folder_index import FolderIndex
+from tests.box_stub_server import BoxStubServer
+
+
+def find_folder(box_agent: LangChainBoxAgent, use_async: bool, folder_name: str) -> str:
+    if use_async:
+        return asyncio.run(box_agent.abox_search_folder_by_name(folder_name))
+    return box_agent.box_search_folder_by_name(folder_name)
+
+
+@pytest.fixture
+def box_stub_years(box_stub: BoxStubServer) -> BoxStubServer:
+    box_stub.add_folder("12", "2023", parent_id="11")
+    box_stub.add_folder("13", "2024", parent_id="11")
+    box_stub.add_folder("20", "Invoices", parent_id="0")
+    return box_stub
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_paths_are_resolved_with_one_listing_per_folder(
+    box_stub_years: BoxStubServer, box_client_stub: BoxClient, fake_model, use_async
+):
+    box_agent = LangChainBoxAgent(
+        box_client_stub, fake_model, folder_index=FolderIndex()
+    )
+    # the async client authenticates on its first request
+    find_folder(box_agent, use_async, "nothing/here")
+    requests_before = box_stub_years.request_count
+
+    result = find_folder(box_agent, use_async, "procurement/Invoices/2024/")
+    again = find_folder(box_agent, use_async, "Procurement/Invoices/2023")
+
+    assert result == "Procurement/Invoices/2024 (id:13)"
+    assert again == "Procurement/Invoices/2023 (id:12)"
+    # the root was listed before, then Procurement and Invoices once each
+    assert box_stub_years.request_count - requests_before == 2
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_paths_resolve_without_a_folder_index(
+    box_stub_years: BoxStubServer, box_client_stub: BoxClient, fake_model, use_async
+):
+    box_agent = LangChainBoxAgent(box_client_stub, fake_model)
+
+    assert find_folder(box_agent, use_async, "Invoices/2024") == (
+        "Invoices/2024 (id:13)"
+    )
+    assert find_folder(box_agent, use_async, "Procurement/2024") == (
+        "No folder found at this path."
+    )
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_folder_names_seen_in_listings_are_still_searched(
+    box_stub_years: BoxStubServer, box_client_stub: BoxClient, fake_model, use_async
+):
+    box_agent = LangChainBoxAgent(
+        box_client_stub, fake_model, folder_index=FolderIndex()
+    )
+    if use_async:
+        asyncio.run(box_agent.abox_list_folder_content_by_folder_id("10", True))
+    else:
+        box_agent.box_list_folder_content_by_folder_id("10", True)
+    requests_before = box_stub_years.request_count
+
+    result = find_folder(box_agent, use_async, "Invoices")
+
+    # the listing saw one "Invoices", the search finds the other one too
+    assert "(id:11)" in result and "(id:20)" in result
+    assert box_stub_years.request_count > requests_before
+
+
+def test_folder_searches_are_remembered(
+    box_stub_years: BoxStubServer, box_client_stub: BoxClient, fake_model
+):
+    box_agent = LangChainBoxAgent(
+        box_client_stub, fake_model, folder_index=FolderIndex()
+    )
+
+    first = box_agent.box_search_folder_by_name("Invoices")
+    requests_before = box_stub_years.request_count
+
+    assert box_agent.box_search_folder_by_name("invoices") == first
+    assert box_stub_years.request_count == requests_before
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    index = FolderIndex(ttl=60)
+    index.add("11", "Invoices", "10")
+    index.mark_listed("10")
+    now = time.monotonic()
+
+    monkeypatch.setattr(time, "monotonic", lambda: now + 61)
+
+    assert index.child("10", "Invoices") is None
+    assert not index.is_listed("10")
+    assert index.find("Invoices") == []
+
+
+def test_events_update_the_index():
+    index = FolderIndex()
+    index.add("10", "Procurement", "0")
+    index.add("11", "Invoices", "10")
+    index.add("13", "2024", "11")
+    index.add("20", "Archive", "0")
+    index.mark_listed("10")
+    index.remember_search("Invoices", [])
+
+    index.apply_events(
+        [
+            {
+                "event_type": "ITEM_RENAME",
+                "source": {
+                    "type": "folder",
+                    "id": "11",
+                    "name": "Bills",
+                    "parent": {"id": "10"},
+                },
+            },
+            {
+                "event_type": "ITEM_MOVE",
+                "source": {
+                    "type": "folder",
+                    "id": "13",
+                    "name": "2024",
+                    "parent": {"id": "20"},
+                },
+            },
+            {"event_type": "ITEM_TRASH", "source": {"type": "folder", "id": "10"}},
+            {"event_type": "ITEM_TRASH", "source": {"type": "file", "id": "20"}},
+        ]
+    )
+
+    assert index.find("Procurement") == []
+    assert index.find("Bills") == []
+    assert index.child("20", "2024") == "13"
+    assert index.name("20") == "Archive"
+    assert not index.is_listed("10")
+    assert index.search("Invoices") is None
@@ -0,0 +1,182 @@
+import asyncio
+import json
+import time
+
+import pytest
+from box_ai_agents_toolkit import BoxClient
+from langchain_core.messages import AIMessage, HumanMessage
+
+from src.langchain_box_agent.box_agent import LangChainBoxAgent
+from src.langchain_box_agent.box_async import AsyncBoxClient
+from src.langchain_box_agent.cancellation import RunControl, TurnBudget
+from src.langchain_box_agent.folder_walk import awalk_folder, iter_ndjson, walk_folder
+from src.langchain_box_agent.telemetry import InMemoryExporter, Telemetry
+from tests.box_stub_server import BoxStubServer
+from tests.conftest import ToolCallingFakeChatModel
+
+
+def add_tree(stub: BoxStubServer, fan_out: int = 3, files: int = 4):
+    """Adds folder 1000 with `fan_out` sub folders of `files` files each."""
+    stub.add_folder("1000", "Tree")
+    for i in range(fan_out):
+        stub.add_folder(f"3{i:03}", f"Sub {i}", parent_id="1000")
+        for j in range(files):
+            stub.add_file(f"2{i:03}{j:03}", f"file-{i}-{j}.txt", "x", f"3{i:03}")
+
+
+async def alist(items):
+    return [item async for item in items]
+
+
+def test_walk_is_breadth_first_across_pages(box_stub: BoxStubServer):
+    add_tree(box_stub)
+    client = box_stub.client()
+
+    items = list(walk_folder(client, "1000", page_size=2, max_concurrency=4))
+
+    # sibling folders are listed concurrently, so their pages may interleave
+    assert [item.id for item in items[:3]] == ["3000", "3001", "3002"]
+    assert sorted(item.id for item in items[3:]) == [
+        f"2{i:03}{j:03}" for i in range(3) for j in range(4)
+    ]
+    async_items = asyncio.run(
+        alist(awalk_folder(AsyncBoxClient(client), "1000", page_size=2))
+    )
+    assert [item.id for item in async_items] == [item.id for item in items]
+
+
+def test_walk_limits_depth_and_items(box_stub: BoxStubServer):
+    add_tree(box_stub, fan_out=5, files=10)
+    client = box_stub.client()
+
+    assert len(list(walk_folder(client, "1000", max_depth=1))) == 5
+
+    request_count = box_stub.request_count
+    items = list(
+        walk_folder(client, "1000", max_items=7, page_size=2, max_concurrency=1)
+    )
+    assert len(items) == 7
+    # the walk stops listing once enough items were found
+    assert box_stub.request_count - request_count == 4
+
+
+def test_walk_bounds_requests_in_flight(box_stub: BoxStubServer):
+    add_tree(box_stub, fan_out=12, files=1)
+    box_stub.latency = 0.05
+
+    items = list(walk_folder(box_stub.client(), "1000", max_concurrency=4))
+
+    assert len(items) == 24
+    assert 1 < box_stub.max_in_flight <= 4
+
+
+def test_page_requests_belong_to_the_walking_tool_call(
+    box_stub: BoxStubServer, fake_model
+):
+    add_tree(box_stub)
+    exporter = InMemoryExporter()
+    box_agent = LangChainBoxAgent(
+        box_stub.client(), fake_model, telemetry=Telemetry([exporter])
+    )
+    tool = {tool.name: tool for tool in box_agent.tools}[
+        "box_list_folder_content_by_folder_id"
+    ]
+
+    tool.invoke({"folder_id": "1000", "is_recursive": True})
+
+    tool_span = next(s for s in exporter.spans if s.name.startswith("tool "))
+    pages = [s for s in exporter.spans if s.name.endswith("/items")]
+    assert len(pages) == 4
+    assert {page.parent_id for page in pages} == {tool_span.span_id}
+
+
+def test_page_requests_follow_the_run_deadline(box_stub: BoxStubServer, fake_model):
+    add_tree(box_stub)
+    box_agent = LangChainBoxAgent(box_stub.client(), fake_model)
+    box_stub.fail_next("/2.0/folders/1000/items", status=503, count=5, retry_after=5)
+    control = RunControl(TurnBudget(seconds=0.3))
+
+    start = time.perf_counter()
+    with control.active(), pytest.raises(Exception):
+        list(walk_folder(box_agent.client, "1000"))
+
+    # the retries of the worker thread wait for the deadline, not for Retry-After
+    assert time.perf_counter() - start < 2
+
+
+def test_list_tool_reports_truncated_listings(
+    box_stub: BoxStubServer, box_client_stub: BoxClient, fake_model
+):
+    add_tree(box_stub)
+    box_agent = LangChainBoxAgent(box_client_stub, fake_model, list_max_items=5)
+
+    response = box_agent.box_list_folder_content_by_folder_id("1000", True)
+    listing, note = response.split("\n\n")
+    assert len(json.loads(listing)) == 5
+    assert note.startswith("[Listing stopped after 5 items.")
+    assert (
+        asyncio.run(box_agent.abox_list_folder_content_by_folder_id("1000", True))
+        == response
+    )
+
+    response = box_agent.box_list_folder_content_by_folder_id(
+        "1000", True, max_depth=1, max_items=3
+    )
+    assert [item["id"] for item in json.loads(response)] == ["3000", "3001", "3002"]
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_list_tool_streams_items_to_graph_runs(
+    box_client_stub: BoxClient, use_async: bool
+):
+    model = ToolCallingFakeChatModel(
+        responses=[
+            AIMessage(
+                content="",
+                tool_calls=[
+                    {
+                        "name": "box_list_folder_content_by_folder_id",
+                        "args": {"folder_id": "10", "is_recursive": True},
+                        "id": "call_0",
+                    }
+                ],
+            ),
+            AIMessage(content="done"),
+        ]
+    )
+    box_agent = LangChainBoxAgent(box_client_stub, model)
+    inputs = {"messages": [HumanMessage(content="list procurement")]}
+
+    if use_async:
+
+        async def stream():
+            return [
+                chunk
+                async for chunk in box_agent.react_agent.astream(
+                    inputs, stream_mode="custom"
+                )
+            ]
+
+        chunks = asyncio.run(stream())
+    else:
+        chunks = list(box_agent.react_agent.stream(inputs, stream_mode="custom"))
+
+    # the tool node streams the start and end of the call too
+    assert [
+        chunk["folder_item"]["id"] for chunk in chunks if "folder_item" in chunk
+    ] == [
+        "11",
+        "200",
+        "100",
+        "101",
+    ]
+
+
+def test_iter_ndjson(box_client_stub: BoxClient):
+    lines = list(iter_ndjson(walk_folder(box_client_stub, "11")))
+
+    assert [json.loads(line)["name"] for line in lines] == [
+        "invoice-001.pdf",
+        "invoice-002.pdf",
+    ]
+    assert all(line.endswith("\n") for line in lines)
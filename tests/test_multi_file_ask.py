@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+from box_ai_agents_toolkit import BoxClient
+
+from src.langchain_box_agent.box_agent import LangChainBoxAgent
+from tests.box_stub_server import BoxStubServer
+
+
+def ask(box_agent: LangChainBoxAgent, use_async: bool, **kwargs) -> str:
+    if use_async:
+        return asyncio.run(box_agent.abox_ask_ai_multi_file_tool(**kwargs))
+    return box_agent.box_ask_ai_multi_file_tool(**kwargs)
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_files_are_asked_about_in_one_request(
+    box_stub: BoxStubServer, box_client_stub: BoxClient, fake_model, use_async: bool
+):
+    box_agent = LangChainBoxAgent(box_client_stub, fake_model)
+
+    answer = ask(
+        box_agent, use_async, file_ids=["100", "101", "100"], prompt="any missing po?"
+    )
+
+    assert answer == "any missing po? -> invoice-001.pdf, invoice-002.pdf"
+    assert len(box_stub.ai_requests) == 1
+    assert box_stub.ai_requests[0]["mode"] == "multiple_item_qa"
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_large_file_sets_are_chunked(
+    box_stub: BoxStubServer, box_client_stub: BoxClient, fake_model, use_async: bool
+):
+    file_ids = [str(500 + i) for i in range(45)]
+    for file_id in file_ids:
+        box_stub.add_file(file_id, f"receipt-{file_id}.pdf")
+    box_agent = LangChainBoxAgent(box_client_stub, fake_model, ask_concurrency=2)
+
+    answer = ask(box_agent, use_async, file_ids=file_ids, prompt="total?")
+
+    # the chunks are sent concurrently, in any order
+    assert sorted(len(body["items"]) for body in box_stub.ai_requests) == [5, 20, 20]
+    # the answers are merged in the order of the files
+    assert answer == "\n\n".join(
+        f"Files {', '.join(chunk)}:\ntotal? -> "
+        + ", ".join(f"receipt-{file_id}.pdf" for file_id in chunk)
+        for chunk in [file_ids[:20], file_ids[20:40], file_ids[40:]]
+    )
+    assert box_stub.max_in_flight <= 2
+
+
+def test_file_ids_are_required(box_client_stub: BoxClient, fake_model):
+    box_agent = LangChainBoxAgent(box_client_stub, fake_model)
+
+    with pytest.raises(ValueError):
+        box_agent.box_ask_ai_multi_file_tool([], "anything?")
@@ -0,0 +1,166 @@
+import asyncio
+import json
+import re
+
+import pytest
+from box_ai_agents_toolkit import BoxClient
+
+from src.langchain_box_agent.box_agent import LangChainBoxAgent
+from src.langchain_box_agent.cache import ToolCache
+from src.langchain_box_agent.output_budget import NOTE_RESERVE, OutputBudget
+from tests.box_stub_server import BoxStubServer
+from tests.test_folder_walk import add_tree
+from tests.test_read_window import LONG_TEXT
+from tests.test_search import add_receipts
+
+
+def list_folder(box_agent: LangChainBoxAgent, use_async: bool, **kwargs) -> str:
+    if use_async:
+        return asyncio.run(box_agent.abox_list_folder_content_by_folder_id(**kwargs))
+    return box_agent.box_list_folder_content_by_folder_id(**kwargs)
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_listings_are_paged_to_fit_the_budget(
+    box_stub: BoxStubServer, box_client_stub: BoxClient, fake_model, use_async: bool
+):
+    add_tree(box_stub)
+    budget = OutputBudget(max_tokens=NOTE_RESERVE + 40)
+    box_agent = LangChainBoxAgent(
+        box_client_stub,
+        fake_model,
+        output_budgets={"box_list_folder_content_by_folder_id": budget},
+    )
+
+    ids, offset, calls = [], 0, 0
+    while True:
+        response = list_folder(
+            box_agent, use_async, folder_id="1000", is_recursive=True, offset=offset
+        )
+        calls += 1
+        assert budget.fits(response)
+        listing, _, note = response.partition("\n\n")
+        ids.extend(item["id"] for item in json.loads(listing))
+        if not note:
+            break
+        assert "to fit the output budget" in note
+        offset = int(re.search(r"offset=(\d+)", note).group(1))
+        assert offset == len(ids)
+
+    assert calls > 2
+    assert sorted(ids) == sorted(
+        ["3000", "3001", "3002"]
+        + [f"2{i:03}{j:03}" for i in range(3) for j in range(4)]
+    )
+
+
+def test_listings_are_compact(box_client_stub: BoxClient, fake_model):
+    box_agent = LangChainBoxAgent(box_client_stub, fake_model)
+
+    response = box_agent.box_list_folder_content_by_folder_id("11", False)
+
+    assert response == (
+        '[{"id":"100","name":"invoice-001.pdf","type":"file",'
+        '"description":"First invoice"},\n'
+        '{"id":"101","name":"invoice-002.pdf","type":"file"}]'
+    )
+
+
+JAPANESE_TEXT = "賃借人は毎月家賃を支払う。" * 400
+
+
+@pytest.mark.parametrize("cached", [False, True])
+@pytest.mark.parametrize("use_async", [False, True])
+@pytest.mark.parametrize(
+    "text, budget",
+    [
+        (LONG_TEXT, OutputBudget(max_tokens=NOTE_RESERVE + 25)),
+        (LONG_TEXT, OutputBudget(max_tokens=200, token_counter=len)),
+        # three bytes per character
+        (JAPANESE_TEXT, OutputBudget(max_bytes=2000)),
+    ],
+    ids=["estimated tokens", "counted tokens", "bytes"],
+)
+def test_read_windows_shrink_to_the_budget(
+    box_stub: BoxStubServer,
+    box_client_stub: BoxClient,
+    fake_model,
+    use_async: bool,
+    cached: bool,
+    text: str,
+    budget: OutputBudget,
+):
+    box_stub.add_file("300", "contract.txt", text=text)
+    box_agent = LangChainBoxAgent(
+        box_client_stub,
+        fake_model,
+        output_budgets={"box_read_tool": budget},
+        tool_caches={"box_read_tool": ToolCache()} if cached else None,
+    )
+
+    if use_async:
+        response = asyncio.run(box_agent.abox_read_tool("300", offset=100))
+    else:
+        response = box_agent.box_read_tool("300", offset=100)
+
+    # the window is measured, and still ends with the offset of the next one
+    assert budget.fits(response)
+    window, note = response.split("\n\n[More text follows.")
+    assert len(window) > 10
+    assert window == text[100 : 100 + len(window)]
+    assert note == (
+        f" Call box_read_tool with file_id=300 and offset={100 + len(window)} "
+        "to continue reading.]"
+    )
+
+
+def test_search_results_are_cut_at_the_budget(
+    box_stub: BoxStubServer, box_client_stub: BoxClient, fake_model
+):
+    add_receipts(box_stub, 10)
+    box_agent = LangChainBoxAgent(
+        box_client_stub,
+        fake_model,
+        output_budgets={"box_search_tool": OutputBudget(max_tokens=NOTE_RESERVE + 23)},
+    )
+
+    lines, note = box_agent.box_search_tool("receipt").split("\n\n")
+
+    assert lines.splitlines() == [
+        "receipt-000.pdf (id:1000)",
+        "receipt-001.pdf (id:1001)",
+        "receipt-002.pdf (id:1002)",
+    ]
+    assert "Call box_search_tool with offset=3 to see more." in note
+
+
+def test_other_outputs_are_cut_at_a_line_break():
+    budget = OutputBudget(max_bytes=60)
+    text = "\n".join(f"line {i}" for i in range(20))
+
+    result = budget.truncate(text, "[cut]")
+
+    assert result == "line 0\nline 1\nline 2\nline 3\nline 4\nline 5\nline 6\n\n[cut]"
+    assert budget.truncate("short", "[cut]") == "short"
+
+
+def test_budgets_are_set_per_tool(box_client_stub: BoxClient, fake_model):
+    tokens = OutputBudget(max_tokens=100, token_counter=lambda text: len(text.split()))
+    box_agent = LangChainBoxAgent(
+        box_client_stub,
+        fake_model,
+        max_output_tokens=1000,
+        output_budgets={"box_read_tool": None, "box_search_tool": tokens},
+    )
+
+    assert box_agent.output_budgets["box_read_tool"] is None
+    assert box_agent.output_budgets["box_search_tool"].size("two words") == 2
+    assert box_agent.output_budgets["box_who_am_i"].limit == 1000
+    with pytest.raises(ValueError):
+        LangChainBoxAgent(
+            box_client_stub,
+            fake_model,
+            output_budgets={"box_semantic_search": tokens},
+        )
+    with pytest.raises(ValueError):
+        OutputBudget()
@@ -0,0 +1,126 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from box_ai_agents_toolkit import BoxClient
+
+from src.langchain_box_agent.box_agent import LangChainBoxAgent
+from src.langchain_box_agent.cache import ToolCache
+from src.langchain_box_agent.cancellation import RunControl, check_cancelled
+from src.langchain_box_agent.prefetch import PrefetchPolicy, Prefetcher
+from tests.box_stub_server import BoxStubServer
+
+
+def prefetching_agent(
+    client: BoxClient, fake_model, policy: PrefetchPolicy | None = None
+) -> LangChainBoxAgent:
+    return LangChainBoxAgent(
+        client,
+        fake_model,
+        tool_caches={"box_read_tool": ToolCache()},
+        prefetch=policy or PrefetchPolicy(),
+    )
+
+
+def test_search_results_are_read_ahead(box_stub: BoxStubServer, fake_model):
+    box_agent = prefetching_agent(box_stub.client(), fake_model)
+    cache = box_agent.tool_caches["box_read_tool"]
+
+    box_agent.box_search_tool("invoice")
+    for file_id in ["100", "101"]:
+        box_agent.prefetcher.join(file_id)
+    requests = box_stub.request_count
+
+    assert box_agent.box_read_tool("101").startswith("Invoice 002")
+    # the version of the file is asked, its text comes from the cache
+    assert box_stub.request_count == requests + 1
+    assert cache.stats.hits == 1 and cache.stats.misses == 0
+    assert box_agent.prefetcher.stats().cached == 2
+
+
+def test_async_folder_listings_are_read_ahead(box_stub: BoxStubServer, fake_model):
+    box_agent = prefetching_agent(box_stub.client(), fake_model)
+    cache = box_agent.tool_caches["box_read_tool"]
+
+    async def run():
+        await box_agent.abox_list_folder_content_by_folder_id("11", False)
+        return await box_agent.abox_read_tool("100")
+
+    assert asyncio.run(run()).startswith("Invoice 001")
+    assert cache.stats.hits == 1
+    assert box_agent.prefetcher.stats().cached >= 1
+
+
+def test_only_the_first_files_of_a_result_are_read_ahead(
+    box_stub: BoxStubServer, fake_model
+):
+    box_agent = prefetching_agent(
+        box_stub.client(), fake_model, PrefetchPolicy(files=1)
+    )
+
+    box_agent.box_list_folder_content_by_folder_id("10", True)
+    time.sleep(0.2)
+
+    assert box_agent.prefetcher.stats().started == 1
+
+
+def test_long_texts_are_not_kept(box_stub: BoxStubServer, fake_model):
+    box_agent = prefetching_agent(
+        box_stub.client(), fake_model, PrefetchPolicy(max_chars=10)
+    )
+
+    box_agent.box_search_tool("PO-001", ancestor_folder_ids=["10"])
+    box_agent.prefetcher.join("200")
+
+    assert box_agent.prefetcher.stats().skipped >= 1
+    assert box_agent.prefetcher.stats().cached == 0
+
+
+def test_newer_results_supersede_files_still_read_ahead():
+    prefetcher = Prefetcher(PrefetchPolicy(concurrency=1))
+    release = threading.Event()
+    fetched = []
+
+    def fetch(file_id, version):
+        release.wait(5)
+        fetched.append(file_id)
+        return True
+
+    prefetcher.prefetch([("1", "v"), ("2", "v")], fetch)
+    prefetcher.prefetch([("1", "v"), ("3", "v")], fetch)
+    release.set()
+    for file_id in ["1", "3"]:
+        prefetcher.join(file_id)
+
+    # "1" was started once, "2" never started
+    assert fetched == ["1", "3"]
+    assert prefetcher.stats().cancelled == 1
+    prefetcher.close()
+
+
+def test_stopping_the_run_stops_its_prefetch():
+    prefetcher = Prefetcher(PrefetchPolicy())
+    control = RunControl()
+    started = threading.Event()
+
+    def fetch(file_id, version):
+        started.set()
+        # a download checking the run between its chunks
+        while True:
+            time.sleep(0.01)
+            check_cancelled()
+
+    with control.active():
+        prefetcher.prefetch([("1", "v")], fetch)
+    started.wait(5)
+    control.cancel("stopped by the user")
+    prefetcher.join("1")
+
+    assert prefetcher.stats().cancelled == 1
+    prefetcher.close()
+
+
+def test_prefetch_needs_a_read_cache(box_client_stub: BoxClient, fake_model):
+    with pytest.raises(ValueError):
+        LangChainBoxAgent(box_client_stub, fake_model, prefetch=PrefetchPolicy())
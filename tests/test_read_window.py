@@ -0,0 +1,92 @@
+import asyncio
+import re
+
+import pytest
+from box_ai_agents_toolkit import BoxClient
+
+from src.langchain_box_agent.box_agent import LangChainBoxAgent
+from src.langchain_box_agent.box_text import read_text_window
+from src.langchain_box_agent.cache import ToolCache
+from tests.box_stub_server import BoxStubServer
+
+LONG_TEXT = "".join(f"Clause {i}: the tenant shall pay rent. " for i in range(2000))
+
+
+@pytest.mark.parametrize(
+    "chunks, offset, max_chars, expected",
+    [
+        (["abcd", "efgh", "ij"], 0, 3, ("abc", 3)),
+        (["abcd", "efgh", "ij"], 3, 4, ("defg", 7)),
+        (["abcd", "efgh", "ij"], 6, 10, ("ghij", None)),
+        (["abcd", "efgh"], 4, 4, ("efgh", None)),
+        (["abcd", "efgh", "ij"], 4, 4, ("efgh", 8)),
+        (["abcd"], 10, 4, ("", None)),
+    ],
+)
+def test_read_text_window(chunks, offset, max_chars, expected):
+    assert read_text_window(iter(chunks), offset, max_chars) == expected
+
+
+def test_read_text_window_stops_consuming_the_stream():
+    consumed = []
+
+    def chunks():
+        for i in range(100):
+            consumed.append(i)
+            yield "x" * 10
+
+    assert read_text_window(chunks(), 0, 25) == ("x" * 25, 25)
+    assert len(consumed) == 3
+
+
+def read_all_pages(read_tool, file_id: str) -> str:
+    pages = []
+    offset = 0
+    while True:
+        page = read_tool(file_id=file_id, offset=offset)
+        match = re.search(r"\n\n\[More text follows.*offset=(\d+)", page)
+        if match is None:
+            pages.append(page)
+            return "".join(pages)
+        pages.append(page[: match.start()])
+        offset = int(match.group(1))
+
+
+@pytest.mark.parametrize("use_cache", [False, True])
+def test_read_tool_pages_through_long_documents(
+    box_stub: BoxStubServer, box_client_stub: BoxClient, fake_model, use_cache: bool
+):
+    box_stub.add_file("300", "contract.txt", text=LONG_TEXT)
+    box_agent = LangChainBoxAgent(
+        box_client_stub,
+        fake_model,
+        read_max_chars=5_000,
+        tool_caches={"box_read_tool": ToolCache()} if use_cache else None,
+    )
+
+    first_page = box_agent.box_read_tool("300")
+    assert first_page.startswith(LONG_TEXT[:5_000])
+    assert "offset=5000" in first_page
+
+    assert read_all_pages(box_agent.box_read_tool, "300") == LONG_TEXT
+
+    def aread_tool(**kwargs):
+        return asyncio.run(box_agent.abox_read_tool(**kwargs))
+
+    assert read_all_pages(aread_tool, "300") == LONG_TEXT
+
+
+def test_read_tool_without_window_returns_whole_text(
+    box_stub: BoxStubServer, box_client_stub: BoxClient, fake_model
+):
+    box_stub.add_file("300", "contract.txt", text=LONG_TEXT)
+    box_agent = LangChainBoxAgent(
+        box_client_stub, fake_model, read_max_chars=None, max_output_tokens=None
+    )
+
+    assert box_agent.box_read_tool("300") == LONG_TEXT
+    assert box_agent.box_read_tool("300", max_chars=100) == (
+        LONG_TEXT[:100]
+        + "\n\n[More text follows. Call box_read_tool with file_id=300 and "
+        "offset=100 to continue reading.]"
+    )
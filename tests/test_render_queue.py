@@ -0,0 +1,132 @@
+import threading
+from typing import List
+
+from src.demo.langchain_box_agent_ui_utils import RenderQueue
+
+
+class FakeText:
+    """Records the inserts of a Tk text widget, and the threads making them."""
+
+    def __init__(self):
+        self.inserts: List[tuple] = []
+        self.threads = set()
+
+    @property
+    def text(self) -> str:
+        return "".join(insert[0] for insert in self.inserts)
+
+    def insert(self, index, text, *tags):
+        self.inserts.append((text, *tags))
+        self.threads.add(threading.get_ident())
+
+    def see(self, index):
+        pass
+
+    def config(self, **options):
+        pass
+
+
+class FakeRoot:
+    def after(self, ms, func):
+        pass
+
+
+def test_frames_insert_a_bounded_number_of_characters():
+    widget = FakeText()
+    render = RenderQueue(FakeRoot(), widget, chars_per_frame=100)
+    render.put_text("x" * 1050, "agent_message")
+
+    frames = 0
+    while len(widget.text) < 1050:
+        before = len(widget.inserts)
+        render.render_frame()
+        frames += 1
+        assert len(widget.inserts) - before == 1
+        assert len(widget.inserts[-1][0]) <= 100
+
+    assert frames == 11
+    assert widget.inserts[-1] == ("x" * 50, "agent_message")
+
+
+def test_token_deltas_are_merged_into_one_insert_per_tag():
+    widget = FakeText()
+    render = RenderQueue(FakeRoot(), widget)
+    render.put_text("\n\n")
+    render.put_text("Box: \n", "agent_message")
+    for token in ["Invoice ", "001 ", "references ", "PO-001."]:
+        render.put_text(token, "agent_message")
+
+    render.render_frame()
+
+    assert widget.inserts == [
+        ("\n\n",),
+        ("Box: \nInvoice 001 references PO-001.", "agent_message"),
+    ]
+
+
+def test_calls_run_after_the_texts_queued_before_them():
+    widget = FakeText()
+    render = RenderQueue(FakeRoot(), widget)
+    seen = []
+    render.put_text("before")
+    render.call(lambda: seen.append(widget.text))
+    render.put_text(" after")
+
+    render.render_frame()
+
+    assert seen == ["before"]
+    assert widget.text == "before after"
+
+
+def test_only_the_main_loop_touches_the_widget():
+    widget = FakeText()
+    render = RenderQueue(FakeRoot(), widget, chars_per_frame=10_000)
+    worker = threading.Thread(
+        target=lambda: [render.put_text(f"{i} ", "agent_message") for i in range(500)]
+    )
+    worker.start()
+    worker.join()
+
+    render.render_frame()
+
+    assert widget.threads == {threading.get_ident()}
+    assert widget.text.split() == [str(i) for i in range(500)]
+
+
+def test_clear_drops_what_is_not_rendered():
+    widget = FakeText()
+    render = RenderQueue(FakeRoot(), widget, chars_per_frame=5)
+    seen = []
+    render.put_text("0123456789")
+    render.render_frame()
+    render.put_text("dropped")
+    render.call(seen.append, "input enabled")
+
+    render.clear()
+    render.render_frame()
+
+    assert widget.text == "01234"
+    # queued calls still run
+    assert seen == ["input enabled"]
+
+
+def test_clear_keeps_the_order_of_calls_queued_meanwhile(frequent_thread_switches):
+    render = RenderQueue(FakeRoot(), FakeText())
+    seen = []
+
+    def produce():
+        for i in range(20_000):
+            render.put_text("token")
+            render.call(seen.append, i)
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    while producer.is_alive():
+        render.clear()
+    producer.join()
+    render.clear()
+    while len(seen) < 20_000:
+        render.render_frame()
+
+    assert seen == list(range(20_000))
+    assert render.widget.text == ""
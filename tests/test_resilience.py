@@ -0,0 +1,179 @@
+import asyncio
+import time
+
+import pytest
+import requests
+from box_ai_agents_toolkit import BoxClient
+from box_sdk_gen import BoxAPIError
+
+from src.langchain_box_agent.box_agent import LangChainBoxAgent
+from src.langchain_box_agent.cancellation import RunCancelled, RunControl, TurnBudget
+from src.langchain_box_agent.resilience import (
+    CircuitOpenError,
+    HttpPolicy,
+    TokenBucket,
+    endpoint_class,
+)
+from tests.box_stub_server import BoxStubServer
+
+
+def who_am_i(box_agent: LangChainBoxAgent, use_async: bool) -> str:
+    if use_async:
+        return asyncio.run(box_agent.abox_who_am_i())
+    return box_agent.box_who_am_i()
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_throttled_requests_are_retried_after_retry_after(
+    box_stub: BoxStubServer, box_client_stub: BoxClient, fake_model, use_async: bool
+):
+    http_policy = HttpPolicy()
+    box_agent = LangChainBoxAgent(box_client_stub, fake_model, http_policy=http_policy)
+    who_am_i(box_agent, use_async)
+    box_stub.fail_next("/2.0/users/me", status=429, count=2, retry_after=0)
+
+    assert "Stub User" in who_am_i(box_agent, use_async)
+    counters = http_policy.counters()["other"]
+    assert counters["throttled"] == 2
+    assert counters["retries"] == 2
+    assert counters["circuit"] == "closed"
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_failing_endpoints_open_the_circuit(
+    box_stub: BoxStubServer, box_client_stub: BoxClient, fake_model, use_async: bool
+):
+    http_policy = HttpPolicy(max_attempts=2, failure_threshold=2, reset_timeout=0.2)
+    box_agent = LangChainBoxAgent(box_client_stub, fake_model, http_policy=http_policy)
+    who_am_i(box_agent, use_async)
+    box_stub.fail_next("/2.0/users/me", status=503, count=2, retry_after=None)
+
+    with pytest.raises(Exception) as error:
+        who_am_i(box_agent, use_async)
+    assert not isinstance(error.value, CircuitOpenError)
+    requests_before = box_stub.request_count
+    with pytest.raises(CircuitOpenError):
+        who_am_i(box_agent, use_async)
+    assert box_stub.request_count == requests_before
+
+    time.sleep(0.2)
+    assert "Stub User" in who_am_i(box_agent, use_async)
+    counters = http_policy.counters()["other"]
+    assert counters["server_errors"] == 2
+    assert counters["rejected"] == 1
+    assert counters["circuit"] == "closed"
+
+
+def open_circuit(http_policy: HttpPolicy, url: str):
+    def fail() -> requests.Response:
+        raise requests.ConnectionError("unreachable")
+
+    with pytest.raises(requests.ConnectionError):
+        http_policy.send(url, fail)
+    time.sleep(0.05)
+    assert http_policy.breakers["other"].state == "half_open"
+
+
+def ok() -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    return response
+
+
+@pytest.mark.parametrize("abort", ["send", "rate limit", "async cancel"])
+def test_aborted_probes_let_the_next_request_probe(abort: str):
+    url = "https://api.box.com/2.0/users/me"
+    http_policy = HttpPolicy(max_attempts=1, failure_threshold=1, reset_timeout=0.05)
+    open_circuit(http_policy, url)
+
+    if abort == "send":
+
+        def crash() -> requests.Response:
+            raise RuntimeError("not a network error")
+
+        with pytest.raises(RuntimeError):
+            http_policy.send(url, crash)
+    elif abort == "rate limit":
+        http_policy.buckets["other"] = TokenBucket(1.0, burst=1)
+        http_policy.buckets["other"].reserve()
+        control = RunControl(TurnBudget(seconds=0.05))
+        with control.active(), pytest.raises(RunCancelled):
+            http_policy.send(url, ok)
+        del http_policy.buckets["other"]
+    else:
+
+        async def hang():
+            await asyncio.sleep(5)
+
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(asyncio.wait_for(http_policy.asend(url, hang), 0.05))
+
+    assert http_policy.send(url, ok).status_code == 200
+    assert http_policy.counters()["other"]["circuit"] == "closed"
+
+
+def test_sdk_errors_come_through_after_the_last_attempt(
+    box_stub: BoxStubServer, box_client_stub: BoxClient
+):
+    client = HttpPolicy(max_attempts=3, backoff_base=0.01).wrap(box_client_stub)
+    box_stub.fail_next("/2.0/users/me", status=500, count=3, retry_after=None)
+
+    with pytest.raises(BoxAPIError):
+        client.users.get_user_me()
+    assert box_stub.failure_count == 3
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_text_downloads_are_retried(
+    box_stub: BoxStubServer, box_client_stub: BoxClient, fake_model, use_async: bool
+):
+    http_policy = HttpPolicy()
+    box_agent = LangChainBoxAgent(box_client_stub, fake_model, http_policy=http_policy)
+    box_stub.fail_next("/stub/text/", status=503)
+
+    if use_async:
+        # the text is streamed, through the policy like any other request
+        text = asyncio.run(box_agent.abox_read_tool("100"))
+    else:
+        text = box_agent.box_read_tool("100")
+    assert text.startswith("Invoice 001")
+    assert http_policy.counters()["content"]["retries"] == 1
+
+
+def test_requests_are_rate_limited_per_endpoint_class(
+    box_client_stub: BoxClient, fake_model
+):
+    http_policy = HttpPolicy(rates={"search": 20.0, "other": None})
+    http_policy.buckets["search"] = TokenBucket(20.0, burst=1)
+    box_agent = LangChainBoxAgent(box_client_stub, fake_model, http_policy=http_policy)
+
+    started = time.monotonic()
+    for _ in range(5):
+        box_agent.box_search_tool("invoice")
+    elapsed = time.monotonic() - started
+
+    assert elapsed >= 0.15
+    assert http_policy.counters()["search"]["wait_seconds"] >= 0.15
+    assert "other" not in http_policy.buckets
+
+
+def test_backoff_has_full_jitter_and_honors_retry_after():
+    http_policy = HttpPolicy(backoff_base=1.0, backoff_max=4.0)
+
+    delays = [http_policy.retry_delay(5) for _ in range(200)]
+
+    assert all(0 <= delay <= 4.0 for delay in delays)
+    assert len(set(delays)) > 100
+    assert http_policy.retry_delay(1, "2") == 2.0
+    assert http_policy.retry_delay(1, "120") == 4.0
+
+
+def test_endpoint_classes():
+    assert endpoint_class("https://api.box.com/2.0/search?query=x") == "search"
+    assert endpoint_class("https://api.box.com/2.0/ai/ask") == "ai"
+    assert endpoint_class("https://api.box.com/2.0/files/1/content") == "content"
+    assert endpoint_class("https://dl.boxcloud.com/api/2.0/internal_files/1") == (
+        "content"
+    )
+    assert endpoint_class("https://api.box.com/2.0/folders/0/items") == "other"
+    assert endpoint_class("https://api.box.com/oauth2/token") == "other"
@@ -0,0 +1,172 @@
+import asyncio
+
+import pytest
+from box_ai_agents_toolkit import BoxClient
+
+from src.langchain_box_agent.box_agent import LangChainBoxAgent
+from src.langchain_box_agent.cache import ToolCache
+from tests.box_stub_server import BoxStubServer
+
+pytest.importorskip("numpy")
+
+from src.langchain_box_agent.retrieval import (  # noqa: E402
+    IndexedDocument,
+    RetrievalIndex,
+)
+
+LEASE_TEXT = " ".join(
+    [f"Section {i}: maintenance of the premises is shared." for i in range(40)]
+    + ["The security deposit is returned within thirty days after move out."]
+    + [f"Section {i}: the landlord keeps the keys." for i in range(40, 80)]
+)
+
+
+def test_index_returns_best_matching_chunks(tmp_path):
+    index = RetrievalIndex(str(tmp_path), chunk_size=200, chunk_overlap=0)
+    index.update_files(
+        [
+            IndexedDocument("1", "v1", "lease.txt", LEASE_TEXT),
+            IndexedDocument("2", "v1", "menu.txt", "Pizza, pasta and salad."),
+        ]
+    )
+
+    passages = index.search("when is the security deposit returned", top_k=2)
+
+    assert len(passages) == 2
+    assert passages[0].file_id == "1"
+    assert "security deposit" in passages[0].text
+    assert passages[0].score >= passages[1].score
+    assert index.search("pizza", top_k=1, file_ids=["2"])[0].name == "menu.txt"
+    assert index.search("pizza", file_ids=[]) == []
+
+
+def test_index_persists_and_replaces_file_versions(tmp_path):
+    index = RetrievalIndex(str(tmp_path))
+    index.update_files([IndexedDocument("1", "v1", "a.txt", "old apples")])
+    index.update_files([IndexedDocument("2", "v1", "b.txt", "bananas")])
+    index.update_files([IndexedDocument("1", "v2", "a.txt", "new cherries")])
+
+    reopened = RetrievalIndex(str(tmp_path))
+    assert len(reopened) == 2
+    assert reopened.indexed_version("1") == "v2"
+    assert [p.text for p in reopened.search("apples cherries", top_k=5)] == [
+        "new cherries",
+        "bananas",
+    ]
+
+    reopened.remove_files(["1"])
+    assert reopened.indexed_version("1") is None
+    assert [p.file_id for p in reopened.search("cherries")] == ["2"]
+
+    reopened.clear()
+    assert reopened.search("bananas") == []
+
+
+def test_updates_append_to_the_index_until_it_is_compacted(tmp_path):
+    index = RetrievalIndex(str(tmp_path), compact_ratio=0.5)
+    index.update_files([IndexedDocument("1", "v1", "a.txt", "old apples")])
+    index.update_files([IndexedDocument("2", "v1", "b.txt", "bananas")])
+    vectors = tmp_path / "vectors-0.f32"
+    changes = tmp_path / "changes-0.jsonl"
+    size = vectors.stat().st_size
+
+    # the new version is appended, the old one only marked as deleted
+    index.update_files([IndexedDocument("3", "v1", "c.txt", "cherries")])
+    index.update_files([IndexedDocument("1", "v2", "a.txt", "new apples")])
+    assert vectors.stat().st_size == 2 * size
+    # one line of metadata per update, without the texts
+    lines = changes.read_text().splitlines()
+    assert len(lines) == 4
+    assert "apples" not in changes.read_text()
+    assert [p.text for p in index.search("apples", top_k=1)] == ["new apples"]
+
+    # a change cut short by a crash is dropped
+    with changes.open("a") as file:
+        file.write('{"files": {"4"')
+    assert RetrievalIndex(str(tmp_path)).indexed_version("1") == "v2"
+    assert changes.read_text().splitlines() == lines
+
+    # half of the chunks are deleted, the index is rewritten without them
+    index.remove_files(["2"])
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "chunks-1.txt",
+        "index.json",
+        "vectors-1.f32",
+    ]
+    assert (tmp_path / "vectors-1.f32").stat().st_size == size
+    reopened = RetrievalIndex(str(tmp_path))
+    assert len(reopened) == 2
+    assert sorted(p.text for p in reopened.search("apples cherries")) == [
+        "cherries",
+        "new apples",
+    ]
+
+
+def test_semantic_search_tool_indexes_only_changed_files(
+    box_stub: BoxStubServer, box_client_stub: BoxClient, fake_model, tmp_path
+):
+    box_stub.add_file("300", "lease.txt", text=LEASE_TEXT, parent_id="10")
+    read_cache = ToolCache()
+    box_agent = LangChainBoxAgent(
+        box_client_stub,
+        fake_model,
+        retrieval_index=RetrievalIndex(str(tmp_path), chunk_size=200),
+        tool_caches={"box_read_tool": read_cache},
+    )
+    assert "box_semantic_search" in [tool.name for tool in box_agent.tools]
+
+    response = box_agent.box_semantic_search(
+        "security deposit returned", folder_id="10", top_k=1
+    )
+    assert response.startswith("lease.txt (id:300) score:")
+    assert "security deposit" in response
+    assert read_cache.stats.misses == 4
+
+    # unchanged files are neither downloaded nor embedded again
+    assert (
+        asyncio.run(
+            box_agent.abox_semantic_search(
+                "security deposit returned", folder_id="10", top_k=1
+            )
+        )
+        == response
+    )
+    assert read_cache.stats.misses == 4
+
+    box_stub.update_file("100", "Invoice 001 now mentions a security deposit.")
+    response = box_agent.box_semantic_search("security deposit", file_ids=["100"])
+    assert response.startswith("invoice-001.pdf (id:100)")
+    assert read_cache.stats.misses == 5
+
+    # without scope, every file indexed so far is searched
+    assert "lease.txt" in box_agent.box_semantic_search("landlord keys")
+
+
+def test_semantic_search_bounds_its_walk_and_extractions(
+    box_stub: BoxStubServer, box_client_stub: BoxClient, fake_model, tmp_path
+):
+    box_stub.add_folder("30", "Leases")
+    for i in range(8):
+        box_stub.add_file(f"30{i}", f"lease-{i}.txt", text=LEASE_TEXT, parent_id="30")
+    box_stub.latency = 0.02
+    box_agent = LangChainBoxAgent(
+        box_client_stub,
+        fake_model,
+        retrieval_index=RetrievalIndex(str(tmp_path), chunk_size=200),
+        list_max_items=6,
+        list_concurrency=2,
+        extract_concurrency=2,
+    )
+
+    response = asyncio.run(
+        box_agent.abox_semantic_search("security deposit", folder_id="30")
+    )
+
+    assert response.endswith(
+        "[Only the first 6 items of folder 30 were searched. Call "
+        "box_semantic_search with the file_ids or the folder_id of a sub folder "
+        "to search the others.]"
+    )
+    assert len(box_agent.retrieval_index) > 0
+    assert box_agent.retrieval_index.indexed_version("307") is None
+    assert box_stub.max_in_flight <= 2
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+from box_ai_agents_toolkit import BoxClient
+
+from src.langchain_box_agent.box_agent import LangChainBoxAgent
+from src.langchain_box_agent.box_search import iter_search_pages
+from tests.box_stub_server import BoxStubServer
+
+
+def search(box_agent: LangChainBoxAgent, use_async: bool, **kwargs) -> str:
+    if use_async:
+        return asyncio.run(box_agent.abox_search_tool(**kwargs))
+    return box_agent.box_search_tool(**kwargs)
+
+
+def add_receipts(box_stub: BoxStubServer, count: int):
+    for i in range(count):
+        box_stub.add_file(str(1000 + i), f"receipt-{i:03}.pdf", text="receipt")
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_search_shows_description_by_default(
+    box_client_stub: BoxClient, fake_model, use_async: bool
+):
+    box_agent = LangChainBoxAgent(box_client_stub, fake_model)
+
+    assert search(box_agent, use_async, query="invoice-00") == (
+        "invoice-001.pdf (id:100) First invoice\ninvoice-002.pdf (id:101)"
+    )
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_search_pages_with_limit_and_offset(
+    box_stub: BoxStubServer, box_client_stub: BoxClient, fake_model, use_async: bool
+):
+    add_receipts(box_stub, 45)
+    box_agent = LangChainBoxAgent(box_client_stub, fake_model, search_limit=20)
+
+    first = search(box_agent, use_async, query="receipt")
+    last = search(box_agent, use_async, query="receipt", offset=40, fields=[])
+
+    assert first.splitlines()[0] == "receipt-000.pdf (id:1000)"
+    assert first.endswith(
+        "receipt-019.pdf (id:1019)\n\n[Showing results 1 to 20 of about 45. "
+        "Call box_search_tool with offset=20 to see more.]"
+    )
+    assert last == "\n".join(
+        f"receipt-{i:03}.pdf (id:{1000 + i})" for i in range(40, 45)
+    )
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_search_requests_only_the_pages_it_needs(
+    box_stub: BoxStubServer, box_client_stub: BoxClient, fake_model, use_async: bool
+):
+    add_receipts(box_stub, 500)
+    box_agent = LangChainBoxAgent(box_client_stub, fake_model)
+    # the async client authenticates on its first request
+    search(box_agent, use_async, query="receipt", limit=1)
+    requests_before = box_stub.request_count
+
+    result = search(box_agent, use_async, query="receipt", limit=250)
+
+    assert len(result.split("\n\n")[0].splitlines()) == 250
+    assert box_stub.request_count - requests_before == 2
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_search_shows_requested_fields(
+    box_client_stub: BoxClient, fake_model, use_async: bool
+):
+    box_agent = LangChainBoxAgent(box_client_stub, fake_model)
+
+    result = search(
+        box_agent, use_async, query="po-001.pdf", fields=["modified_at", "size"]
+    )
+
+    assert result == "po-001.pdf (id:200) modified_at:2025-01-01T00:00:00+00:00 size:39"
+
+
+def test_search_pages_are_lazy(box_stub: BoxStubServer, box_client_stub: BoxClient):
+    add_receipts(box_stub, 30)
+    pages = iter_search_pages(box_client_stub, "receipt", page_size=10)
+    requests_before = box_stub.request_count
+
+    first = next(pages)
+    assert box_stub.request_count - requests_before == 1
+    assert [page.offset for page in pages] == [10, 20]
+    assert first.total_count == 30
+    assert box_stub.request_count - requests_before == 3
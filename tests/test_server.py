@@ -0,0 +1,293 @@
+import asyncio
+import json
+from typing import List, Tuple
+
+import httpx
+import pytest
+from box_sdk_gen import BoxClient, BoxDeveloperTokenAuth
+
+from src.langchain_box_agent.cache import ToolCache
+from src.langchain_box_agent.cancellation import TurnBudget
+from src.langchain_box_agent.checkpoint import BoundedMemorySaver
+from src.langchain_box_agent.server import AgentPool, AgentServer
+from tests.box_stub_server import BoxStubServer, stub_client
+from tests.conftest import ConversationFakeChatModel
+
+
+def read_invoice_model() -> ConversationFakeChatModel:
+    return ConversationFakeChatModel.from_script(
+        [("box_read_tool", {"file_id": "100"})], "done"
+    )
+
+
+def parse_events(text: str) -> List[Tuple[str, dict]]:
+    events = []
+    for block in text.strip().split("\n\n"):
+        event, data = block.split("\n", 1)
+        events.append((event.removeprefix("event: "), json.loads(data[6:])))
+    return events
+
+
+async def post_run(
+    client: httpx.AsyncClient, tenant_id: str, user_id: str, **body
+) -> List[Tuple[str, dict]]:
+    response = await client.post(
+        "/v1/runs",
+        json={"message": "read invoice 100", **body},
+        headers={"X-Box-Tenant-Id": tenant_id, "X-Box-User-Id": user_id},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "text/event-stream"
+    return parse_events(response.text)
+
+
+def serve(pool: AgentPool, requests, **server_options):
+    """Runs `requests(client)` against a server of `pool` and returns its result."""
+
+    async def main():
+        server = await AgentServer(pool, port=0, **server_options).start()
+        try:
+            async with httpx.AsyncClient(base_url=server.base_url) as client:
+                return await requests(client)
+        finally:
+            await server.close()
+
+    return asyncio.run(main())
+
+
+def test_runs_are_streamed_as_server_sent_events(box_stub: BoxStubServer):
+    pool = AgentPool(read_invoice_model(), lambda tenant_id, user_id: box_stub.client())
+
+    events = serve(pool, lambda client: post_run(client, "acme", "u1", thread_id="t"))
+
+    names = [event for event, _ in events]
+    assert names == ["step", "tool_start", "tool_end", "step", "step", "done"]
+    assert events[1][1]["args"] == {"file_id": "100"}
+    assert events[2][1]["status"] == "success"
+    _, tools = events[3]
+    assert tools["node"] == "tools"
+    assert tools["messages"][0]["name"] == "box_read_tool"
+    assert tools["messages"][0]["content"].startswith("Invoice 001")
+    assert events[4][1]["messages"] == [{"type": "ai", "content": "done"}]
+    assert events[-1] == ("done", {"thread_id": "t"})
+
+
+def test_users_share_the_graph_of_their_tenant(box_stub: BoxStubServer):
+    built = []
+
+    def client_factory(tenant_id: str, user_id: str) -> BoxClient:
+        built.append((tenant_id, user_id))
+        # the second user can not reach Box, its tool calls fail
+        if user_id == "offline":
+            return stub_client("http://127.0.0.1:1")
+        return box_stub.client()
+
+    pool = AgentPool(read_invoice_model(), client_factory, max_users=2)
+
+    async def requests(client: httpx.AsyncClient):
+        online, offline = await asyncio.gather(
+            post_run(client, "acme", "u1"), post_run(client, "acme", "offline")
+        )
+        graph = pool._graphs["acme"]
+        await post_run(client, "acme", "u1")
+        await post_run(client, "globex", "u2")
+        return online, offline, graph
+
+    online, offline, graph = serve(pool, requests)
+
+    assert online[3][1]["messages"][0]["content"].startswith("Invoice 001")
+    assert offline[2][1]["status"] == "error"
+    assert offline[3][1]["messages"][0]["content"].startswith("Error")
+    assert built == [("acme", "u1"), ("acme", "offline"), ("globex", "u2")]
+    stats = pool.stats()
+    assert (stats.hits, stats.misses, stats.evictions) == (1, 3, 1)
+    assert stats.users == 0 and stats.graphs == 0
+    assert graph is not None
+
+
+def test_tokens_are_refreshed_after_their_ttl(box_stub: BoxStubServer):
+    refreshes = []
+
+    class RefreshingAuth(BoxDeveloperTokenAuth):
+        def refresh_token(self, *, network_session=None):
+            refreshes.append(self.token)
+
+    def client_factory(tenant_id: str, user_id: str) -> BoxClient:
+        client = box_stub.client()
+        return BoxClient(
+            RefreshingAuth(token="stub-token"), network_session=client.network_session
+        )
+
+    pool = AgentPool(read_invoice_model(), client_factory, token_ttl=0.2)
+
+    async def requests(client: httpx.AsyncClient):
+        await post_run(client, "acme", "u1")
+        await post_run(client, "acme", "u1")
+        await asyncio.sleep(0.3)
+        await post_run(client, "acme", "u1")
+
+    serve(pool, requests)
+
+    assert refreshes == ["stub-token"]
+    assert pool.stats().refreshes == 1
+
+
+def test_requests_need_an_identity_and_a_message(box_stub: BoxStubServer):
+    pool = AgentPool(read_invoice_model(), lambda tenant_id, user_id: box_stub.client())
+
+    async def requests(client: httpx.AsyncClient):
+        anonymous = await client.post("/v1/runs", json={"message": "hi"})
+        empty = await client.post(
+            "/v1/runs",
+            json={},
+            headers={"X-Box-Tenant-Id": "acme", "X-Box-User-Id": "u1"},
+        )
+        missing = await client.get("/v2/runs")
+        health = await client.get("/healthz")
+        return anonymous, empty, missing, health
+
+    anonymous, empty, missing, health = serve(pool, requests)
+
+    assert anonymous.status_code == 401
+    assert empty.status_code == 400
+    assert missing.status_code == 404
+    assert health.json()["users"] == 0
+
+
+def test_invalid_content_lengths_are_bad_requests(box_stub: BoxStubServer):
+    pool = AgentPool(read_invoice_model(), lambda tenant_id, user_id: box_stub.client())
+
+    async def requests(client: httpx.AsyncClient):
+        # httpx only sends valid lengths
+        host, port = client.base_url.host, client.base_url.port
+        statuses = []
+        for length in ["many", "-1"]:
+            reader, writer = await asyncio.open_connection(host, port)
+            writer.write(
+                b"POST /v1/runs HTTP/1.1\r\nX-Box-Tenant-Id: acme\r\n"
+                b"X-Box-User-Id: u1\r\nContent-Length: " + length.encode() + b"\r\n\r\n"
+            )
+            statuses.append((await reader.readline()).split()[1])
+            writer.close()
+        return statuses
+
+    assert serve(pool, requests) == [b"400", b"400"]
+
+
+def test_conversations_are_kept_per_user(box_stub: BoxStubServer):
+    checkpointer = BoundedMemorySaver()
+    pool = AgentPool(
+        read_invoice_model(),
+        lambda tenant_id, user_id: box_stub.client(),
+        checkpointer=checkpointer,
+    )
+
+    async def requests(client: httpx.AsyncClient):
+        await post_run(client, "acme", "u1", thread_id="shared")
+        await post_run(client, "acme", "u2", thread_id="shared")
+
+    serve(pool, requests)
+
+    assert sorted(checkpointer.storage) == [
+        "acme/u1/shared",
+        "acme/u2/shared",
+    ]
+
+
+def test_conversations_outlive_the_graph_of_their_tenant(box_stub: BoxStubServer):
+    pool = AgentPool(
+        read_invoice_model(),
+        lambda tenant_id, user_id: box_stub.client(),
+        max_tenants=1,
+        use_internal_memory=True,
+    )
+
+    async def requests(client: httpx.AsyncClient):
+        await post_run(client, "acme", "u1", thread_id="t")
+        # evicts the graph of acme, rebuilt from the agent of u2
+        await post_run(client, "globex", "u3")
+        await post_run(client, "acme", "u2")
+        await post_run(client, "acme", "u1", thread_id="t")
+
+    serve(pool, requests)
+
+    state = pool.checkpointer.get({"configurable": {"thread_id": "acme/u1/t"}})
+    # both runs of the thread, of four messages each
+    assert len(state["channel_values"]["messages"]) == 8
+
+
+def test_caches_are_built_per_user(box_stub: BoxStubServer):
+    pool = AgentPool(
+        read_invoice_model(),
+        lambda tenant_id, user_id: box_stub.client(),
+        user_options=lambda tenant_id, user_id: {
+            "tool_caches": {"box_read_tool": ToolCache()}
+        },
+    )
+
+    async def requests(client: httpx.AsyncClient):
+        await post_run(client, "acme", "u1")
+        await post_run(client, "acme", "u2")
+        return [await pool.aget("acme", user_id) for user_id in ["u1", "u2"]]
+
+    first, second = serve(pool, requests)
+
+    caches = [agent.tool_caches["box_read_tool"] for agent in [first, second]]
+    assert caches[0] is not caches[1]
+    assert [cache.stats.misses for cache in caches] == [1, 1]
+    with pytest.raises(ValueError):
+        AgentPool(
+            read_invoice_model(),
+            lambda tenant_id, user_id: box_stub.client(),
+            tool_caches={"box_read_tool": ToolCache()},
+        )
+
+
+def test_runs_end_with_their_turn_budget(box_stub: BoxStubServer):
+    model = ConversationFakeChatModel.from_script(
+        [("box_read_tool", {"file_id": "100"})],
+        [("box_read_tool", {"file_id": "101"})],
+        "done",
+    )
+    pool = AgentPool(model, lambda tenant_id, user_id: box_stub.client())
+
+    events = serve(
+        pool,
+        lambda client: post_run(client, "acme", "u1", thread_id="t"),
+        turn_budget=TurnBudget(tool_calls=1),
+    )
+
+    names = [event for event, _ in events]
+    assert names[-3:] == ["tool_end", "step", "done"]
+    assert events[-3][1]["status"] == "error"
+    assert events[-1] == (
+        "done",
+        {"thread_id": "t", "stopped": "the turn used its 1 tool calls"},
+    )
+
+
+def test_runs_stop_when_their_client_disconnects(box_stub: BoxStubServer):
+    model = ConversationFakeChatModel.from_script(
+        *[[("box_read_tool", {"file_id": "100"})]] * 5, "done"
+    )
+    pool = AgentPool(model, lambda tenant_id, user_id: box_stub.client())
+    box_stub.latency = 0.3
+
+    async def requests(client: httpx.AsyncClient):
+        async with client.stream(
+            "POST",
+            "/v1/runs",
+            json={"message": "read invoice 100 again and again"},
+            headers={"X-Box-Tenant-Id": "acme", "X-Box-User-Id": "u1"},
+        ) as response:
+            async for line in response.aiter_lines():
+                if line == "event: tool_start":
+                    break
+        sent = box_stub.request_count
+        await asyncio.sleep(1.5)
+        return sent
+
+    sent = serve(pool, requests)
+
+    # the request in flight was cancelled and no other one was sent
+    assert box_stub.request_count <= sent + 1
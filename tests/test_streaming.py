@@ -0,0 +1,140 @@
+import asyncio
+import json
+import re
+import time
+from typing import List
+
+import pytest
+from box_ai_agents_toolkit import BoxClient
+from langchain_core.messages import AIMessageChunk
+from langchain_core.outputs import ChatGenerationChunk
+
+from src.langchain_box_agent.box_agent import LangChainBoxAgent
+from src.langchain_box_agent.compaction import HistoryCompactor, SummarizeOutput
+from src.langchain_box_agent.streaming import (
+    AgentEvent,
+    FinalEvent,
+    TokenEvent,
+    ToolEndEvent,
+    ToolStartEvent,
+    astream_events,
+    stream_events,
+)
+from tests.box_stub_server import BoxStubServer
+from tests.conftest import ToolCallingFakeChatModel
+
+
+class StreamingFakeChatModel(ToolCallingFakeChatModel):
+    """Fake chat model streaming its answers word by word."""
+
+    token_delay: float = 0.0
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        message = self._generate(messages).generations[0].message
+        if message.tool_calls:
+            tool_call_chunks = [
+                {
+                    "name": call["name"],
+                    "args": json.dumps(call["args"]),
+                    "id": call["id"],
+                    "index": index,
+                }
+                for index, call in enumerate(message.tool_calls)
+            ]
+            yield ChatGenerationChunk(
+                message=AIMessageChunk(content="", tool_call_chunks=tool_call_chunks)
+            )
+            return
+        for token in re.split(r"(?<= )", message.content):
+            time.sleep(self.token_delay)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+
+def events_of(
+    box_agent: LangChainBoxAgent, use_async: bool, query: str
+) -> List[AgentEvent]:
+    inputs = {"messages": [("user", query)]}
+    if use_async:
+
+        async def collect():
+            return [e async for e in astream_events(box_agent.react_agent, inputs)]
+
+        return asyncio.run(collect())
+    return list(stream_events(box_agent.react_agent, inputs))
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_answers_stream_token_by_token(box_client_stub: BoxClient, use_async: bool):
+    model = StreamingFakeChatModel.from_script(
+        [("box_read_tool", {"file_id": "100"})], "Invoice 001 references PO-001."
+    )
+    box_agent = LangChainBoxAgent(box_client_stub, model)
+
+    events = events_of(box_agent, use_async, "read invoice 100")
+
+    start, end, *tokens, final = events
+    assert start == ToolStartEvent("call_0_0", "box_read_tool", {"file_id": "100"})
+    assert isinstance(end, ToolEndEvent) and end.status == "success"
+    assert end.id == "call_0_0" and end.seconds > 0
+    assert [token.text for token in tokens] == [
+        "Invoice ",
+        "001 ",
+        "references ",
+        "PO-001.",
+    ]
+    assert final == FinalEvent("Invoice 001 references PO-001.")
+
+
+def test_models_that_do_not_stream_send_one_token(box_client_stub: BoxClient):
+    model = ToolCallingFakeChatModel.from_script("Authenticated, all good.")
+    box_agent = LangChainBoxAgent(box_client_stub, model)
+
+    events = events_of(box_agent, False, "who am I?")
+
+    assert events == [
+        TokenEvent("Authenticated, all good."),
+        FinalEvent("Authenticated, all good."),
+    ]
+
+
+def test_first_token_comes_before_the_end_of_the_answer(box_client_stub: BoxClient):
+    model = StreamingFakeChatModel.from_script(" ".join(["word"] * 20))
+    model.token_delay = 0.02
+    box_agent = LangChainBoxAgent(box_client_stub, model)
+
+    start = time.perf_counter()
+    events = stream_events(box_agent.react_agent, {"messages": [("user", "hi")]})
+    first = next(events)
+    first_token_seconds = time.perf_counter() - start
+    *_, final = events
+    total_seconds = time.perf_counter() - start
+
+    assert first == TokenEvent("word ")
+    assert first_token_seconds < total_seconds / 2
+    assert final.text.count("word") == 20
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_summaries_of_compacted_outputs_are_not_streamed(
+    box_stub: BoxStubServer, use_async: bool
+):
+    box_stub.add_file("300", "contract.txt", text="clause " * 2_000)
+    model = StreamingFakeChatModel.from_script(
+        [("box_read_tool", {"file_id": "300"})],
+        [("box_read_tool", {"file_id": "100"})],
+        "Invoice 001 references PO-001.",
+    )
+    summarizer = StreamingFakeChatModel.from_script("A contract of many clauses.")
+    compactor = HistoryCompactor(
+        max_tokens=1_000, default_policy=SummarizeOutput(summarizer)
+    )
+    box_agent = LangChainBoxAgent(box_stub.client(), model, history_compactor=compactor)
+
+    events = events_of(box_agent, use_async, "read the contract, then invoice 100")
+
+    tokens = "".join(event.text for event in events if isinstance(event, TokenEvent))
+    assert tokens == "Invoice 001 references PO-001."
+    assert events[-1] == FinalEvent("Invoice 001 references PO-001.")
@@ -0,0 +1,239 @@
+import asyncio
+import contextvars
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from box_ai_agents_toolkit import BoxClient
+
+from src.langchain_box_agent.box_agent import LangChainBoxAgent
+from src.langchain_box_agent.cache import ToolCache
+from src.langchain_box_agent.resilience import HttpPolicy
+from src.langchain_box_agent.telemetry import (
+    InMemoryExporter,
+    OtlpExporter,
+    Telemetry,
+    count_in_span,
+    request_route,
+)
+from tests.box_stub_server import BoxStubServer
+from tests.conftest import ToolCallingFakeChatModel
+
+
+def run(box_agent: LangChainBoxAgent, use_async: bool):
+    inputs = {"messages": [("user", "read invoice 100")]}
+    if use_async:
+        return asyncio.run(box_agent.react_agent.ainvoke(inputs))
+    return box_agent.react_agent.invoke(inputs)
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_react_runs_are_traced_down_to_box_requests(
+    box_client_stub: BoxClient, use_async: bool
+):
+    exporter = InMemoryExporter()
+    telemetry = Telemetry([exporter])
+    model = ToolCallingFakeChatModel.from_script(
+        [("box_who_am_i", {}), ("box_read_tool", {"file_id": "100"})], "done"
+    )
+    box_agent = LangChainBoxAgent(box_client_stub, model, telemetry=telemetry)
+
+    run(box_agent, use_async)
+
+    spans = {span.name: span for span in exporter.spans}
+    by_id = {span.span_id: span for span in exporter.spans}
+    assert len({span.trace_id for span in exporter.spans}) == 1
+    assert spans["react run"].parent_id is None
+    tool = spans["tool box_who_am_i"]
+    step = by_id[tool.parent_id]
+    assert step.name == "react step tools"
+    assert by_id[step.parent_id] is spans["react run"]
+    assert by_id[spans["GET /2.0/users/me"].parent_id] is tool
+    llm = spans["llm ToolCallingFakeChatModel"]
+    assert by_id[llm.parent_id].name == "react step agent"
+    assert tool.attributes["payload_bytes"] == len("Authenticated as: Stub User")
+
+
+def test_tool_metrics_include_payload_sizes_and_cache_hits(
+    box_client_stub: BoxClient, fake_model
+):
+    telemetry = Telemetry()
+    box_agent = LangChainBoxAgent(
+        box_client_stub,
+        fake_model,
+        telemetry=telemetry,
+        tool_caches={"box_list_folder_content_by_folder_id": ToolCache()},
+    )
+    tool = {tool.name: tool for tool in box_agent.tools}[
+        "box_list_folder_content_by_folder_id"
+    ]
+
+    tool.invoke({"folder_id": "10", "is_recursive": False})
+    tool.invoke({"folder_id": "10", "is_recursive": False})
+
+    labels = {"tool": "box_list_folder_content_by_folder_id"}
+    assert telemetry.histogram("box_agent_tool_seconds").count(**labels) == 2
+    assert telemetry.histogram("box_agent_tool_payload_bytes").count(**labels) == 2
+    assert telemetry.counter("box_agent_cache_hits_total", **labels) == 1
+    assert telemetry.counter("box_agent_cache_misses_total", **labels) == 1
+    text = telemetry.prometheus_text()
+    assert "# TYPE box_agent_tool_seconds histogram" in text
+    assert (
+        'box_agent_tool_seconds_count{tool="box_list_folder_content_by_folder_id"} 2'
+        in text
+    )
+    assert (
+        'box_agent_cache_hits_total{tool="box_list_folder_content_by_folder_id"} 1'
+        in text
+    )
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_retries_are_counted_per_tool(
+    box_stub: BoxStubServer, box_client_stub: BoxClient, fake_model, use_async: bool
+):
+    telemetry = Telemetry()
+    # without a policy, only the Box SDK retries
+    box_agent = LangChainBoxAgent(
+        box_client_stub,
+        fake_model,
+        telemetry=telemetry,
+        http_policy=HttpPolicy() if use_async else None,
+    )
+    tool = {tool.name: tool for tool in box_agent.tools}["box_who_am_i"]
+    if use_async:
+        # the retry must not hit the first request of the async client
+        asyncio.run(box_agent.async_client.get_user_me())
+    box_stub.fail_next("/2.0/users/me", status=503)
+
+    if use_async:
+        asyncio.run(tool.ainvoke({}))
+    else:
+        tool.invoke({})
+
+    assert telemetry.counter("box_agent_retries_total", tool="box_who_am_i") == 1
+
+
+def test_tool_errors_are_counted(box_client_stub: BoxClient, fake_model):
+    exporter = InMemoryExporter()
+    telemetry = Telemetry([exporter])
+    box_agent = LangChainBoxAgent(box_client_stub, fake_model, telemetry=telemetry)
+    tool = {tool.name: tool for tool in box_agent.tools}["box_ask_ai_multi_file_tool"]
+
+    with pytest.raises(ValueError):
+        tool.invoke({"file_ids": [], "prompt": "anything?"})
+
+    assert exporter.spans[-1].error.startswith("ValueError")
+    assert (
+        telemetry.counter(
+            "box_agent_tool_seconds_errors_total", tool="box_ask_ai_multi_file_tool"
+        )
+        == 1
+    )
+
+
+def test_otlp_exporter_sends_batches_of_spans():
+    received = []
+
+    class Collector(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_POST(self):
+            length = int(self.headers["Content-Length"])
+            received.append(json.loads(self.rfile.read(length)))
+            self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Collector)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        host, port = server.server_address[:2]
+        exporter = OtlpExporter(f"http://{host}:{port}/v1/traces", batch_size=2)
+        telemetry = Telemetry([exporter])
+        with telemetry.span("outer", kind="client"):
+            with telemetry.span("inner", attempt=2):
+                pass
+        with telemetry.span("last"):
+            pass
+        exporter.flush()
+    finally:
+        server.shutdown()
+
+    assert [
+        len(body["resourceSpans"][0]["scopeSpans"][0]["spans"]) for body in received
+    ] == [2, 1]
+
+    spans = [
+        span
+        for body in received
+        for resource in body["resourceSpans"]
+        for scope in resource["scopeSpans"]
+        for span in scope["spans"]
+    ]
+    assert [span["name"] for span in spans] == ["inner", "outer", "last"]
+    assert spans[0]["parentSpanId"] == spans[1]["spanId"]
+    assert spans[0]["attributes"] == [{"key": "attempt", "value": {"intValue": "2"}}]
+    assert spans[1]["kind"] == 3
+    assert "parentSpanId" not in spans[2]
+
+
+def test_request_routes_hide_ids():
+    assert request_route("https://api.box.com/2.0/files/123/content?x=1") == (
+        "/2.0/files/{id}/content"
+    )
+
+
+def test_counts_of_parallel_children_are_not_lost(frequent_thread_switches):
+    telemetry = Telemetry()
+
+    def child(i: int):
+        for _ in range(5000):
+            count_in_span("hits")
+        with telemetry.span(f"child {i}"):
+            count_in_span("hits", 5000)
+
+    with telemetry.span("parent", counters=True) as parent:
+        threads = [
+            threading.Thread(target=contextvars.copy_context().run, args=(child, i))
+            for i in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert parent.counts == {"hits": 80000}
+    assert telemetry.counter("box_agent_hits_total") == 80000
+
+
+class FailingExporter:
+    def export(self, spans):
+        raise RuntimeError("exporter bug")
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_exporters_never_fail_or_stall_tool_calls(
+    box_client_stub: BoxClient, fake_model, use_async: bool
+):
+    # a port nothing listens on
+    with socket.socket() as closed:
+        closed.bind(("127.0.0.1", 0))
+        port = closed.getsockname()[1]
+    otlp = OtlpExporter(f"http://127.0.0.1:{port}/v1/traces", batch_size=1)
+    telemetry = Telemetry([otlp, FailingExporter()])
+    box_agent = LangChainBoxAgent(box_client_stub, fake_model, telemetry=telemetry)
+    tool = {tool.name: tool for tool in box_agent.tools}["box_read_tool"]
+
+    if use_async:
+        text = asyncio.run(tool.ainvoke({"file_id": "100"}))
+    else:
+        text = tool.invoke({"file_id": "100"})
+
+    assert text.startswith("Invoice 001")
+    otlp.flush()
+    assert otlp.dropped >= 1
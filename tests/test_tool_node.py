@@ -0,0 +1,196 @@
+import asyncio
+import threading
+import time
+
+from box_ai_agents_toolkit import BoxClient
+from langchain.tools.base import StructuredTool
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from src.langchain_box_agent.box_agent import LangChainBoxAgent
+from src.langchain_box_agent.tool_node import DEFAULT_TOOL_CONCURRENCY, BoxToolNode
+from tests.box_stub_server import BoxStubServer
+from tests.conftest import ToolCallingFakeChatModel
+
+
+class ConcurrencyProbe:
+    """Tracks how many calls of a slow tool run at the same time."""
+
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def _enter(self):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def _exit(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def slow_echo(self, value: str) -> str:
+        """Echoes a value after a delay.
+
+        Args:
+            value (str): The value to echo.
+        """
+        self._enter()
+        time.sleep(self.delay)
+        self._exit()
+        return value
+
+    async def aslow_echo(self, value: str) -> str:
+        self._enter()
+        await asyncio.sleep(self.delay)
+        self._exit()
+        return value
+
+    def tool(self) -> StructuredTool:
+        return StructuredTool.from_function(
+            self.slow_echo, coroutine=self.aslow_echo, parse_docstring=True
+        )
+
+
+def tool_calls_message(count: int) -> AIMessage:
+    return AIMessage(
+        content="",
+        tool_calls=[
+            {"name": "slow_echo", "args": {"value": str(i)}, "id": f"call_{i}"}
+            for i in range(count)
+        ],
+    )
+
+
+def test_tool_node_keeps_call_order():
+    probe = ConcurrencyProbe()
+    node = BoxToolNode([probe.tool()], max_concurrency=8)
+
+    result = node.invoke({"messages": [tool_calls_message(8)]})
+
+    assert [message.content for message in result["messages"]] == [
+        str(i) for i in range(8)
+    ]
+    assert probe.max_in_flight == 8
+
+
+def test_tool_node_respects_max_concurrency():
+    probe = ConcurrencyProbe()
+    node = BoxToolNode([probe.tool()], max_concurrency=3)
+
+    node.invoke({"messages": [tool_calls_message(9)]})
+    assert probe.max_in_flight == 3
+
+    asyncio.run(node.ainvoke({"messages": [tool_calls_message(9)]}))
+    assert probe.max_in_flight == 3
+
+
+def test_tool_node_respects_per_tool_concurrency():
+    probe = ConcurrencyProbe()
+    node = BoxToolNode(
+        [probe.tool()], max_concurrency=10, tool_concurrency={"slow_echo": 2}
+    )
+
+    node.invoke({"messages": [tool_calls_message(6)]})
+    assert probe.max_in_flight == 2
+
+    result = asyncio.run(node.ainvoke({"messages": [tool_calls_message(6)]}))
+    assert probe.max_in_flight == 2
+    assert [message.content for message in result["messages"]] == [
+        str(i) for i in range(6)
+    ]
+
+
+def test_calls_waiting_for_their_tool_do_not_hold_a_slot():
+    probe = ConcurrencyProbe(delay=0.2)
+    started = []
+
+    def echo(value: str) -> str:
+        """Echoes a value.
+
+        Args:
+            value (str): The value to echo.
+        """
+        started.append(time.perf_counter())
+        return value
+
+    async def aecho(value: str) -> str:
+        return echo(value)
+
+    node = BoxToolNode(
+        [
+            probe.tool(),
+            StructuredTool.from_function(echo, coroutine=aecho, parse_docstring=True),
+        ],
+        max_concurrency=2,
+        tool_concurrency={"slow_echo": 1},
+    )
+    message = tool_calls_message(3)
+    message.tool_calls.append({"name": "echo", "args": {"value": "x"}, "id": "echo"})
+
+    # the capped calls queued after the first one leave the other slot free
+    start = time.perf_counter()
+    node.invoke({"messages": [message]})
+    assert started[0] - start < 0.15
+    assert probe.max_in_flight == 1
+
+    start = time.perf_counter()
+    asyncio.run(node.ainvoke({"messages": [message]}))
+    assert started[1] - start < 0.15
+    assert probe.max_in_flight == 1
+
+
+def test_tool_concurrency_is_merged_into_the_defaults():
+    probe = ConcurrencyProbe()
+    node = BoxToolNode(
+        [probe.tool()],
+        tool_concurrency={"box_ai_extract_data": 8, "box_ask_ai_tool": None},
+    )
+
+    # the other defaults stay, None lifts the cap of a tool
+    expected = {**DEFAULT_TOOL_CONCURRENCY, "box_ai_extract_data": 8}
+    del expected["box_ask_ai_tool"]
+    assert node.tool_concurrency == expected
+    assert node.tool_concurrency["box_ask_ai_multi_file_tool"] == 1
+
+
+def test_agent_fans_out_box_ai_extract_calls(
+    box_stub: BoxStubServer, box_client_stub: BoxClient, chat_config: dict
+):
+    box_stub.latency = 0.1
+    file_ids = ["100", "101", "200"] * 3
+    model = ToolCallingFakeChatModel(
+        responses=[
+            AIMessage(
+                content="",
+                tool_calls=[
+                    {
+                        "name": "box_ai_extract_data",
+                        "args": {"file_id": file_id, "fields": "po number"},
+                        "id": f"call_{i}",
+                    }
+                    for i, file_id in enumerate(file_ids)
+                ],
+            ),
+            AIMessage(content="done"),
+        ]
+    )
+    box_agent = LangChainBoxAgent(
+        box_client_stub, model, tool_concurrency={"box_ai_extract_data": 3}
+    )
+
+    start = time.perf_counter()
+    response = box_agent.react_agent.invoke(
+        {"messages": [HumanMessage(content="extract the po numbers")]}, chat_config
+    )
+    elapsed = time.perf_counter() - start
+
+    tool_messages = [
+        message for message in response["messages"] if isinstance(message, ToolMessage)
+    ]
+    assert [message.tool_call_id for message in tool_messages] == [
+        f"call_{i}" for i in range(len(file_ids))
+    ]
+    assert box_stub.max_in_flight <= 3
+    assert elapsed < 0.1 * len(file_ids)
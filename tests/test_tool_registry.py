@@ -0,0 +1,40 @@
+from box_ai_agents_toolkit import BoxClient
+from langchain.tools.base import StructuredTool
+
+from src.langchain_box_agent.box_agent import TOOL_NAMES, LangChainBoxAgent
+from tests.box_stub_server import BoxStubServer, stub_client
+
+
+def test_each_agent_has_its_own_tools(box_client_stub: BoxClient, fake_model):
+    agents = [LangChainBoxAgent(box_client_stub, fake_model) for _ in range(50)]
+
+    for box_agent in agents:
+        assert [tool.name for tool in box_agent.tools] == list(TOOL_NAMES)
+    assert agents[0].tools[0] is not agents[1].tools[0]
+
+
+def test_tools_are_bound_to_their_agent_client(box_stub: BoxStubServer, fake_model):
+    with BoxStubServer() as other_stub:
+        other_stub.add_file("900", "other.pdf", text="Other tenant")
+        agent = LangChainBoxAgent(box_stub.client(), fake_model)
+        other_agent = LangChainBoxAgent(other_stub.client(), fake_model)
+
+        read_tool = {tool.name: tool for tool in other_agent.tools}["box_read_tool"]
+        assert read_tool.invoke({"file_id": "900"}) == "Other tenant"
+        assert other_stub.request_count > 0
+
+    first = {tool.name: tool for tool in agent.tools}["box_read_tool"]
+    assert first.invoke({"file_id": "101"}) == box_stub.files["101"]["text"]
+
+
+def test_shared_schemas_match_parsed_tools(fake_model):
+    box_agent = LangChainBoxAgent(stub_client("http://127.0.0.1:1"), fake_model)
+
+    for tool in box_agent.tools:
+        parsed = StructuredTool.from_function(
+            getattr(box_agent, tool.name), parse_docstring=True
+        )
+        assert tool.description == parsed.description
+        assert tool.tool_call_schema.model_json_schema() == (
+            parsed.tool_call_schema.model_json_schema()
+        )